@@ -1,11 +1,26 @@
+import logging
+import os
 from flask import Flask
 from flask_restx import Api
+from werkzeug.middleware.proxy_fix import ProxyFix
 from services.users import user_bp, init_app as init_users
 from services.tasks import task_bp, init_app as init_tasks
+from services.utils import compression, json_encoder, logging_utils, metrics, rate_limit
 
-def create_app():
+logger = logging.getLogger(__name__)
+
+# Reverse proxies in front of the app whose X-Forwarded-For/-Proto headers
+# are trusted; 0 uses the socket peer, which is the proxy itself behind one
+TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', '0'))
+
+def create_app(log_routes=False):
     app = Flask(__name__)
-    print("Initializing Flask app...", flush=True)
+    logging_utils.init_app(app)
+    logger.info("Initializing Flask app...")
+
+    # Let request.remote_addr (and so per-address rate limits) see the client
+    if TRUSTED_PROXIES > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
     
     # Create a single API instance
     api = Api(
@@ -15,6 +30,7 @@ def create_app():
         description='A simple task management API with user authentication',
         doc='/swagger'
     )
+    json_encoder.init_api(api)
     
     # Initialize both services with the same API instance
     init_users(api)
@@ -23,10 +39,20 @@ def create_app():
     # Register blueprints
     app.register_blueprint(user_bp)
     app.register_blueprint(task_bp)
+
+    # Report RateLimit-* headers for rate limited routes
+    rate_limit.init_app(app)
+
+    # Record request latency and payload sizes for /api/metrics
+    metrics.init_app(app)
+
+    # Registered last so it runs first among the after_request hooks and
+    # metrics record the compressed response size
+    compression.init_app(app)
     
-    print("\nRegistered URL routes:", flush=True)
-    for rule in app.url_map.iter_rules():
-        print(f"{rule.endpoint}: {rule.methods} {rule}", flush=True)
+    if log_routes:
+        for rule in app.url_map.iter_rules():
+            logger.info("Registered route %s: %s %s", rule.endpoint, sorted(rule.methods), rule)
     
     # Enable CORS for all routes
     # @app.after_request
@@ -39,5 +65,5 @@ def create_app():
     return app
 
 if __name__ == '__main__':
-    app = create_app()
+    app = create_app(log_routes=True)
     app.run(debug=True, host="0.0.0.0", port=5000) 
\ No newline at end of file
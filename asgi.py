@@ -0,0 +1,218 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app import create_app
+from services.utils.db_utils import get_pool
+
+# Number of threads running Flask handlers; each blocked database call holds
+# one. 0 uses twice the connection pool's max_size: more threads would only
+# queue on the pool (up to DB_POOL_TIMEOUT) instead of in the executor
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', '0'))
+
+# Response chunks buffered per request before the handler thread waits for the client
+ASGI_SEND_BUFFER = int(os.getenv('ASGI_SEND_BUFFER', '8'))
+
+class _ClientDisconnected(Exception):
+    pass
+
+class WSGIBridge:
+    """Serve a WSGI application from an ASGI server.
+
+    The event loop owns the sockets, so idle keep-alive connections, slow
+    uploads and slow readers cost no threads. Only the Flask handler itself
+    runs in a bounded thread pool, where it blocks on db_utils as before.
+    Responses are streamed back chunk by chunk through a bounded queue, so
+    generator responses such as the task export keep constant memory.
+
+    Requests beyond max_threads wait in the executor's queue, which costs
+    no thread and no pooled connection, so the default keeps the number of
+    handlers close to what the database pool can serve.
+
+    asgiref's WsgiToAsgi is not used because it runs every request on a
+    single thread-sensitive executor, which serializes the handlers.
+    """
+
+    def __init__(self, wsgi_app, max_threads=ASGI_THREADS, send_buffer=ASGI_SEND_BUFFER):
+        self.wsgi_app = wsgi_app
+        self.send_buffer = send_buffer
+        if max_threads <= 0:
+            max_threads = 2 * get_pool().max_size
+        self.max_threads = max_threads
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='asgi-handler')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise _ClientDisconnected()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    def _environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            'CONTENT_LENGTH': str(len(body)),
+        }
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    async def _http(self, scope, receive, send):
+        try:
+            body = await self._read_body(receive)
+        except _ClientDisconnected:
+            return
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.send_buffer)
+        disconnected = threading.Event()
+        environ = self._environ(scope, body)
+
+        def put(message):
+            # Blocks the handler thread while the client is slower than the handler
+            if disconnected.is_set():
+                raise _ClientDisconnected()
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        def run():
+            status_headers = {}
+
+            def start_response(status, headers, exc_info=None):
+                status_headers['status'] = int(status.split(' ', 1)[0])
+                status_headers['headers'] = [
+                    (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+                ]
+
+            try:
+                iterable = self.wsgi_app(environ, start_response)
+                try:
+                    started = False
+                    for chunk in iterable:
+                        if not chunk:
+                            continue
+                        if not started:
+                            put(('start', status_headers))
+                            started = True
+                        put(('body', chunk))
+                    if not started:
+                        put(('start', status_headers))
+                finally:
+                    if hasattr(iterable, 'close'):
+                        iterable.close()
+            except _ClientDisconnected:
+                return
+            except BaseException as e:
+                error = e
+            else:
+                error = None
+            try:
+                put(('end', error))
+            except _ClientDisconnected:
+                pass
+
+        def drain():
+            # Let a blocked handler thread finish its put() and notice the disconnect
+            while not queue.empty():
+                queue.get_nowait()
+
+        async def watch_disconnect():
+            # Servers such as uvicorn's h11 protocol drop sends to a closed
+            # connection instead of raising, so listen for the disconnect
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+            drain()
+            queue.put_nowait(('disconnect', None))
+
+        watcher = loop.create_task(watch_disconnect())
+        loop.run_in_executor(self.executor, run)
+
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == 'disconnect':
+                    drain()
+                    return
+                if kind == 'start':
+                    await send({
+                        'type': 'http.response.start',
+                        'status': payload['status'],
+                        'headers': payload['headers'],
+                    })
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+                else:
+                    if payload is not None:
+                        raise payload
+                    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                    return
+        except (OSError, asyncio.CancelledError):
+            disconnected.set()
+            drain()
+            raise
+        finally:
+            watcher.cancel()
+
+def create_asgi_app():
+    """Build the Flask app and wrap it for ASGI servers"""
+    return WSGIBridge(create_app())
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(
+        create_asgi_app(),
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', '5000')),
+        backlog=int(os.getenv('ASGI_BACKLOG', '2048')),
+        timeout_keep_alive=int(os.getenv('ASGI_KEEP_ALIVE', '5')),
+        lifespan='on',
+    )
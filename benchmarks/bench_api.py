@@ -0,0 +1,318 @@
+"""Throughput, latency and allocations of the API hot paths, with a regression gate.
+
+Boots create_app against a temporary embedded SQLite database seeded by
+db/seed_db.py with --users users owning --tasks-per-user tasks each, then
+drives every scenario (TaskList.get, TaskList.post, Task.put, Task.delete,
+login, register) at a fixed concurrency through the WSGI test client. list
+walks the first five pages of each user and is mostly answered by the task
+list cache; list_uncached runs with that cache disabled and pages through
+each user's tasks by cursor under a rotating set of status, date, search and
+sort filters, so every request reaches the database. Each scenario is timed over
+--rounds runs and the fastest is reported. Allocations are measured in
+a separate sequential pass with tracemalloc, so tracing does not distort the
+timed run.
+
+Results are printed as JSON. With --baseline the run is compared against a
+stored result and the script exits non-zero when a scenario's throughput
+drops, or its p95 latency or allocations grow, by more than --threshold.
+Baselines are machine specific; record one with --save-baseline on the
+machine that runs the comparison.
+
+Usage:
+    python benchmarks/bench_api.py --users 20 --tasks-per-user 200 --requests 500 --concurrency 8
+    python benchmarks/bench_api.py --save-baseline benchmarks/baseline_api.json
+    python benchmarks/bench_api.py --baseline benchmarks/baseline_api.json --threshold 0.25
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# Keep per-request log lines out of the JSON report, and measure the
+# handlers rather than the rate limits protecting them
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('RATE_LIMIT_TASK_LIST', '')
+os.environ.setdefault('RATE_LIMIT_LOGIN', '')
+os.environ.setdefault('RATE_LIMIT_LOGIN_ADDRESS', '')
+os.environ.setdefault('RATE_LIMIT_REGISTER', '')
+
+from app import create_app
+from db.init_db import init_db
+from db.seed_db import DEFAULT_STATUSES, generate_tasks, load_tasks, parse_distribution, seed_users
+from services.utils import auth_utils
+from services.utils.auth_utils import PasswordHasher, generate_token, set_password_hasher
+from services.utils.cache import LocalLRUCache, set_task_cache_backend, task_list_cache
+from services.utils.db_utils import configure_database, db_connection, execute_query
+
+SCENARIOS = ('list', 'list_uncached', 'create', 'update', 'delete', 'login', 'register')
+STATUSES = ('pending', 'in_progress', 'completed')
+PASSWORD = 'bench-password'
+
+# Scenarios run with the task list cache disabled
+UNCACHED_SCENARIOS = ('list_uncached',)
+
+# Query strings cycled through by list_uncached
+LIST_QUERIES = (
+    'per_page=20',
+    'per_page=20&status=pending',
+    'per_page=20&status=completed&sort=updated_at',
+    'per_page=20&sort=title&order=asc',
+    'per_page=20&q=review',
+    'per_page=20&created_after=2024-01-01T00:00:00Z&sort=updated_at&order=asc',
+)
+
+def seed(users, tasks_per_user, password_hash):
+    """Generate users and tasks with db/seed_db.py; return {user_id: [task ids]}"""
+    statuses, cum_weights = parse_distribution(DEFAULT_STATUSES)
+    with db_connection() as conn:
+        user_ids = seed_users(conn, users, 'bench-user-', password_hash, batch_size=10000)
+        rows = generate_tasks(user_ids, tasks_per_user, statuses, cum_weights, 365 * 86400,
+                              datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc), random.Random(1))
+        load_tasks(conn, rows, batch_size=10000)
+
+        tasks = {user_id: [] for user_id in user_ids}
+        for task_id, user_id in execute_query(conn, "SELECT id, user_id FROM tasks ORDER BY id").fetchall():
+            tasks[user_id].append(task_id)
+    return tasks
+
+class Workload:
+    """Builds the request for the i-th call of each scenario.
+
+    Indexes are unique across the timed and allocation passes, so create
+    always makes new tasks, delete removes tasks created earlier in the run
+    and register always uses a new username.
+    """
+
+    def __init__(self, tasks):
+        self.user_ids = list(tasks)
+        self.tasks = tasks
+        self.headers = {user_id: {'Authorization': f'Bearer {generate_token(user_id)}'} for user_id in self.user_ids}
+        self.created = []  # (user_id, task id) from the create scenario
+        self.cursors = {}  # (user_id, query) -> next_cursor for list_uncached
+        self._lock = threading.Lock()
+
+    def _user(self, i):
+        return self.user_ids[i % len(self.user_ids)]
+
+    def list(self, client, i):
+        user_id = self._user(i)
+        page = (i // len(self.user_ids)) % 5 + 1
+        return client.get(f'/api/tasks?per_page=20&page={page}', headers=self.headers[user_id]), 200
+
+    def list_uncached(self, client, i):
+        user_id = self._user(i)
+        query = LIST_QUERIES[(i // len(self.user_ids)) % len(LIST_QUERIES)]
+        with self._lock:
+            token = self.cursors.get((user_id, query), '')
+        response = client.get(f'/api/tasks?{query}&cursor={token}', headers=self.headers[user_id])
+        if response.status_code == 200:
+            # Start over from the first page once the last one is reached
+            next_cursor = json.loads(response.data)['data']['pagination']['next_cursor']
+            with self._lock:
+                self.cursors[(user_id, query)] = next_cursor or ''
+        return response, 200
+
+    def create(self, client, i):
+        user_id = self._user(i)
+        response = client.post('/api/tasks', headers=self.headers[user_id], content_type='application/json',
+                               data=json.dumps({'title': f'New task {i}', 'description': 'Created by the benchmark'}))
+        if response.status_code == 201:
+            with self._lock:
+                self.created.append((user_id, json.loads(response.data)['data']['id']))
+        return response, 201
+
+    def update(self, client, i):
+        user_id = self._user(i)
+        task_ids = self.tasks[user_id]
+        task_id = task_ids[(i // len(self.user_ids)) % len(task_ids)]
+        return client.put(f'/api/tasks/{task_id}', headers=self.headers[user_id], content_type='application/json',
+                          data=json.dumps({'status': STATUSES[i % len(STATUSES)]})), 200
+
+    def delete(self, client, i):
+        user_id, task_id = self.created[i]
+        return client.delete(f'/api/tasks/{task_id}', headers=self.headers[user_id]), 200
+
+    def login(self, client, i):
+        body = json.dumps({'username': f'bench-user-{i % len(self.user_ids)}', 'password': PASSWORD})
+        return client.post('/api/users/login', data=body, content_type='application/json'), 200
+
+    def register(self, client, i):
+        body = json.dumps({'username': f'bench-new-{i}', 'password': PASSWORD})
+        return client.post('/api/users/register', data=body, content_type='application/json'), 201
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_timed(app, call, indexes, concurrency):
+    """Run call for every index at fixed concurrency; return (requests/sec, sorted latencies, errors)"""
+    local = threading.local()
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        started = time.perf_counter()
+        response, expected = call(client, i)
+        latency = time.perf_counter() - started
+        if response.status_code != expected:
+            with lock:
+                errors[0] += 1
+        return latency
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(one, indexes))
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, latencies, errors[0]
+
+def measure_allocations(app, call, indexes):
+    """Return the mean peak KiB allocated while handling one request, over a sequential pass"""
+    client = app.test_client()
+    call(client, indexes[0])  # Keep one-off imports and cache fills out of the sample
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in indexes[1:]:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            call(client, i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / max(len(peaks), 1) / 1024
+
+def run_scenario(app, workload, name, requests, concurrency, alloc_samples, rounds):
+    """Time the scenario over several rounds, keeping the fastest, then trace allocations"""
+    call = getattr(workload, name)
+    best = None
+    for round_number in range(rounds):
+        indexes = range(round_number * requests, (round_number + 1) * requests)
+        throughput, latencies, errors = run_timed(app, call, indexes, concurrency)
+        if best is None or throughput > best[0]:
+            best = (throughput, latencies, errors)
+    throughput, latencies, errors = best
+    first = rounds * requests
+    alloc_kib = measure_allocations(app, call, list(range(first, first + alloc_samples + 1)))
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_sec': round(throughput, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'alloc_peak_kib_per_request': round(alloc_kib, 2)
+    }
+
+def compare(results, baseline, threshold):
+    """Return a message for each scenario metric that regressed beyond threshold"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if result['errors'] > previous.get('errors', 0):
+            regressions.append(f"{name}: {result['errors']} errors (baseline {previous.get('errors', 0)})")
+        # (metric, True when larger is worse)
+        for metric, higher_is_worse in (('requests_per_sec', False), ('p95_ms', True),
+                                        ('alloc_peak_kib_per_request', True)):
+            old, new = previous.get(metric), result[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if (change if higher_is_worse else -change) > threshold:
+                regressions.append(f"{name}: {metric} {new} vs baseline {old} ({change:+.1%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks-per-user', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=500, help='timed requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=3, help='timed runs per scenario; the fastest is reported')
+    parser.add_argument('--alloc-samples', type=int, default=50, help='requests per scenario traced for allocations')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000',
+                        help="password hash for login/register; '' uses the configured method")
+    parser.add_argument('--baseline', help='fail when results regress against this stored result')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression')
+    parser.add_argument('--save-baseline', help='write the results to this file')
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if 'delete' in scenarios and 'create' not in scenarios:
+        parser.error("The delete scenario removes the tasks made by create; run both")
+    # delete consumes what create made, so it must run after it
+    scenarios.sort(key=SCENARIOS.index)
+
+    config = {
+        'users': args.users,
+        'tasks_per_user': args.tasks_per_user,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'rounds': args.rounds,
+        'hash_method': args.hash_method
+    }
+    auth_utils.SECRET_KEY = auth_utils.SECRET_KEY or 'benchmark-secret-key-benchmark-secret-key'
+    set_password_hasher(PasswordHasher(method=args.hash_method or None, workers=0))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configure_database(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        # init_db reports the tables it created on stdout, which carries the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            init_db()
+        app = create_app()
+        started = time.perf_counter()
+        tasks = seed(args.users, args.tasks_per_user, auth_utils.hash_password(PASSWORD))
+        config['seed_seconds'] = round(time.perf_counter() - started, 3)
+        workload = Workload(tasks)
+        cache_backend = task_list_cache.backend
+        for name in scenarios:
+            if name in UNCACHED_SCENARIOS:
+                set_task_cache_backend(LocalLRUCache(max_size=0))
+            try:
+                results[name] = run_scenario(app, workload, name, args.requests, args.concurrency,
+                                             args.alloc_samples, args.rounds)
+            finally:
+                set_task_cache_backend(cache_backend)
+
+    output = {'config': config, 'results': results}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatched = [key for key in ('users', 'tasks_per_user', 'requests', 'concurrency', 'rounds', 'hash_method')
+                      if baseline['config'].get(key) != config[key]]
+        if mismatched:
+            parser.error(f"Baseline was recorded with different settings: {', '.join(mismatched)}")
+        output['regressions'] = compare(results, baseline['results'], args.threshold)
+
+    print(json.dumps(output, indent=2))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2)
+            f.write('\n')
+    if output.get('regressions'):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Requests/sec and latency of TaskList.get under the WSGI and ASGI serving paths.
+
+Each mode runs in its own server process against a temporary embedded
+SQLite database. --db-latency-ms adds a sleep to every statement to mimic
+the round trip to SQLite Cloud, which is where the two paths differ.
+
+Usage:
+    python benchmarks/bench_asgi.py --concurrency 200 --duration 10 --db-latency-ms 20
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# Keep per-request log lines out of the report and let the single
+# benchmark user past the task list rate limit
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('RATE_LIMIT_TASK_LIST', '')
+
+class SlowConnection:
+    """Connection proxy that sleeps before each statement, like a network round trip"""
+
+    def __init__(self, conn, latency):
+        self._conn = conn
+        self._latency = latency
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self._latency)
+        return self._conn.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        time.sleep(self._latency)
+        return self._conn.executemany(*args, **kwargs)
+
+def serve(mode, db_path, port, latency, pool_size):
+    """Run one server process (invoked through --serve)"""
+    from app import create_app
+    from services.utils import auth_utils
+    from services.utils.db_utils import ConnectionPool, configure_database, set_pool
+
+    auth_utils.SECRET_KEY = 'benchmark-secret-key-benchmark-secret-key'
+    backend = configure_database(f"sqlite:///{db_path}")
+    if latency:
+        set_pool(ConnectionPool(lambda: SlowConnection(backend.connect(), latency), max_size=pool_size))
+    else:
+        set_pool(ConnectionPool(backend.connect, max_size=pool_size))
+
+    if mode == 'wsgi':
+        from werkzeug.serving import run_simple
+        run_simple('127.0.0.1', port, create_app(), threaded=True)
+    else:
+        import uvicorn
+        from asgi import WSGIBridge
+        uvicorn.run(WSGIBridge(create_app()), host='127.0.0.1', port=port,
+                    log_level='warning', backlog=4096)
+
+def prepare_database(db_path):
+    """Create the schema, a user and some tasks; return a token for that user"""
+    from app import create_app
+    from db.init_db import init_db
+    from services.utils import auth_utils
+    from services.utils.db_utils import configure_database
+
+    auth_utils.SECRET_KEY = 'benchmark-secret-key-benchmark-secret-key'
+    configure_database(f"sqlite:///{db_path}")
+    init_db()
+    client = create_app().test_client()
+    credentials = json.dumps({'username': 'bench', 'password': 'bench-password'})
+    client.post('/api/users/register', data=credentials, content_type='application/json')
+    token = json.loads(client.post('/api/users/login', data=credentials, content_type='application/json').data)['data']['token']
+    tasks = [{'title': f'Task {i}', 'description': 'Benchmark task ' * 4} for i in range(50)]
+    client.post('/api/tasks/batch', data=json.dumps({'create': tasks}), content_type='application/json',
+                headers={'Authorization': f'Bearer {token}'})
+    return token
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def drive(port, token, concurrency, duration):
+    """Issue GET /api/tasks from keep-alive clients; return (count, errors, latencies)"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local = []
+        request_number = 0
+        while time.perf_counter() < stop_at:
+            request_number += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', f'/api/tasks?per_page=10&page={1 + (index + request_number) % 5}', headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise RuntimeError(response.status)
+                local.append(time.perf_counter() - started)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], sorted(latencies)
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--db-latency-ms', type=float, default=20)
+    parser.add_argument('--pool-size', type=int, default=64)
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=5099, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.db, args.port, args.db_latency_ms / 1000, args.pool_size)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        token = prepare_database(db_path)
+        for offset, mode in enumerate(args.modes.split(',')):
+            port = args.port + offset
+            # Disable the list cache so every request reaches the database
+            server = subprocess.Popen([
+                sys.executable, os.path.abspath(__file__), '--serve', mode, '--db', db_path,
+                '--port', str(port), '--db-latency-ms', str(args.db_latency_ms),
+                '--pool-size', str(args.pool_size)
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                env={**os.environ, 'TASK_CACHE_SIZE': '0'})
+            try:
+                wait_for_port(port)
+                count, errors, latencies = drive(port, token, args.concurrency, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+            results[mode] = {
+                'requests': count,
+                'errors': errors,
+                'requests_per_sec': round(count / args.duration, 2),
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)
+            }
+
+    print(json.dumps({'concurrency': args.concurrency, 'db_latency_ms': args.db_latency_ms, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""CPU cost vs. bytes saved when compressing TaskList.get payloads.
+
+Encodes realistic task pages with the response JSON encoder, then times
+every available encoder (gzip always; br and zstd when brotli/zstandard
+are installed) at several levels, reporting compression ratio, bytes
+saved and microseconds of CPU per payload.
+
+Usage:
+    python benchmarks/bench_compression.py --per-page 20,100 --iterations 200
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from db.seed_db import SAMPLE_TASKS
+from services.utils.compression import compress, load_encoders
+from services.utils.json_encoder import RowSet, dumps
+from services.utils.records import TASK_COLUMNS
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 6, 11), 'zstd': (1, 3, 9, 19)}
+
+def page_body(per_page):
+    """A TaskList.get response body with per_page tasks drawn from the seed samples"""
+    rows = []
+    for i in range(per_page):
+        title, description = SAMPLE_TASKS[i % len(SAMPLE_TASKS)]
+        rows.append((1000 + i, f'{title} #{i + 1}', description, ('pending', 'in_progress', 'completed')[i % 3],
+                     f'2024-05-{1 + i % 28:02d} 12:{i % 60:02d}:00', f'2024-06-{1 + i % 28:02d} 08:{i % 60:02d}:00',
+                     1 + i % 4))
+    return dumps({
+        'status': 'success',
+        'data': {
+            'tasks': RowSet(TASK_COLUMNS, rows),
+            'pagination': {'page': 1, 'per_page': per_page, 'total': 5000, 'pages': 5000 // per_page,
+                           'has_next': True, 'has_prev': False}
+        }
+    }) + b'\n'
+
+def encoders_at_levels():
+    """Yield one encoder per available algorithm and benchmark level"""
+    for encoder in load_encoders('gzip,br,zstd'):
+        for level in LEVELS[encoder.name]:
+            leveled = copy.copy(encoder)
+            leveled.level = level
+            yield leveled
+
+def time_per_call(func, iterations):
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--per-page', default='20,100')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    for per_page in (int(value) for value in args.per_page.split(',')):
+        body = page_body(per_page)
+        page_results = {}
+        for encoder in encoders_at_levels():
+            compressed = compress(encoder, body)
+            seconds = time_per_call(lambda: compress(encoder, body), args.iterations)
+            page_results[f'{encoder.name}-{encoder.level}'] = {
+                'bytes': len(compressed),
+                'ratio': round(len(body) / len(compressed), 2),
+                'saved_bytes': len(body) - len(compressed),
+                'cpu_us': round(seconds * 1e6, 1),
+                # Bytes saved per microsecond of CPU: higher is a better trade
+                'saved_per_us': round((len(body) - len(compressed)) / (seconds * 1e6), 1)
+            }
+        results[per_page] = {'raw_bytes': len(body), 'encoders': page_results}
+
+    print(json.dumps({'iterations': args.iterations, 'per_page': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
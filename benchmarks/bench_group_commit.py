@@ -0,0 +1,159 @@
+"""Task write throughput with per-request commits vs. the group-commit queue.
+
+Drives concurrent TaskList.post, Task.put and Task.delete requests through
+the WSGI test client against a temporary embedded SQLite database, once
+committing every write on its own and once through GroupCommitQueue.
+--synchronous FULL (the default here) makes every commit wait for fsync,
+which is the cost group commit amortizes. --db-latency-ms adds a sleep to
+every statement to mimic a network round trip.
+
+Usage:
+    python benchmarks/bench_group_commit.py --requests 1000 --concurrency 32 --window-ms 2 --max-batch 64
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# Keep per-request log lines out of the JSON report
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('RATE_LIMIT_TASK_LIST', '')
+os.environ.setdefault('RATE_LIMIT_LOGIN', '')
+os.environ.setdefault('RATE_LIMIT_LOGIN_ADDRESS', '')
+
+from bench_asgi import SlowConnection, percentile
+from app import create_app
+from db.init_db import init_db
+from services import tasks
+from services.utils import auth_utils
+from services.utils.auth_utils import generate_token
+from services.utils.db_utils import ConnectionPool, configure_database, set_pool
+from services.utils.group_commit import GroupCommitQueue, group_commit_batch_size, group_commit_statements
+
+def run_phase(app, headers, call, indexes, concurrency):
+    """Run call(client, i) at fixed concurrency; return (requests/sec, sorted latencies, errors)"""
+    local = threading.local()
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+            client.environ_base['HTTP_AUTHORIZATION'] = headers['Authorization']
+        started = time.perf_counter()
+        ok = call(client, i)
+        latency = time.perf_counter() - started
+        if not ok:
+            with lock:
+                errors[0] += 1
+        return latency
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(one, indexes))
+    return len(latencies) / (time.perf_counter() - started), latencies, errors[0]
+
+def run_mode(app, headers, requests, concurrency):
+    """Create, update and delete requests tasks; return per-phase results"""
+    task_ids = [None] * requests
+
+    def create(client, i):
+        response = client.post('/api/tasks', content_type='application/json',
+                               data=json.dumps({'title': f'Task {i}', 'description': 'Group commit benchmark'}))
+        if response.status_code != 201:
+            return False
+        task_ids[i] = json.loads(response.data)['data']['id']
+        return True
+
+    def update(client, i):
+        response = client.patch(f'/api/tasks/{task_ids[i]}', content_type='application/json',
+                                data=json.dumps({'status': 'completed'}))
+        return response.status_code == 200
+
+    def delete(client, i):
+        return client.delete(f'/api/tasks/{task_ids[i]}').status_code == 200
+
+    results = {}
+    for name, call in (('create', create), ('update', update), ('delete', delete)):
+        batches_before = group_commit_batch_size.count()
+        statements_before = group_commit_statements.sum()
+        throughput, latencies, errors = run_phase(app, headers, call, range(requests), concurrency)
+        batches = group_commit_batch_size.count() - batches_before
+        statements = group_commit_statements.sum() - statements_before
+        results[name] = {
+            'errors': errors,
+            'writes_per_sec': round(throughput, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'commits': batches or requests,
+            'statements': statements or requests,
+            'avg_batch': round(requests / batches, 2) if batches else 1
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='writes per phase')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--window-ms', type=float, default=2)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--synchronous', default='FULL', help='SQLite synchronous pragma')
+    parser.add_argument('--db-latency-ms', type=float, default=0)
+    parser.add_argument('--pool-size', type=int, default=32)
+    parser.add_argument('--modes', default='direct,group')
+    args = parser.parse_args()
+
+    auth_utils.SECRET_KEY = auth_utils.SECRET_KEY or 'benchmark-secret-key-benchmark-secret-key'
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        backend = configure_database(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}?synchronous={args.synchronous}")
+        latency = args.db_latency_ms / 1000
+        if latency:
+            set_pool(ConnectionPool(lambda: SlowConnection(backend.connect(), latency), max_size=args.pool_size))
+        else:
+            set_pool(ConnectionPool(backend.connect, max_size=args.pool_size))
+        # init_db reports the tables it created on stdout, which carries the JSON report
+        sys.stdout, stdout = sys.stderr, sys.stdout
+        try:
+            init_db()
+        finally:
+            sys.stdout = stdout
+        app = create_app()
+        client = app.test_client()
+        client.post('/api/users/register', content_type='application/json',
+                    data=json.dumps({'username': 'bench', 'password': 'bench-password'}))
+        headers = {'Authorization': f'Bearer {generate_token(1)}'}
+
+        for mode in args.modes.split(','):
+            queue = GroupCommitQueue(args.window_ms / 1000, args.max_batch) if mode == 'group' else None
+            tasks.set_task_write_queue(queue)
+            try:
+                results[mode] = run_mode(app, headers, args.requests, args.concurrency)
+            finally:
+                tasks.set_task_write_queue(None)
+
+    if 'direct' in results and 'group' in results:
+        results['speedup'] = {
+            phase: round(results['group'][phase]['writes_per_sec'] / results['direct'][phase]['writes_per_sec'], 2)
+            for phase in results['direct']
+        }
+    print(json.dumps({
+        'concurrency': args.concurrency,
+        'window_ms': args.window_ms,
+        'max_batch': args.max_batch,
+        'synchronous': args.synchronous,
+        'db_latency_ms': args.db_latency_ms,
+        'results': results
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Serialization cost of TaskList.get payloads per JSON encoder.
+
+Compares the previous path (per-row dicts through the stdlib encoder) with
+RowSet payloads through each available encoder backend. With orjson 3.9+
+it also times the row templates embedded as orjson.Fragment, the
+alternative to the per-row dicts ORJSONBackend builds.
+
+Usage:
+    python benchmarks/bench_json.py --per-page 100 --iterations 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.tasks import TASK_COLUMNS
+from services.utils.json_encoder import RowSet, StdlibBackend, encode_rows_stdlib, load_backend
+
+def make_rows(count):
+    return [
+        (i, f'Task {i}', 'Benchmark task with a realistic description ' * 3, 'pending',
+         '2024-05-01 12:00:00', '2024-05-02 08:30:00')
+        for i in range(count)
+    ]
+
+def page_payload(tasks, per_page):
+    return {
+        'status': 'success',
+        'data': {
+            'tasks': tasks,
+            'pagination': {'per_page': per_page, 'has_next': True, 'next_cursor': 'eyJ2IjpbXX0'}
+        }
+    }
+
+def dict_path(rows, per_page):
+    # What TaskList.get did before RowSet: one dict per row, stdlib encoder
+    tasks = [{
+        'id': task[0],
+        'title': task[1],
+        'description': task[2],
+        'status': task[3],
+        'created_at': task[4],
+        'updated_at': task[5]
+    } for task in rows]
+    return json.dumps(page_payload(tasks, per_page)).encode('utf-8')
+
+def time_per_call(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.per_page)
+    candidates = {'dicts+json': lambda: dict_path(rows, args.per_page)}
+    backends = [StdlibBackend()]
+    for name in ('ujson', 'orjson'):
+        try:
+            backends.append(load_backend(name))
+        except ImportError:
+            pass
+    for backend in backends:
+        candidates[f'rowset+{backend.name}'] = (
+            lambda backend=backend: backend.dumps(page_payload(RowSet(TASK_COLUMNS, rows), args.per_page))
+        )
+        fragment = getattr(getattr(backend, '_orjson', None), 'Fragment', None)
+        if fragment is not None:
+            candidates['rowset+orjson-fragment'] = lambda backend=backend, fragment=fragment: backend._orjson.dumps(
+                page_payload(fragment(encode_rows_stdlib(RowSet(TASK_COLUMNS, rows))), args.per_page)
+            )
+
+    expected = json.loads(dict_path(rows, args.per_page))
+    results = {}
+    for name, func in candidates.items():
+        assert json.loads(func()) == expected, name
+        seconds = time_per_call(func, args.iterations)
+        results[name] = {'us_per_payload': round(seconds * 1e6, 2), 'bytes': len(func())}
+    baseline = results['dicts+json']['us_per_payload']
+    for result in results.values():
+        result['speedup'] = round(baseline / result['us_per_payload'], 2)
+
+    print(json.dumps({'per_page': args.per_page, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
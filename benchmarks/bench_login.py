@@ -0,0 +1,75 @@
+"""Login throughput with password hashing inline vs. in a worker process pool.
+
+Usage:
+    python benchmarks/bench_login.py --requests 200 --concurrency 8 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app
+from db.init_db import init_db
+from services.utils import auth_utils
+from services.utils.auth_utils import PasswordHasher, set_password_hasher
+from services.utils.db_utils import configure_database
+
+def run_logins(client_factory, credentials, requests, concurrency):
+    """Fire logins at fixed concurrency and return (requests/sec, latencies)"""
+    body = json.dumps(credentials)
+
+    def login(_):
+        client = client_factory()
+        started = time.perf_counter()
+        response = client.post('/api/users/login', data=body, content_type='application/json')
+        assert response.status_code == 200, response.data
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(login, range(requests)))
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--method', default=None, help='werkzeug hash method, e.g. pbkdf2:sha256:600000')
+    args = parser.parse_args()
+
+    auth_utils.SECRET_KEY = auth_utils.SECRET_KEY or 'benchmark-secret-key-benchmark-secret-key'
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configure_database(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        init_db()
+        app = create_app()
+        credentials = {'username': 'bench', 'password': 'bench-password'}
+
+        results = {}
+        for label, workers in (('inline', 0), ('pool', args.workers)):
+            set_password_hasher(PasswordHasher(method=args.method, workers=workers))
+            client = app.test_client()
+            client.post('/api/users/register', data=json.dumps(credentials), content_type='application/json')
+            # Warm up the worker processes before timing
+            run_logins(app.test_client, credentials, max(workers, 1), max(workers, 1))
+            throughput, latencies = run_logins(app.test_client, credentials, args.requests, args.concurrency)
+            results[label] = {
+                'workers': workers,
+                'requests_per_sec': round(throughput, 2),
+                'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+                'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2)
+            }
+        set_password_hasher(PasswordHasher(workers=0))
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Overhead of the metrics instrumentation on the TaskList.get hot path.
+
+Boots create_app against a temporary embedded SQLite database with one user
+owning --tasks tasks and times GET /api/tasks sequentially. The request
+hooks of services/utils/metrics.py and the query and token verification
+timers are wrapped with a clock, and the time spent in them is reported
+against the rest of the request; the budget is an overhead below 1%. The
+clock costs about as much as a cheap timer, so a no-op request hook is
+wrapped the same way and its time per call is subtracted from every
+wrapped call. This is measured directly because an on/off comparison
+of whole requests cannot resolve 1% through run-to-run noise here. The
+fastest of --rounds rounds is reported.
+
+--uncached disables the task list cache so every request runs its queries,
+which adds the per-statement timing to the comparison. With METRICS_DIR set
+the periodic save runs on its own thread and is not part of the request.
+
+Usage:
+    python benchmarks/bench_metrics.py --requests 1000 --rounds 5
+    python benchmarks/bench_metrics.py --requests 1000 --rounds 5 --uncached
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# Keep per-request log lines out of the JSON report and let the single
+# benchmark user past the task list rate limit
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('RATE_LIMIT_TASK_LIST', '')
+
+from app import create_app
+from db.init_db import init_db
+from services.utils import auth_utils, db_utils, metrics
+from services.utils.auth_utils import generate_token
+from services.utils.cache import LocalLRUCache, set_task_cache_backend
+from services.utils.db_utils import configure_database, db_connection, execute_many
+
+class Meter:
+    """Accumulates the time spent inside wrapped callables"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+
+    def wrap(self, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - started
+                self.calls += 1
+        timed.__module__ = func.__module__
+        return timed
+
+class TimedSeries:
+    def __init__(self, series, meter):
+        self.observe = meter.wrap(series.observe)
+
+def instrument(app, meter):
+    """Route the request hooks and timers of services/utils/metrics.py through meter"""
+    for funcs in (app.before_request_funcs, app.after_request_funcs):
+        for key, hooks in funcs.items():
+            funcs[key] = [meter.wrap(hook) if hook.__module__ == metrics.__name__ else hook for hook in hooks]
+    db_utils.observe_query = meter.wrap(db_utils.observe_query)
+    auth_utils._decode_duration = TimedSeries(auth_utils._decode_duration, meter)
+
+def calibrate(app, meter):
+    """Add a no-op request hook timed by meter, to measure the meter's own cost"""
+    def noop(response):
+        return response
+    app.after_request_funcs.setdefault(None, []).append(meter.wrap(noop))
+
+def time_requests(client, url, requests):
+    """Return seconds per request for requests sequential GETs of url"""
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        return (time.perf_counter() - started) / requests
+    finally:
+        gc.enable()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--uncached', action='store_true', help='disable the task list cache')
+    args = parser.parse_args()
+
+    auth_utils.SECRET_KEY = auth_utils.SECRET_KEY or 'benchmark-secret-key-benchmark-secret-key'
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configure_database(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        # init_db reports the tables it created on stdout, which carries the JSON report
+        sys.stdout, stdout = sys.stderr, sys.stdout
+        try:
+            init_db()
+        finally:
+            sys.stdout = stdout
+        if args.uncached:
+            set_task_cache_backend(LocalLRUCache(max_size=0))
+
+        app = create_app()
+        client = app.test_client()
+        client.post('/api/users/register', content_type='application/json',
+                    data=json.dumps({'username': 'bench', 'password': 'bench-password'}))
+        with db_connection() as conn:
+            execute_many(conn,
+                "INSERT INTO tasks (title, description, user_id) VALUES (?, ?, 1)",
+                [(f'Task {i}', 'Metrics overhead benchmark') for i in range(args.tasks)]
+            )
+        client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {generate_token(1)}'
+        url = f'/api/tasks?per_page={args.per_page}'
+
+        meter = Meter()
+        baseline = Meter()
+        instrument(app, meter)
+        calibrate(app, baseline)
+        time_requests(client, url, min(args.requests, 200))  # warm up caches and code paths
+        best = None
+        for _ in range(args.rounds):
+            for m in (meter, baseline):
+                m.seconds = 0.0
+                m.calls = 0
+            seconds = time_requests(client, url, args.requests)
+            if best is None or seconds < best[0]:
+                per_call = baseline.seconds / baseline.calls
+                best = (seconds, meter.seconds / args.requests, meter.calls / args.requests, per_call)
+
+    seconds, measured, calls, per_call = best
+    instrumented = measured - calls * per_call
+    overhead = instrumented / (seconds - measured - per_call)
+    print(json.dumps({
+        'requests': args.requests,
+        'rounds': args.rounds,
+        'cached': not args.uncached,
+        'us_per_request': round(seconds * 1e6, 2),
+        'metrics_us_per_request': round(instrumented * 1e6, 2),
+        'metrics_calls_per_request': round(calls, 2),
+        'meter_us_per_call': round(per_call * 1e6, 2),
+        'overhead_pct': round(overhead * 100, 3),
+        'within_budget': overhead < 0.01
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
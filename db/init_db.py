@@ -1,5 +1,5 @@
 import os
-from services.utils.db_utils import get_db_connection
+from services.utils.db_utils import get_db_connection, execute_script
 
 def init_db():
     # Open the connection to SQLite Cloud
@@ -12,7 +12,7 @@ def init_db():
             schema_sql = f.read()
 
         # Execute the schema SQL
-        conn.execute(schema_sql)
+        execute_script(conn, schema_sql)
 
         # Verify tables were created
         cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 from datetime import datetime
@@ -6,133 +7,337 @@ from datetime import datetime
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
-from services.utils.db_utils import get_db_connection, execute_query, execute_update, close_cursor, close_connection
+from services.utils.db_utils import get_db_connection, execute_query, transaction, close_cursor, close_connection
 from services.utils.auth_utils import hash_password
+from db.rebuild_task_stats import rebuild_task_counts
 
-def migrate_tasks():
-    conn = None
-    cursor = None
-    try:
-        # Get database connection
-        conn = get_db_connection()
-        
-        # Create users table if it doesn't exist
-        cursor = execute_update(conn,
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        )
-        print("Created users table if it didn't exist")
-        
-        # Create tasks table if it doesn't exist
-        cursor = execute_update(conn,
-            """
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-            """
+# Ordered list of (version, description, function); see the migration decorator
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register a schema migration.
+
+    Migrations run in version order, each inside its own transaction, and
+    must be idempotent so they can be applied to databases that were
+    created from schema.sql or patched by hand.
+    """
+    def decorator(func):
+        if any(existing[0] == version for existing in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version: {version}")
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+@migration(1, 'Create users and tasks tables')
+def create_base_tables(conn):
+    execute_query(conn,
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-        print("Created tasks table if it didn't exist")
-        
-        # Check if tasks table has all required columns
-        cursor = execute_query(conn,
-            "PRAGMA table_info(tasks)"
+        """
+    )
+    execute_query(conn,
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
         )
-        columns = {row[1]: row[2] for row in cursor.fetchall()}
-        
-        # Add missing columns if they don't exist
-        if 'created_at' not in columns:
-            cursor = execute_update(conn,
-                "ALTER TABLE tasks ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
-            )
-            print("Added created_at column")
-            
-        if 'updated_at' not in columns:
-            cursor = execute_update(conn,
-                "ALTER TABLE tasks ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
-            )
-            print("Added updated_at column")
-            
-        if 'user_id' not in columns:
-            cursor = execute_update(conn,
-                "ALTER TABLE tasks ADD COLUMN user_id INTEGER"
-            )
-            print("Added user_id column")
-            
-        if 'status' not in columns:
-            cursor = execute_update(conn,
-                "ALTER TABLE tasks ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'"
-            )
-            print("Added status column")
-        
-        # Create a default admin user if it doesn't exist
+        """
+    )
+
+@migration(2, 'Add missing task columns')
+def add_task_columns(conn):
+    cursor = execute_query(conn, "PRAGMA table_info(tasks)")
+    columns = {row[1]: row[2] for row in cursor.fetchall()}
+
+    # SQLite only allows constant defaults in ALTER TABLE ADD COLUMN
+    missing = [
+        ('created_at', "TIMESTAMP"),
+        ('updated_at', "TIMESTAMP"),
+        ('user_id', "INTEGER"),
+        ('status', "TEXT NOT NULL DEFAULT 'pending'"),
+    ]
+    for name, definition in missing:
+        if name not in columns:
+            execute_query(conn, f"ALTER TABLE tasks ADD COLUMN {name} {definition}")
+
+@migration(3, 'Assign orphaned tasks to the admin user')
+def assign_orphaned_tasks(conn):
+    cursor = execute_query(conn,
+        "SELECT COUNT(*) FROM tasks WHERE user_id IS NULL OR created_at IS NULL OR updated_at IS NULL"
+    )
+    if cursor.fetchone()[0] == 0:
+        return
+
+    # Create a default admin user if it doesn't exist
+    cursor = execute_query(conn, "SELECT id FROM users WHERE username = 'admin'")
+    admin_user = cursor.fetchone()
+    if admin_user:
+        admin_id = admin_user[0]
+    else:
         cursor = execute_query(conn,
-            "SELECT id FROM users WHERE username = 'admin'"
-        )
-        admin_user = cursor.fetchone()
-        
-        if not admin_user:
-            # Create default admin user
-            hashed_password = hash_password('admin123')
-            cursor = execute_update(conn,
-                """
-                INSERT INTO users (username, password_hash)
-                VALUES (?, ?)
-                RETURNING id
-                """,
-                ('admin', hashed_password)
-            )
-            admin_id = cursor.fetchone()[0]
-            print("Created default admin user")
-        else:
-            admin_id = admin_user[0]
-            print("Using existing admin user")
-        
-        # Get current timestamp
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Update existing tasks to be associated with the admin user and set timestamps
-        cursor = execute_update(conn,
             """
-            UPDATE tasks 
-            SET user_id = ?, 
-                updated_at = ?,
-                created_at = COALESCE(created_at, ?),
-                status = COALESCE(status, 'pending')
-            WHERE user_id IS NULL
+            INSERT INTO users (username, password_hash)
+            VALUES (?, ?)
+            RETURNING id
             """,
-            (admin_id, current_time, current_time)
+            ('admin', hash_password('admin123'))
         )
-        
-        # Verify the migration
-        cursor = execute_query(conn,
-            "SELECT COUNT(*) FROM tasks WHERE user_id IS NULL"
+        admin_id = cursor.fetchone()[0]
+
+    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    execute_query(conn,
+        """
+        UPDATE tasks
+        SET user_id = COALESCE(user_id, ?),
+            updated_at = COALESCE(updated_at, ?),
+            created_at = COALESCE(created_at, ?),
+            status = COALESCE(status, 'pending')
+        WHERE user_id IS NULL OR created_at IS NULL OR updated_at IS NULL
+        """,
+        (admin_id, current_time, current_time)
+    )
+
+@migration(4, 'Add indexes for task listing, status filters and user lookup')
+def add_task_indexes(conn):
+    # Matches ORDER BY created_at DESC, id DESC so listing never sorts
+    execute_query(conn,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks (user_id, created_at DESC, id DESC)"
+    )
+    execute_query(conn,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks (user_id, status)"
+    )
+    execute_query(conn,
+        "CREATE INDEX IF NOT EXISTS idx_users_username ON users (username)"
+    )
+
+@migration(5, 'Add index for the latest task update per user')
+def add_updated_index(conn):
+    # Lets MAX(updated_at) for the list ETag read a single index entry
+    execute_query(conn,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_updated ON tasks (user_id, updated_at)"
+    )
+
+@migration(6, 'Add full-text search and indexes for task filters and sorting')
+def add_task_search(conn):
+    # External-content FTS5 index over tasks; the text lives only in tasks
+    execute_query(conn,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description, content='tasks', content_rowid='id'
         )
-        remaining_null_user_id = cursor.fetchone()[0]
-        
-        cursor = execute_query(conn,
-            "SELECT COUNT(*) FROM tasks WHERE created_at IS NULL OR updated_at IS NULL"
+        """
+    )
+    # Keep tasks_fts in step with tasks inside the writing transaction
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        """
+    )
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        END
+        """
+    )
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        """
+    )
+    execute_query(conn, "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+    # Status filters in the default order read the index in order; this
+    # also serves every lookup idx_tasks_user_status did
+    execute_query(conn,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_status_created ON tasks (user_id, status, created_at DESC, id DESC)"
+    )
+    execute_query(conn, "DROP INDEX IF EXISTS idx_tasks_user_status")
+    execute_query(conn,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_title ON tasks (user_id, title)"
+    )
+
+@migration(7, 'Add per-user task counters maintained by triggers')
+def add_task_counts(conn):
+    execute_query(conn,
+        """
+        CREATE TABLE IF NOT EXISTS task_counts (
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, status)
+        ) WITHOUT ROWID
+        """
+    )
+    # Triggers run inside the statement that writes the task, so the
+    # counters commit or roll back together with it
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS task_counts_insert AFTER INSERT ON tasks
+        WHEN new.user_id IS NOT NULL BEGIN
+            INSERT INTO task_counts (user_id, status, count) VALUES (new.user_id, new.status, 1)
+            ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1;
+        END
+        """
+    )
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS task_counts_delete AFTER DELETE ON tasks
+        WHEN old.user_id IS NOT NULL BEGIN
+            UPDATE task_counts SET count = count - 1 WHERE user_id = old.user_id AND status = old.status;
+        END
+        """
+    )
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS task_counts_update AFTER UPDATE OF status, user_id ON tasks
+        WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id BEGIN
+            UPDATE task_counts SET count = count - 1 WHERE user_id = old.user_id AND status = old.status;
+            INSERT INTO task_counts (user_id, status, count)
+            SELECT new.user_id, new.status, 1 WHERE new.user_id IS NOT NULL
+            ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1;
+        END
+        """
+    )
+    rebuild_task_counts(conn)
+
+@migration(8, 'Add a task version column for optimistic concurrency')
+def add_task_version(conn):
+    cursor = execute_query(conn, "PRAGMA table_info(tasks)")
+    if 'version' not in {row[1] for row in cursor.fetchall()}:
+        execute_query(conn, "ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+@migration(9, 'Add per-user task list revisions maintained by triggers')
+def add_task_revisions(conn):
+    execute_query(conn,
+        """
+        CREATE TABLE IF NOT EXISTS task_revisions (
+            user_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    # Every write to a user's tasks moves their revision in the same
+    # statement, so list validators and cache keys built from it are
+    # consistent across processes
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS task_revisions_insert AFTER INSERT ON tasks
+        WHEN new.user_id IS NOT NULL BEGIN
+            INSERT INTO task_revisions (user_id, revision) VALUES (new.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+        END
+        """
+    )
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS task_revisions_delete AFTER DELETE ON tasks
+        WHEN old.user_id IS NOT NULL BEGIN
+            INSERT INTO task_revisions (user_id, revision) VALUES (old.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+        END
+        """
+    )
+    execute_query(conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS task_revisions_update AFTER UPDATE ON tasks BEGIN
+            INSERT INTO task_revisions (user_id, revision)
+            SELECT old.user_id, 1 WHERE old.user_id IS NOT NULL
+            ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+            INSERT INTO task_revisions (user_id, revision)
+            SELECT new.user_id, 1 WHERE new.user_id IS NOT NULL AND new.user_id IS NOT old.user_id
+            ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+        END
+        """
+    )
+
+def ensure_version_table(conn):
+    """Create the schema_version bookkeeping table"""
+    execute_query(conn,
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-        remaining_null_timestamps = cursor.fetchone()[0]
-        
-        print(f"Migration completed:")
-        print(f"- Tasks associated with admin user: {admin_id}")
-        print(f"- Remaining tasks with NULL user_id: {remaining_null_user_id}")
-        print(f"- Remaining tasks with NULL timestamps: {remaining_null_timestamps}")
-        
+        """
+    )
+
+def applied_versions(conn):
+    """Return the set of migration versions already applied"""
+    cursor = execute_query(conn, "SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+def pending_migrations(conn, target=None):
+    """Return the migrations that still need to run, in order"""
+    applied = applied_versions(conn)
+    return [
+        m for m in MIGRATIONS
+        if m[0] not in applied and (target is None or m[0] <= target)
+    ]
+
+def run_migrations(conn, target=None, dry_run=False):
+    """Apply pending migrations up to target and return the ones run.
+
+    With dry_run the pending migrations are only reported.
+    """
+    ensure_version_table(conn)
+    pending = pending_migrations(conn, target)
+    if dry_run:
+        return pending
+
+    for version, description, func in pending:
+        with transaction(conn):
+            func(conn)
+            execute_query(conn,
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+        print(f"Applied migration {version}: {description}")
+    return pending
+
+def migrate_tasks(target=None, dry_run=False):
+    conn = None
+    cursor = None
+    try:
+        # Get database connection
+        conn = get_db_connection()
+
+        pending = run_migrations(conn, target=target, dry_run=dry_run)
+        if not pending:
+            print("Database schema is up to date")
+        elif dry_run:
+            print("Pending migrations:")
+            for version, description, _ in pending:
+                print(f"- {version}: {description}")
+
+        # Verify the migration
+        if not dry_run:
+            cursor = execute_query(conn,
+                "SELECT COUNT(*) FROM tasks WHERE user_id IS NULL"
+            )
+            remaining_null_user_id = cursor.fetchone()[0]
+            print(f"Migration completed:")
+            print(f"- Remaining tasks with NULL user_id: {remaining_null_user_id}")
+
     except Exception as e:
         print(f"Error during migration: {e}")
     finally:
@@ -142,4 +347,8 @@ def migrate_tasks():
             close_connection(conn)
 
 if __name__ == '__main__':
-    migrate_tasks() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations')
+    parser.add_argument('--dry-run', action='store_true', help='List pending migrations without applying them')
+    parser.add_argument('--target', type=int, help='Only apply migrations up to this version')
+    args = parser.parse_args()
+    migrate_tasks(target=args.target, dry_run=args.dry_run)
@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from services.utils.db_utils import get_db_connection, execute_query, transaction, close_cursor, close_connection
+
+def count_drift(conn, user_id=None):
+    """Return (user_id, status, stored, actual) for every counter that is wrong"""
+    user_filter = "AND user_id = ?" if user_id is not None else ""
+    params = (user_id, user_id) if user_id is not None else ()
+    cursor = execute_query(conn,
+        f"""
+        WITH actual AS (
+            SELECT user_id, status, COUNT(*) AS count
+            FROM tasks
+            WHERE user_id IS NOT NULL {user_filter}
+            GROUP BY user_id, status
+        ),
+        stored AS (
+            SELECT user_id, status, count FROM task_counts WHERE 1 = 1 {user_filter}
+        )
+        SELECT s.user_id, s.status, s.count, COALESCE(a.count, 0)
+        FROM stored s LEFT JOIN actual a ON a.user_id = s.user_id AND a.status = s.status
+        WHERE s.count != COALESCE(a.count, 0)
+        UNION ALL
+        SELECT a.user_id, a.status, 0, a.count
+        FROM actual a LEFT JOIN stored s ON s.user_id = a.user_id AND s.status = a.status
+        WHERE s.user_id IS NULL
+        """,
+        params
+    )
+    try:
+        return cursor.fetchall()
+    finally:
+        close_cursor(cursor)
+
+def rebuild_task_counts(conn, user_id=None):
+    """Recompute task_counts from tasks, for one user or everyone.
+
+    Runs on the caller's connection; wrap it in a transaction so readers
+    never see the counters half rebuilt.
+    """
+    if user_id is None:
+        execute_query(conn, "DELETE FROM task_counts")
+        execute_query(conn,
+            """
+            INSERT INTO task_counts (user_id, status, count)
+            SELECT user_id, status, COUNT(*) FROM tasks
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, status
+            """
+        )
+    else:
+        execute_query(conn, "DELETE FROM task_counts WHERE user_id = ?", (user_id,))
+        execute_query(conn,
+            """
+            INSERT INTO task_counts (user_id, status, count)
+            SELECT user_id, status, COUNT(*) FROM tasks
+            WHERE user_id = ?
+            GROUP BY user_id, status
+            """,
+            (user_id,)
+        )
+
+def rebuild_task_stats(user_id=None, check=False):
+    conn = None
+    try:
+        # Get database connection
+        conn = get_db_connection()
+
+        drift = count_drift(conn, user_id)
+        if not drift:
+            print("Task counters are accurate")
+            return
+        print(f"Found {len(drift)} drifted counters:")
+        for drift_user_id, status, stored, actual in drift:
+            print(f"- user {drift_user_id} {status}: stored {stored}, actual {actual}")
+        if check:
+            return
+
+        # BEGIN IMMEDIATE keeps writers out while the counters are recomputed
+        with transaction(conn, immediate=True):
+            rebuild_task_counts(conn, user_id)
+        print("Task counters rebuilt")
+
+    except Exception as e:
+        print(f"Error rebuilding task counters: {e}")
+    finally:
+        if conn:
+            close_connection(conn)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Repair drift in the per-user task counters')
+    parser.add_argument('--user-id', type=int, help='Only rebuild the counters of this user')
+    parser.add_argument('--check', action='store_true', help='Report drift without repairing it')
+    args = parser.parse_args()
+    rebuild_task_stats(user_id=args.user_id, check=args.check)
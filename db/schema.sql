@@ -14,9 +14,89 @@ CREATE TABLE IF NOT EXISTS tasks (
     status TEXT NOT NULL DEFAULT 'pending',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
     FOREIGN KEY (user_id) REFERENCES users(id)
 );
 
+-- Indexes for the hot task queries (see migrations 4 to 6 in migrate_tasks.py)
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks (user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status_created ON tasks (user_id, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_updated ON tasks (user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_title ON tasks (user_id, title);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
+
+-- Full-text search over task titles and descriptions (see migration 6)
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title, description, content='tasks', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+
+-- Per-user task counts by status, maintained by triggers (see migration 7)
+CREATE TABLE IF NOT EXISTS task_counts (
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, status)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS task_counts_insert AFTER INSERT ON tasks
+WHEN new.user_id IS NOT NULL BEGIN
+    INSERT INTO task_counts (user_id, status, count) VALUES (new.user_id, new.status, 1)
+    ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_counts_delete AFTER DELETE ON tasks
+WHEN old.user_id IS NOT NULL BEGIN
+    UPDATE task_counts SET count = count - 1 WHERE user_id = old.user_id AND status = old.status;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_counts_update AFTER UPDATE OF status, user_id ON tasks
+WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id BEGIN
+    UPDATE task_counts SET count = count - 1 WHERE user_id = old.user_id AND status = old.status;
+    INSERT INTO task_counts (user_id, status, count)
+    SELECT new.user_id, new.status, 1 WHERE new.user_id IS NOT NULL
+    ON CONFLICT (user_id, status) DO UPDATE SET count = count + 1;
+END;
+
+-- Per-user task list revisions, moved by every write to tasks (see migration 9)
+CREATE TABLE IF NOT EXISTS task_revisions (
+    user_id INTEGER PRIMARY KEY,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS task_revisions_insert AFTER INSERT ON tasks
+WHEN new.user_id IS NOT NULL BEGIN
+    INSERT INTO task_revisions (user_id, revision) VALUES (new.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_revisions_delete AFTER DELETE ON tasks
+WHEN old.user_id IS NOT NULL BEGIN
+    INSERT INTO task_revisions (user_id, revision) VALUES (old.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_revisions_update AFTER UPDATE ON tasks BEGIN
+    INSERT INTO task_revisions (user_id, revision)
+    SELECT old.user_id, 1 WHERE old.user_id IS NOT NULL
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+    INSERT INTO task_revisions (user_id, revision)
+    SELECT new.user_id, 1 WHERE new.user_id IS NOT NULL AND new.user_id IS NOT old.user_id
+    ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+END;
+
 -- Create any additional tables as needed
 -- Example:
 -- CREATE TABLE IF NOT EXISTS posts (
@@ -1,113 +1,267 @@
-import sqlitecloud
+"""Generate synthetic users and tasks for load and scaling tests.
+
+Rows are generated on the fly and written in batched executemany
+transactions, so memory stays flat however many tasks are requested.
+With --workers the users are split between processes that each generate
+and write their own share.
+
+Usage:
+    python db/seed_db.py --users 1000 --tasks-per-user 10000 --workers 4 --defer-triggers
+    python db/seed_db.py --statuses pending=0.6,in_progress=0.3,completed=0.1 --spread-days 90
+"""
+import argparse
+import datetime
 import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 
+# Add the project root directory to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from db.rebuild_task_stats import rebuild_task_counts
+from services.utils.auth_utils import PasswordHasher
+from services.utils.db_utils import (
+    configure_database, get_db_connection, execute_query, execute_many, execute_script, transaction,
+    close_connection
+)
+from services.utils.filters import TASK_STATUSES
+
 # Load environment variables from .env file
 load_dotenv()
 
-def seed_db():
-    # Get database credentials from environment variables
-    db_url = os.getenv('DB_URL')
-    
-    if not db_url:
-        raise ValueError("Database URL not found in environment variables")
+DEFAULT_STATUSES = 'pending=0.5,in_progress=0.3,completed=0.2'
 
-    # Open the connection to SQLite Cloud
-    conn = sqlitecloud.connect(db_url)
+# Titles and descriptions the generated tasks are built from
+SAMPLE_TASKS = [
+    ('Complete project documentation',
+     'Write comprehensive documentation for the project including API endpoints and database schema'),
+    ('Review pull requests', 'Review and test all pending pull requests for the current sprint'),
+    ('Fix bug in login system', 'Investigate and fix the authentication issue in the login system'),
+    ('Implement user profile page', 'Create a new page for users to view and edit their profile information'),
+    ('Add task filtering', 'Implement filtering functionality for tasks based on status and date'),
+    ('Optimize database queries', 'Review and optimize slow database queries to improve application performance'),
+    ('Set up CI/CD pipeline',
+     'Configure continuous integration and deployment pipeline for automated testing and deployment'),
+    ('Implement error logging', 'Add comprehensive error logging system to track and debug application issues'),
+    ('Create API documentation', 'Generate Swagger/OpenAPI documentation for all REST endpoints'),
+    ('Add user authentication', 'Implement JWT-based authentication system for secure user access'),
+    ('Design database schema', 'Create and optimize database schema for the new feature requirements'),
+    ('Implement search functionality', 'Add advanced search capabilities with filters and sorting options'),
+    ('Update UI components', 'Modernize user interface components with new design system'),
+    ('Add data export feature', 'Implement functionality to export task data in various formats (CSV, Excel)'),
+    ('Set up monitoring system', 'Configure application monitoring and alerting system'),
+]
 
-    try:
-        # Sample data for tasks table
-        tasks_data = [
-            {
-                'title': 'Complete project documentation',
-                'description': 'Write comprehensive documentation for the project including API endpoints and database schema',
-                'status': 'pending'
-            },
-            {
-                'title': 'Review pull requests',
-                'description': 'Review and test all pending pull requests for the current sprint',
-                'status': 'in-progress'
-            },
-            {
-                'title': 'Fix bug in login system',
-                'description': 'Investigate and fix the authentication issue in the login system',
-                'status': 'completed'
-            },
-            {
-                'title': 'Implement user profile page',
-                'description': 'Create a new page for users to view and edit their profile information',
-                'status': 'pending'
-            },
-            {
-                'title': 'Add task filtering',
-                'description': 'Implement filtering functionality for tasks based on status and date',
-                'status': 'in-progress'
-            },
-            {
-                'title': 'Optimize database queries',
-                'description': 'Review and optimize slow database queries to improve application performance',
-                'status': 'pending'
-            },
-            {
-                'title': 'Set up CI/CD pipeline',
-                'description': 'Configure continuous integration and deployment pipeline for automated testing and deployment',
-                'status': 'in-progress'
-            },
-            {
-                'title': 'Implement error logging',
-                'description': 'Add comprehensive error logging system to track and debug application issues',
-                'status': 'completed'
-            },
-            {
-                'title': 'Create API documentation',
-                'description': 'Generate Swagger/OpenAPI documentation for all REST endpoints',
-                'status': 'pending'
-            },
-            {
-                'title': 'Add user authentication',
-                'description': 'Implement JWT-based authentication system for secure user access',
-                'status': 'in-progress'
-            },
-            {
-                'title': 'Design database schema',
-                'description': 'Create and optimize database schema for the new feature requirements',
-                'status': 'completed'
-            },
-            {
-                'title': 'Implement search functionality',
-                'description': 'Add advanced search capabilities with filters and sorting options',
-                'status': 'pending'
-            },
-            {
-                'title': 'Update UI components',
-                'description': 'Modernize user interface components with new design system',
-                'status': 'in-progress'
-            },
-            {
-                'title': 'Add data export feature',
-                'description': 'Implement functionality to export task data in various formats (CSV, Excel)',
-                'status': 'pending'
-            },
-            {
-                'title': 'Set up monitoring system',
-                'description': 'Configure application monitoring and alerting system',
-                'status': 'completed'
-            }
-        ]
-
-        # Insert sample tasks
-        for task in tasks_data:
-            conn.execute(
-                "INSERT INTO tasks (title, description, status) VALUES (?, ?, ?)",
-                (task['title'], task['description'], task['status'])
+# Triggers that keep search, counters and list revisions in sync row by row;
+# --defer-triggers drops them for the load and catches up in one pass afterwards
+TASK_INSERT_TRIGGERS = ('tasks_fts_insert', 'task_counts_insert', 'task_revisions_insert')
+
+def parse_distribution(text):
+    """Parse 'pending=0.5,completed=0.5' into (statuses, cumulative weights)"""
+    statuses = []
+    weights = []
+    for item in text.split(','):
+        status, _, weight = item.partition('=')
+        status = status.strip()
+        if status not in TASK_STATUSES:
+            raise ValueError(f"Status must be one of: {', '.join(TASK_STATUSES)}")
+        try:
+            weight = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {status}: {weight!r}")
+        if weight < 0:
+            raise ValueError(f"Invalid weight for {status}: {weight!r}")
+        statuses.append(status)
+        weights.append(weight)
+    if not sum(weights):
+        raise ValueError("At least one status needs a positive weight")
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return tuple(statuses), tuple(cumulative)
+
+def seed_users(conn, count, prefix, password_hash, batch_size):
+    """Create users prefix0..prefixN-1 (keeping existing ones) and return their ids"""
+    for start in range(0, count, batch_size):
+        with transaction(conn, immediate=True):
+            execute_many(conn, "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                         [(f'{prefix}{n}', password_hash) for n in range(start, min(start + batch_size, count))])
+    user_ids = []
+    for start in range(0, count, batch_size):
+        names = [f'{prefix}{n}' for n in range(start, min(start + batch_size, count))]
+        placeholders = ', '.join('?' * len(names))
+        cursor = execute_query(conn, f"SELECT id FROM users WHERE username IN ({placeholders})", names)
+        user_ids.extend(row[0] for row in cursor.fetchall())
+    return sorted(user_ids)
+
+def generate_tasks(user_ids, tasks_per_user, statuses, cum_weights, spread_seconds, end, rng):
+    """Yield (user_id, title, description, status, created_at, updated_at) rows.
+
+    created_at is uniform over the spread ending at end, and updated_at
+    falls between created_at and end.
+    """
+    end_ts = end.timestamp()
+    start_ts = end_ts - spread_seconds
+    strftime = time.strftime
+    gmtime = time.gmtime
+    samples = len(SAMPLE_TASKS)
+    for user_id in user_ids:
+        picked = rng.choices(statuses, cum_weights=cum_weights, k=tasks_per_user)
+        for n in range(tasks_per_user):
+            title, description = SAMPLE_TASKS[(user_id + n) % samples]
+            created = start_ts + rng.random() * spread_seconds
+            updated = created + rng.random() * (end_ts - created)
+            yield (
+                user_id, f'{title} #{n + 1}', description, picked[n],
+                strftime('%Y-%m-%d %H:%M:%S', gmtime(created)),
+                strftime('%Y-%m-%d %H:%M:%S', gmtime(updated))
             )
 
-        print("Database seeded successfully with task data!")
+def load_tasks(conn, rows, batch_size):
+    """Insert rows in transactions of batch_size; return the number inserted"""
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            total += _insert_batch(conn, batch)
+            batch = []
+    if batch:
+        total += _insert_batch(conn, batch)
+    return total
 
-    except Exception as e:
-        print(f"Error seeding database: {e}")
+def _insert_batch(conn, batch):
+    with transaction(conn, immediate=True):
+        execute_many(conn, """
+            INSERT INTO tasks (user_id, title, description, status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, batch)
+    return len(batch)
+
+def _load_worker(db_url, user_ids, tasks_per_user, distribution, spread_seconds, end, batch_size, seed):
+    # Runs in a worker process with its own connection pool
+    if db_url:
+        configure_database(db_url)
+    statuses, cum_weights = distribution
+    conn = get_db_connection()
+    try:
+        rows = generate_tasks(user_ids, tasks_per_user, statuses, cum_weights, spread_seconds, end,
+                              random.Random(seed))
+        return load_tasks(conn, rows, batch_size)
     finally:
-        conn.close()
+        close_connection(conn)
+
+def suspend_task_triggers(conn):
+    """Drop the per-row insert triggers for a bulk load"""
+    for trigger in TASK_INSERT_TRIGGERS:
+        execute_query(conn, f"DROP TRIGGER IF EXISTS {trigger}")
+
+def bump_task_revisions(conn):
+    """Move the list revision of every user owning tasks, so cached task lists go stale"""
+    execute_query(conn,
+        """
+        INSERT INTO task_revisions (user_id, revision)
+        SELECT DISTINCT user_id, 1 FROM tasks WHERE user_id IS NOT NULL
+        ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1
+        """
+    )
+
+def restore_task_triggers(conn):
+    """Rebuild search, counters and revisions from tasks, then recreate the dropped triggers"""
+    with transaction(conn, immediate=True):
+        execute_query(conn, "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+        rebuild_task_counts(conn)
+        bump_task_revisions(conn)
+    # schema.sql only creates what is missing, i.e. the dropped triggers
+    schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
+    with open(schema_path, 'r') as f:
+        execute_script(conn, f.read())
+
+def seed_db(users=100, tasks_per_user=100, statuses=DEFAULT_STATUSES, spread_days=365, end=None,
+            batch_size=10000, workers=0, defer_triggers=False, username_prefix='seed-user-',
+            password='password123', seed=None, db_url=None):
+    """Create users and tasks and return counts, elapsed seconds and rows/sec.
+
+    Users are named username_prefix0..N-1 and share one password hash.
+    Existing users with those names are reused, so running again adds more
+    tasks to the same users. defer_triggers makes large loads much faster
+    but must not be used while the service is writing to the database:
+    tasks inserted by others during the load would be missing from search.
+    """
+    if db_url:
+        configure_database(db_url)
+    distribution = parse_distribution(statuses)
+    end = end or datetime.datetime.now(datetime.timezone.utc)
+    spread_seconds = spread_days * 86400
+    rng = random.Random(seed)
+
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        password_hash = PasswordHasher(workers=0).hash(password)
+        user_ids = seed_users(conn, users, username_prefix, password_hash, batch_size)
+        if defer_triggers:
+            suspend_task_triggers(conn)
+        try:
+            if workers > 1 and len(user_ids) > 1:
+                shares = [user_ids[i::workers] for i in range(workers)]
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(_load_worker, db_url, share, tasks_per_user, distribution,
+                                        spread_seconds, end, batch_size, rng.random())
+                        for share in shares if share
+                    ]
+                    tasks = sum(future.result() for future in futures)
+            else:
+                rows = generate_tasks(user_ids, tasks_per_user, *distribution, spread_seconds, end, rng)
+                tasks = load_tasks(conn, rows, batch_size)
+        finally:
+            if defer_triggers:
+                restore_task_triggers(conn)
+    finally:
+        close_connection(conn)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'users': len(user_ids),
+        'tasks': tasks,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round((len(user_ids) + tasks) / elapsed, 1) if elapsed else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks-per-user', type=int, default=100)
+    parser.add_argument('--statuses', default=DEFAULT_STATUSES, help='status=weight pairs, comma separated')
+    parser.add_argument('--spread-days', type=float, default=365, help='created_at range ending now')
+    parser.add_argument('--batch-size', type=int, default=10000, help='rows per transaction')
+    parser.add_argument('--workers', type=int, default=0, help='parallel loader processes')
+    parser.add_argument('--defer-triggers', action='store_true',
+                        help='rebuild search and counters after the load; only with the service stopped')
+    parser.add_argument('--username-prefix', default='seed-user-')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--seed', type=int, help='random seed for reproducible data')
+    parser.add_argument('--db-url', help='defaults to DB_URL')
+    args = parser.parse_args()
+
+    try:
+        stats = seed_db(
+            users=args.users, tasks_per_user=args.tasks_per_user, statuses=args.statuses,
+            spread_days=args.spread_days, batch_size=args.batch_size, workers=args.workers,
+            defer_triggers=args.defer_triggers, username_prefix=args.username_prefix,
+            password=args.password, seed=args.seed, db_url=args.db_url
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Seeded {stats['users']} users and {stats['tasks']} tasks in {stats['seconds']}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)")
 
 if __name__ == '__main__':
-    seed_db() 
\ No newline at end of file
+    main()
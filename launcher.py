@@ -0,0 +1,96 @@
+"""Production launcher: serves create_app() under gunicorn's prefork server.
+
+Usage:
+    python launcher.py --workers 4 --threads 8 --bind 0.0.0.0:5000
+
+Every option can also be set through the matching environment variable
+(WEB_WORKERS, WEB_THREADS, WEB_BIND, WEB_MAX_REQUESTS, ...).
+
+The app is imported and built once in the master (preload), including the
+Swagger models, and workers are forked from it. Signals:
+    HUP          re-fork all workers gracefully (config reload)
+    USR2, WINCH  start a new master with new code, then stop the old workers
+    TERM         graceful shutdown within --graceful-timeout
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+from gunicorn.app.base import BaseApplication
+
+# Settings read when the app is imported, so they are set first:
+# hash passwords inline in each gunicorn worker rather than in a pool per
+# worker, and let every worker's /api/metrics report all workers' totals
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+if 'METRICS_DIR' not in os.environ:
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='task-api-metrics-')
+
+from app import create_app
+
+def default_workers():
+    return multiprocessing.cpu_count() * 2 + 1
+
+class TaskServiceApplication(BaseApplication):
+    """gunicorn application that loads the Flask app through create_app"""
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None and key in self.cfg.settings:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        if self.application is None:
+            self.application = create_app()
+        return self.application
+
+def build_options(args):
+    """Translate parsed arguments into gunicorn settings"""
+    threads = args.threads
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': threads,
+        'worker_class': args.worker_class or ('gthread' if threads > 1 else 'sync'),
+        'preload_app': not args.no_preload,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests_jitter,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'keepalive': args.keepalive,
+        'backlog': args.backlog,
+        'pidfile': args.pidfile,
+        'accesslog': args.access_log,
+    }
+
+def parse_args(argv=None):
+    env = os.getenv
+    parser = argparse.ArgumentParser(description='Run the task API under gunicorn')
+    parser.add_argument('--bind', default=env('WEB_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, default=int(env('WEB_WORKERS', str(default_workers()))))
+    parser.add_argument('--threads', type=int, default=int(env('WEB_THREADS', '4')),
+                        help='Threads per worker; uses the gthread worker when greater than 1')
+    parser.add_argument('--worker-class', default=env('WEB_WORKER_CLASS'))
+    parser.add_argument('--no-preload', action='store_true', default=env('WEB_PRELOAD', '1') == '0',
+                        help='Import the app in every worker instead of once in the master')
+    parser.add_argument('--max-requests', type=int, default=int(env('WEB_MAX_REQUESTS', '10000')),
+                        help='Recycle a worker after this many requests (0 disables)')
+    parser.add_argument('--max-requests-jitter', type=int, default=int(env('WEB_MAX_REQUESTS_JITTER', '1000')),
+                        help='Random spread so workers are not all recycled at once')
+    parser.add_argument('--timeout', type=int, default=int(env('WEB_TIMEOUT', '30')))
+    parser.add_argument('--graceful-timeout', type=int, default=int(env('WEB_GRACEFUL_TIMEOUT', '30')))
+    parser.add_argument('--keepalive', type=int, default=int(env('WEB_KEEPALIVE', '5')))
+    parser.add_argument('--backlog', type=int, default=int(env('WEB_BACKLOG', '2048')))
+    parser.add_argument('--pidfile', default=env('WEB_PIDFILE'))
+    parser.add_argument('--access-log', default=env('WEB_ACCESS_LOG'))
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    TaskServiceApplication(build_options(parse_args(argv))).run()
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,29 @@
+import csv
 import datetime
+import io
+import json
 import os
 import logging
-from flask import Flask, request, Blueprint
+from flask import Flask, request, Blueprint, Response, stream_with_context
 from flask_restx import Resource, fields
 from dotenv import load_dotenv
-from services.utils.db_utils import get_db_connection, execute_query, execute_update, close_cursor, close_connection
+from services.utils.db_utils import get_db_backend, get_db_connection, execute_query, execute_update, execute_many, transaction, close_cursor, close_connection
 from services.utils.auth_utils import token_required
+from services.utils.group_commit import GroupCommitQueue
+from services.utils.rate_limit import RateLimit, rate_limit, user_key
+from services.utils.cache import task_list_cache
+from services.utils.metrics import render_metrics
+from services.utils.records import TASK_COLUMNS, TASK_EDITABLE_COLUMNS, TASK_SELECT, TaskRecord, parse_task_etag, task_records, task_rowset, update_assignments
+from services.utils.health import DEGRADED, DOWN, readiness_probe
+from services.utils.conditional import make_etag, parse_db_timestamp, validator_headers, is_not_modified, not_modified_response
+from services.utils.pagination import InvalidCursor, encode_cursor, decode_cursor, parse_bool
+from services.utils.filters import TASK_STATUSES, TASK_SORT_FIELDS, InvalidFilter, counts_answer, parse_task_filters, filter_cache_key, task_conditions, task_ordering, keyset_condition
 
 # Load environment variables from the correct path
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env', '.env'))
 
+logger = logging.getLogger(__name__)
+
 # Create a Blueprint for task routes
 task_bp = Blueprint('tasks', __name__)
 
@@ -19,9 +33,45 @@ ns = None  # Will be initialized in init_app
 # Create a separate namespace for health check
 health_ns = None  # Will be initialized in init_app
 
+# Create a separate namespace for Prometheus metrics
+metrics_ns = None  # Will be initialized in init_app
+
 # Define models for Swagger documentation
 task_model = None
 task_input_model = None
+task_batch_input_model = None
+
+# Maximum number of operations accepted by a single batch request
+TASK_BATCH_MAX_SIZE = int(os.getenv('TASK_BATCH_MAX_SIZE', '1000'))
+
+# Rows read per round trip while streaming an export
+TASK_EXPORT_CHUNK_SIZE = int(os.getenv('TASK_EXPORT_CHUNK_SIZE', '500'))
+
+# Gather concurrent task creates, updates and deletes into shared transactions.
+# Creates are merged into one INSERT, but updates and deletes still run one
+# statement at a time, so over SQLite Cloud's network round trips they would
+# get slower and only creates are gathered there; see
+# benchmarks/bench_group_commit.py --db-latency-ms
+TASK_GROUP_COMMIT = parse_bool(os.getenv('TASK_GROUP_COMMIT'))
+
+# Seconds a group commit waits for more writes, and the most writes it takes
+TASK_GROUP_COMMIT_WINDOW = float(os.getenv('TASK_GROUP_COMMIT_WINDOW', '0.002'))
+TASK_GROUP_COMMIT_MAX_BATCH = int(os.getenv('TASK_GROUP_COMMIT_MAX_BATCH', '64'))
+
+task_write_queue = (
+    GroupCommitQueue(TASK_GROUP_COMMIT_WINDOW, TASK_GROUP_COMMIT_MAX_BATCH) if TASK_GROUP_COMMIT else None
+)
+
+# Task list requests per user, as '<count>/<period>'; empty disables the limit.
+# Counted per worker process with the default in-memory rate limit backend
+RATE_LIMIT_TASK_LIST = os.getenv('RATE_LIMIT_TASK_LIST', '120/minute')
+
+task_list_limit = RateLimit.parse('task_list', RATE_LIMIT_TASK_LIST)
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
 
 class HealthCheck(Resource):
     def get(self):
@@ -32,6 +82,36 @@ class HealthCheck(Resource):
             'timestamp': datetime.datetime.utcnow().isoformat()
         }
 
+class Liveness(Resource):
+    def get(self):
+        """Check the process is up and serving requests, without touching dependencies"""
+        return {
+            'status': 'success',
+            'message': 'Service is alive',
+            'timestamp': datetime.datetime.utcnow().isoformat()
+        }
+
+class Readiness(Resource):
+    def get(self):
+        """Check the service can reach its database; 503 when it is down"""
+        result, cached = readiness_probe.result()
+        if result['state'] == DOWN:
+            return {
+                'status': 'error',
+                'message': 'Service is not ready',
+                'data': dict(result, cached=cached)
+            }, 503
+        return {
+            'status': 'success',
+            'message': 'Service is degraded' if result['state'] == DEGRADED else 'Service is ready',
+            'data': dict(result, cached=cached)
+        }, 200
+
+class Metrics(Resource):
+    def get(self):
+        """Expose service metrics in the Prometheus text format"""
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 def validate_task_data(data, required_fields=None):
     """Validate task data and return error response if invalid"""
     if not data:
@@ -69,6 +149,28 @@ def validate_task_data(data, required_fields=None):
 
     return None
 
+def validate_task_batch(items, required_fields=None):
+    """Validate a list of task payloads.
+
+    Returns (valid, errors) where valid is a list of (index, item) pairs and
+    errors holds a per-item error result for every rejected payload.
+    """
+    valid = []
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'status': 'error', 'message': 'Each item must be an object'})
+            continue
+        validation_result = validate_task_data(item, required_fields=required_fields)
+        if validation_result:
+            errors.append({'index': index, 'status': 'error', 'message': validation_result[0]['message']})
+        else:
+            valid.append((index, item))
+    return valid, errors
+
+def _is_task_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
 # @app.route("/api/tasks", methods=["GET", "POST"])
 # def handle_tasks():
 #     if request.method == "GET":
@@ -76,15 +178,41 @@ def validate_task_data(data, required_fields=None):
 #     elif request.method == "POST":
 #         return create_task()
 
+def count_tasks(conn, user_id, filters, where, params):
+    """Count a user's tasks matching filters.
+
+    Unfiltered and status-only counts are read from the task_counts table
+    maintained by triggers; date range and search filters fall back to
+    COUNT(*) over the matching rows.
+    """
+    cursor = None
+    try:
+        if counts_answer(filters):
+            if filters.get('status'):
+                cursor = execute_query(conn,
+                    "SELECT COALESCE(SUM(count), 0) FROM task_counts WHERE user_id = ? AND status = ?",
+                    (user_id, filters['status'])
+                )
+            else:
+                cursor = execute_query(conn,
+                    "SELECT COALESCE(SUM(count), 0) FROM task_counts WHERE user_id = ?",
+                    (user_id,)
+                )
+        else:
+            cursor = execute_query(conn, f"SELECT COUNT(*) FROM tasks WHERE {where}", params)
+        return cursor.fetchone()[0]
+    finally:
+        if cursor:
+            close_cursor(cursor)
+
 class TaskList(Resource):
     @token_required
+    @rate_limit(task_list_limit, key=user_key)
     def get(self, user_id):
-        """List all tasks for a user"""
-        conn = None
-        cursor = None
+        """List a user's tasks, optionally filtered, searched and sorted"""
         try:
             # Ensure user_id is the correct type
-            logging.debug(f"Fetching tasks for user_id: {user_id}")
+            logger.debug("Fetching tasks for user %s", user_id)
             if not isinstance(user_id, int):
                 return {
                     'status': 'error',
@@ -102,42 +230,112 @@ class TaskList(Resource):
                     'message': 'Page and per_page must be positive integers'
                 }, 400
 
+            filters = parse_task_filters(request.args)
+            filter_key = filter_cache_key(filters)
+
+            # Answer conditional requests before loading or serializing any rows
+            revision, last_modified = self._get_signature(user_id)
+            etag = make_etag(user_id, revision, request.query_string)
+            headers = validator_headers(etag, parse_db_timestamp(last_modified))
+            # Deletes do not move MAX(updated_at), so only the ETag can prove a list unchanged
+            if is_not_modified(etag):
+                return not_modified_response(headers)
+
+            # Cursor mode seeks straight to the next page instead of using OFFSET
+            if 'cursor' in request.args:
+                token = request.args.get('cursor', '')
+                include_total = parse_bool(request.args.get('include_total'))
+                result = task_list_cache.get_or_load(
+                    user_id, revision,
+                    f"cursor:{token}:{per_page}:{int(include_total)}:{filter_key}",
+                    lambda: self._get_by_cursor(user_id, per_page, token, include_total, filters)
+                )
+            else:
+                result = task_list_cache.get_or_load(
+                    user_id, revision,
+                    f"page:{page}:{per_page}:{filter_key}",
+                    lambda: self._get_by_page(user_id, page, per_page, filters)
+                )
+            return result, 200, headers
+
+        except InvalidFilter as e:
+            return {
+                'status': 'error',
+                'message': str(e)
+            }, 400
+        except InvalidCursor:
+            return {
+                'status': 'error',
+                'message': 'Invalid cursor'
+            }, 400
+        except Exception as e:
+            logger.exception("An unexpected error occurred: %s", e)
+            return {
+                'status': 'error',
+                'message': 'An unexpected error occurred'
+            }, 500
+
+    def _get_signature(self, user_id):
+        """Return (revision, latest updated_at) for a user's tasks.
+
+        The revision is moved by triggers on every insert, update and
+        delete, so it changes with the list in every worker at once.
+        """
+        conn = None
+        cursor = None
+        error = None
+        try:
+            conn = get_db_connection()
+            cursor = execute_query(conn,
+                """
+                SELECT (SELECT COALESCE(MAX(revision), 0) FROM task_revisions WHERE user_id = ?),
+                       MAX(updated_at)
+                FROM tasks
+                WHERE user_id = ?
+                """,
+                (user_id, user_id)
+            )
+            return tuple(cursor.fetchone())
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if cursor:
+                close_cursor(cursor)
+            if conn:
+                close_connection(conn, error)
+
+    def _get_by_page(self, user_id, page, per_page, filters):
+        """Return one page of matching tasks using page/per_page offsets"""
+        conn = None
+        cursor = None
+        error = None
+        try:
             # Calculate offset
             offset = (page - 1) * per_page
+            where, params = task_conditions(user_id, filters)
+            _, order_by = task_ordering(filters)
 
             # Get database connection
             conn = get_db_connection()
 
-            # Get total count of tasks for the current user
-            cursor = execute_query(conn,
-                "SELECT COUNT(*) FROM tasks WHERE user_id = ?",
-                (user_id,)
-            )
-            total_tasks = cursor.fetchone()[0]
+            # Get total count of matching tasks for the current user
+            total_tasks = count_tasks(conn, user_id, filters, where, params)
 
             # Get paginated tasks for the current user
             cursor = execute_query(conn,
-                """
-                SELECT id, title, description, status, created_at, updated_at
+                f"""
+                SELECT {TASK_SELECT}
                 FROM tasks
-                WHERE user_id = ?
-                ORDER BY created_at DESC
+                WHERE {where}
+                {order_by}
                 LIMIT ? OFFSET ?
                 """,
-                (user_id, per_page, offset)
+                (*params, per_page, offset)
             )
-            tasks = cursor.fetchall()
-            
-            # Convert tasks to list of dictionaries that match the task_model
-            task_list = [{
-                'id': task[0],
-                'title': task[1],
-                'description': task[2],
-                'status': task[3],
-                'created_at': task[4],
-                'updated_at': task[5]
-            } for task in tasks]
-            
+            # Serialized straight into the task_model shape by the response encoder
+            task_list = task_rowset(task_records(cursor.fetchall()))
+
             return {
                 'status': 'success',
                 'data': {
@@ -151,60 +349,114 @@ class TaskList(Resource):
                         'has_prev': page > 1
                     }
                 }
-            }, 200
-
+            }
         except Exception as e:
-            logging.error(f"Error: {e}")
-            print(f"Error: {e}", flush=True)
-            logging.exception("An unexpected error occurred")
+            error = e
+            raise
+        finally:
+            if cursor:
+                close_cursor(cursor)
+            if conn:
+                close_connection(conn, error)
+
+    def _get_by_cursor(self, user_id, per_page, token, include_total, filters):
+        """Return the page of matching tasks following the position encoded in token"""
+        conn = None
+        cursor = None
+        error = None
+        try:
+            where, params = task_conditions(user_id, filters)
+            sort, order_by = task_ordering(filters)
+            order = filters.get('order', 'desc')
+
+            if token:
+                # A position only means something under the ordering it was taken in
+                cursor_sort, cursor_order, sort_value, last_id = decode_cursor(
+                    token, str, str, (str, int, float, type(None)), int
+                )
+                if (cursor_sort, cursor_order) != (sort, order):
+                    raise InvalidCursor("Cursor was issued for a different sort or order")
+
+            conn = get_db_connection()
+            if token:
+                cursor = execute_query(conn,
+                    f"""
+                    SELECT {TASK_SELECT}
+                    FROM tasks
+                    WHERE {where} AND {keyset_condition(filters)}
+                    {order_by}
+                    LIMIT ?
+                    """,
+                    (*params, sort_value, last_id, per_page + 1)
+                )
+            else:
+                cursor = execute_query(conn,
+                    f"""
+                    SELECT {TASK_SELECT}
+                    FROM tasks
+                    WHERE {where}
+                    {order_by}
+                    LIMIT ?
+                    """,
+                    (*params, per_page + 1)
+                )
+            # One extra row tells us whether another page exists
+            tasks = task_records(cursor.fetchall())
+            has_next = len(tasks) > per_page
+            tasks = tasks[:per_page]
+            task_list = task_rowset(tasks)
+
+            pagination = {
+                'per_page': per_page,
+                'has_next': has_next,
+                'next_cursor': encode_cursor(sort, order, *tasks[-1].sort_key(sort)) if has_next else None
+            }
+
+            # Counting is O(n) per user when filters go beyond status, so only do it when asked
+            if include_total:
+                pagination['total'] = count_tasks(conn, user_id, filters, where, params)
+
             return {
-                'status': 'error',
-                'message': 'An unexpected error occurred'
-            }, 500
+                'status': 'success',
+                'data': {
+                    'tasks': task_list,
+                    'pagination': pagination
+                }
+            }
+        except Exception as e:
+            error = e
+            raise
         finally:
             if cursor:
                 close_cursor(cursor)
             if conn:
-                close_connection(conn)
+                close_connection(conn, error)
 
     @token_required
     def post(self, user_id):
         """Create a new task"""
-        conn = None
-        cursor = None
         try:
             data = request.get_json()
-            print(f"Current user: {user_id}", flush=True)
-            
+            logger.debug("Creating task for user %s", user_id)
+
             # Validate task data using the validate_task_data function
             validation_result = validate_task_data(data, required_fields=['title', 'description'])
             if validation_result:
                 return validation_result
 
-            # Get database connection
-            conn = get_db_connection()
-
             # Insert new task
-            cursor = execute_update(conn,
-                """
+            task = TaskRecord.from_row(execute_task_write(
+                f"""
                 INSERT INTO tasks (title, description, status, user_id, created_at, updated_at)
                 VALUES (?, ?, 'pending', ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                RETURNING id, title, description, status, created_at, updated_at
+                RETURNING {TASK_SELECT}
                 """,
                 (data['title'], data['description'], user_id)
-            )
-            task = cursor.fetchone()
-            print(f"Task created: {task}", flush=True)
+            ))
+            logger.info("Task created", extra={'user_id': user_id, 'task_id': task.id})
             
             # Format the response to match task_model
-            response_data = {
-                'id': task[0],
-                'title': task[1],
-                'description': task[2],
-                'status': task[3],
-                'created_at': task[4],
-                'updated_at': task[5]
-            }
+            response_data = task.to_dict()
             
             return {
                 'status': 'success',
@@ -213,9 +465,127 @@ class TaskList(Resource):
             }, 201
 
         except Exception as e:
-            print(f"Error: {e}", flush=True)
-            logging.error(f"Error: {e}")
-            logging.exception("An unexpected error occurred")
+            logger.exception("An unexpected error occurred: %s", e)
+            return {
+                'status': 'error',
+                'message': 'An unexpected error occurred'
+            }, 500
+
+def set_task_write_queue(queue):
+    """Send task writes through a GroupCommitQueue, or commit each one directly with None"""
+    global task_write_queue
+    task_write_queue = queue
+
+def execute_task_write(query, params, rowcount=False):
+    """Run one task write statement and commit it.
+
+    Goes through the group-commit queue when enabled and it accepts the
+    statement. Returns the first RETURNING row, or the number of changed
+    rows when rowcount is set.
+    """
+    if task_write_queue is not None and task_write_queue.accepts(query):
+        return task_write_queue.execute(query, params, rowcount=rowcount)
+    conn = None
+    cursor = None
+    error = None
+    try:
+        conn = get_db_connection()
+        cursor = execute_update(conn, query, params)
+        return cursor.rowcount if rowcount else cursor.fetchone()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if cursor:
+            close_cursor(cursor)
+        if conn:
+            close_connection(conn, error)
+
+def if_match_condition(task_id):
+    """Translate If-Match into an extra WHERE condition on the task version.
+
+    Returns ('', []) for unconditional requests (no header or *). If-Match
+    uses strong comparison, so weak tags are ignored; tags that do not
+    belong to this task (or only weak ones) leave an empty IN list, which
+    matches nothing.
+    """
+    if_match = request.if_match
+    if not request.headers.get('If-Match') or if_match.star_tag:
+        return '', []
+    versions = []
+    for tag in if_match.as_set(include_weak=False):
+        version = parse_task_etag(tag, task_id)
+        if version is not None:
+            versions.append(version)
+    placeholders = ', '.join('?' for _ in versions)
+    return f" AND version IN ({placeholders})", versions
+
+def precondition_failed_or_missing(conn, user_id, task_id):
+    """Explain why a conditional write touched no row: 404, or 412 with the current ETag"""
+    cursor = None
+    try:
+        cursor = execute_query(conn,
+            f"SELECT {TASK_SELECT} FROM tasks WHERE id = ? AND user_id = ?",
+            (task_id, user_id)
+        )
+        task = TaskRecord.from_row(cursor.fetchone())
+    finally:
+        if cursor:
+            close_cursor(cursor)
+    if not task:
+        return {
+            'status': 'error',
+            'message': 'Task not found'
+        }, 404
+    return {
+        'status': 'error',
+        'message': 'Task was modified by another request',
+        'data': task.to_dict()
+    }, 412, validator_headers(task.etag, parse_db_timestamp(task.updated_at), weak=False)
+
+class Task(Resource):
+    @token_required
+    def get(self, user_id, task_id):
+        """Get a single task"""
+        conn = None
+        cursor = None
+        error = None
+        try:
+            # Get database connection
+            conn = get_db_connection()
+
+            cursor = execute_query(conn,
+                f"""
+                SELECT {TASK_SELECT}
+                FROM tasks
+                WHERE id = ? AND user_id = ?
+                """,
+                (task_id, user_id)
+            )
+            task = TaskRecord.from_row(cursor.fetchone())
+            if not task:
+                return {
+                    'status': 'error',
+                    'message': 'Task not found'
+                }, 404
+
+            headers = validator_headers(task.etag, parse_db_timestamp(task.updated_at), weak=False)
+            # updated_at has one-second resolution, so two edits within a second
+            # share a Last-Modified; only the versioned ETag can answer 304
+            if is_not_modified(task.etag):
+                return not_modified_response(headers)
+
+            # Format the response to match task_model
+            response_data = task.to_dict()
+
+            return {
+                'status': 'success',
+                'data': response_data
+            }, 200, headers
+
+        except Exception as e:
+            error = e
+            logger.exception("An unexpected error occurred: %s", e)
             return {
                 'status': 'error',
                 'message': 'An unexpected error occurred'
@@ -224,79 +594,72 @@ class TaskList(Resource):
             if cursor:
                 close_cursor(cursor)
             if conn:
-                close_connection(conn)
+                close_connection(conn, error)
 
-class Task(Resource):
     @token_required
     def put(self, user_id, task_id):
         """Update a task"""
+        return self._update(user_id, task_id)
+
+    @token_required
+    def patch(self, user_id, task_id):
+        """Partially update a task, changing only the supplied fields"""
+        return self._update(user_id, task_id)
+
+    def _update(self, user_id, task_id):
+        """Apply the fields in the request body with one UPDATE ... RETURNING.
+
+        With If-Match the update only applies to the version the client
+        last saw; otherwise it answers 412 with the current entity tag.
+        """
         conn = None
         cursor = None
+        error = None
         try:
-            print(f"Current user: {user_id}", flush=True)
-            print(f"Current task_id: {task_id}", flush=True)
-         
+            logger.debug("Updating task %s for user %s", task_id, user_id)
+
             data = request.get_json()
-            
+
             # Validate input data using validate_task_data function
             validation_result = validate_task_data(data)
             if validation_result:
                 return validation_result
-            
-            # Get database connection
-            conn = get_db_connection()
 
-            # Check if task exists and belongs to the current user
-            cursor = execute_query(conn,
-                "SELECT id FROM tasks WHERE id = ? AND user_id = ?",
-                (task_id, user_id)
-            )
-            if not cursor.fetchone():
+            assignments, params = update_assignments(data)
+            if not params:
                 return {
                     'status': 'error',
-                    'message': 'Task not found'
-                }, 404
+                    'message': f'Provide at least one of: {", ".join(TASK_EDITABLE_COLUMNS)}'
+                }, 400
+            version_condition, version_params = if_match_condition(task_id)
 
-            # Update task
-            cursor = execute_update(conn,
-                """
+            # A missing row means the task does not exist or the version moved on
+            task = TaskRecord.from_row(execute_task_write(
+                f"""
                 UPDATE tasks
-                SET title = COALESCE(?, title),
-                    description = COALESCE(?, description),
-                    status = COALESCE(?, status),
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ? AND user_id = ?
-                RETURNING id, title, description, status, created_at, updated_at
+                SET {assignments}
+                WHERE id = ? AND user_id = ?{version_condition}
+                RETURNING {TASK_SELECT}
                 """,
-                (data.get('title'), data.get('description'), data.get('status'), task_id, user_id)
-            )
-            task = cursor.fetchone()
-            
+                (*params, task_id, user_id, *version_params)
+            ))
+
             if not task:
-                return {
-                    'status': 'error',
-                    'message': 'Task not found'
-                }, 404
+                conn = get_db_connection()
+                return precondition_failed_or_missing(conn, user_id, task_id)
 
             # Format the response to match task_model
-            response_data = {
-                'id': task[0],
-                'title': task[1],
-                'description': task[2],
-                'status': task[3],
-                'created_at': task[4],
-                'updated_at': task[5]
-            }
+            response_data = task.to_dict()
 
             return {
                 'status': 'success',
                 'message': 'Task updated successfully',
                 'data': response_data
-            }, 200
+            }, 200, validator_headers(task.etag, parse_db_timestamp(task.updated_at), weak=False)
 
         except Exception as e:
-            logging.error(f"Error: {e}")
-            logging.exception("An unexpected error occurred")
+            error = e
+            logger.exception("An unexpected error occurred: %s", e)
             return {
                 'status': 'error',
                 'message': 'An unexpected error occurred'
@@ -305,37 +668,226 @@ class Task(Resource):
             if cursor:
                 close_cursor(cursor)
             if conn:
-                close_connection(conn)
+                close_connection(conn, error)
 
     @token_required
     def delete(self, user_id, task_id):
         """Delete a task"""
         conn = None
         cursor = None
+        error = None
         try:
-            # Get database connection
-            conn = get_db_connection()
+            version_condition, version_params = if_match_condition(task_id)
 
             # Delete task
-            cursor = execute_update(conn,
-                "DELETE FROM tasks WHERE id = ? AND user_id = ?",
-                (task_id, user_id)
+            deleted = execute_task_write(
+                f"DELETE FROM tasks WHERE id = ? AND user_id = ?{version_condition}",
+                (task_id, user_id, *version_params),
+                rowcount=True
+            )
+
+            if deleted == 0:
+                conn = get_db_connection()
+                return precondition_failed_or_missing(conn, user_id, task_id)
+
+            return {
+                'status': 'success',
+                'message': 'Task deleted successfully'
+            }, 200
+
+        except Exception as e:
+            error = e
+            logger.exception("An unexpected error occurred: %s", e)
+            return {
+                'status': 'error',
+                'message': 'An unexpected error occurred'
+            }, 500
+        finally:
+            if cursor:
+                close_cursor(cursor)
+            if conn:
+                close_connection(conn, error)
+
+class TaskStats(Resource):
+    @token_required
+    def get(self, user_id):
+        """Count a user's tasks by status"""
+        try:
+            # A primary key range read of a few counter rows; cheaper than
+            # looking up the revision to key a cached copy
+            counts = self._get_counts(user_id)
+            stats = {status: counts.get(status, 0) for status in TASK_STATUSES}
+            stats['total'] = sum(counts.values())
+            return {
+                'status': 'success',
+                'data': stats
+            }, 200
+
+        except Exception as e:
+            logger.exception("An unexpected error occurred: %s", e)
+            return {
+                'status': 'error',
+                'message': 'An unexpected error occurred'
+            }, 500
+
+    def _get_counts(self, user_id):
+        """Return {status: count} from the trigger-maintained counters"""
+        conn = None
+        cursor = None
+        error = None
+        try:
+            conn = get_db_connection()
+            cursor = execute_query(conn,
+                "SELECT status, count FROM task_counts WHERE user_id = ?",
+                (user_id,)
             )
+            return {status: count for status, count in cursor.fetchall()}
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if cursor:
+                close_cursor(cursor)
+            if conn:
+                close_connection(conn, error)
 
-            if cursor.rowcount == 0:
+class TaskBatch(Resource):
+    @token_required
+    def post(self, user_id):
+        """Create, update and delete many tasks in a single transaction"""
+        conn = None
+        cursor = None
+        error = None
+        try:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
                 return {
                     'status': 'error',
-                    'message': 'Task not found'
-                }, 404
+                    'message': 'No data provided'
+                }, 400
+
+            creates = data.get('create') or []
+            updates = data.get('update') or []
+            deletes = data.get('delete') or []
+            if not all(isinstance(ops, list) for ops in (creates, updates, deletes)):
+                return {
+                    'status': 'error',
+                    'message': 'create, update and delete must be arrays'
+                }, 400
+
+            if len(creates) + len(updates) + len(deletes) > TASK_BATCH_MAX_SIZE:
+                return {
+                    'status': 'error',
+                    'message': f'Batch exceeds the maximum of {TASK_BATCH_MAX_SIZE} operations'
+                }, 413
+
+            valid_creates, create_results = validate_task_batch(creates, required_fields=['title', 'description'])
+            valid_updates, update_results = validate_task_batch(updates)
+            checked_updates = []
+            for index, item in valid_updates:
+                if not _is_task_id(item.get('id')):
+                    update_results.append({'index': index, 'status': 'error', 'message': 'Each update must include an integer id'})
+                elif not any(column in item for column in TASK_EDITABLE_COLUMNS):
+                    # An id-only update would still bump the version and change the ETag
+                    update_results.append({
+                        'index': index,
+                        'status': 'error',
+                        'message': f'Provide at least one of: {", ".join(TASK_EDITABLE_COLUMNS)}'
+                    })
+                else:
+                    checked_updates.append((index, item))
+            valid_updates = checked_updates
+            delete_results = [
+                {'index': index, 'status': 'error', 'message': 'Task id must be an integer'}
+                for index, task_id in enumerate(deletes) if not _is_task_id(task_id)
+            ]
+            delete_ids = [(index, task_id) for index, task_id in enumerate(deletes) if _is_task_id(task_id)]
+
+            conn = get_db_connection()
+
+            # Take the write lock up front so the id range read below is ours
+            with transaction(conn, immediate=True):
+                if valid_creates:
+                    cursor = execute_query(conn, "SELECT COALESCE(MAX(id), 0) FROM tasks")
+                    last_id = cursor.fetchone()[0]
+                    close_cursor(cursor)
+
+                    cursor = execute_many(conn,
+                        """
+                        INSERT INTO tasks (title, description, status, user_id, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                        """,
+                        [(item['title'], item['description'], item.get('status', 'pending'), user_id)
+                         for _, item in valid_creates]
+                    )
+                    close_cursor(cursor)
+
+                    # Rows inserted by this transaction come back in insertion order
+                    cursor = execute_query(conn,
+                        f"""
+                        SELECT {TASK_SELECT}
+                        FROM tasks
+                        WHERE id > ? AND user_id = ?
+                        ORDER BY id
+                        """,
+                        (last_id, user_id)
+                    )
+                    for (index, _), task in zip(valid_creates, task_records(cursor.fetchall())):
+                        create_results.append({
+                            'index': index,
+                            'status': 'success',
+                            'data': task.to_dict()
+                        })
+                    close_cursor(cursor)
+
+                for index, item in valid_updates:
+                    assignments, params = update_assignments(item)
+                    cursor = execute_query(conn,
+                        f"""
+                        UPDATE tasks
+                        SET {assignments}
+                        WHERE id = ? AND user_id = ?
+                        RETURNING {TASK_SELECT}
+                        """,
+                        (*params, item['id'], user_id)
+                    )
+                    task = TaskRecord.from_row(cursor.fetchone())
+                    close_cursor(cursor)
+                    if task:
+                        update_results.append({
+                            'index': index,
+                            'status': 'success',
+                            'data': task.to_dict()
+                        })
+                    else:
+                        update_results.append({'index': index, 'status': 'error', 'message': 'Task not found'})
+
+                if delete_ids:
+                    placeholders = ', '.join('?' for _ in delete_ids)
+                    cursor = execute_query(conn,
+                        f"DELETE FROM tasks WHERE user_id = ? AND id IN ({placeholders}) RETURNING id",
+                        (user_id, *(task_id for _, task_id in delete_ids))
+                    )
+                    deleted = {row[0] for row in cursor.fetchall()}
+                    for index, task_id in delete_ids:
+                        if task_id in deleted:
+                            delete_results.append({'index': index, 'status': 'success', 'data': {'id': task_id}})
+                        else:
+                            delete_results.append({'index': index, 'status': 'error', 'message': 'Task not found'})
 
             return {
                 'status': 'success',
-                'message': 'Task deleted successfully'
+                'message': 'Batch processed',
+                'data': {
+                    'created': sorted(create_results, key=lambda r: r['index']),
+                    'updated': sorted(update_results, key=lambda r: r['index']),
+                    'deleted': sorted(delete_results, key=lambda r: r['index'])
+                }
             }, 200
 
         except Exception as e:
-            logging.error(f"Error: {e}")
-            logging.exception("An unexpected error occurred")
+            error = e
+            logger.exception("An unexpected error occurred: %s", e)
             return {
                 'status': 'error',
                 'message': 'An unexpected error occurred'
@@ -344,10 +896,121 @@ class Task(Resource):
             if cursor:
                 close_cursor(cursor)
             if conn:
-                close_connection(conn)
+                close_connection(conn, error)
+
+def read_task_chunk(where, params, order_by, keyset=None, last_key=None, limit=TASK_EXPORT_CHUNK_SIZE):
+    """Return up to limit matching TaskRecords, after last_key when given.
+
+    Checks a pooled connection out for just this query and returns it
+    before the rows are handed back.
+    """
+    conn = None
+    cursor = None
+    error = None
+    try:
+        conn = get_db_connection()
+        if last_key is None:
+            cursor = execute_query(conn,
+                f"""
+                SELECT {TASK_SELECT}
+                FROM tasks
+                WHERE {where}
+                {order_by}
+                LIMIT ?
+                """,
+                (*params, limit)
+            )
+        else:
+            cursor = execute_query(conn,
+                f"""
+                SELECT {TASK_SELECT}
+                FROM tasks
+                WHERE {where} AND {keyset}
+                {order_by}
+                LIMIT ?
+                """,
+                (*params, *last_key, limit)
+            )
+        return task_records(cursor.fetchall())
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if cursor:
+            close_cursor(cursor)
+        if conn:
+            close_connection(conn, error)
+
+def iter_task_rows(user_id, filters=None, chunk_size=TASK_EXPORT_CHUNK_SIZE):
+    """Yield a TaskRecord for every matching task of a user, in constant memory.
+
+    Rows are read in keyset-paginated chunks rather than from one open
+    result set, because the SQLite Cloud driver buffers a whole result set
+    client-side. Each chunk holds a pooled connection only while it is
+    read, so a client reading the export slowly does not keep a pool slot.
+    Tasks come newest first unless filters choose another sort.
+    """
+    filters = filters or {}
+    where, params = task_conditions(user_id, filters)
+    sort, order_by = task_ordering(filters)
+    keyset = keyset_condition(filters)
+
+    last_key = None
+    while True:
+        rows = read_task_chunk(where, params, order_by, keyset, last_key, chunk_size)
+        if rows:
+            last_key = rows[-1].sort_key(sort)
+            yield from rows
+        if len(rows) < chunk_size:
+            break
+
+def format_ndjson(rows):
+    """Serialize TaskRecords as newline-delimited JSON"""
+    for row in rows:
+        yield json.dumps(row.to_dict()) + '\n'
+
+def format_csv(rows, chunk_size=TASK_EXPORT_CHUNK_SIZE):
+    """Serialize task rows as CSV with a header line"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TASK_COLUMNS)
+    for index, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if index % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+class TaskExport(Resource):
+    @token_required
+    def get(self, user_id):
+        """Stream a user's tasks as NDJSON or CSV, with the same filters as the list"""
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_MIMETYPES:
+            return {
+                'status': 'error',
+                'message': 'Format must be one of: ndjson, csv'
+            }, 400
+
+        try:
+            filters = parse_task_filters(request.args)
+        except InvalidFilter as e:
+            return {
+                'status': 'error',
+                'message': str(e)
+            }, 400
+
+        rows = iter_task_rows(user_id, filters)
+        body = format_csv(rows) if export_format == 'csv' else format_ndjson(rows)
+
+        # Compression is negotiated by the app-wide middleware (utils/compression.py)
+        headers = {'Content-Disposition': f'attachment; filename=tasks.{export_format}'}
+
+        return Response(stream_with_context(body), mimetype=EXPORT_MIMETYPES[export_format], headers=headers)
 
 def init_app(api):
-    global ns, task_model, task_input_model
+    global ns, task_model, task_input_model, task_batch_input_model
     
     # Create a namespace for tasks with the correct path
     ns = api.namespace('tasks', description='Task operations', path='/api/tasks')
@@ -355,6 +1018,9 @@ def init_app(api):
     # Create a separate namespace for health check
     health_ns = api.namespace('health', description='Health check operations', path='/api/health')
 
+    # Create a separate namespace for Prometheus metrics
+    metrics_ns = api.namespace('metrics', description='Service metrics', path='/api/metrics')
+
     # Define models for Swagger documentation
     task_model = api.model('Task', {
         'id': fields.Integer(readonly=True, description='The task unique identifier'),
@@ -362,7 +1028,8 @@ def init_app(api):
         'description': fields.String(required=True, description='The task description'),
         'status': fields.String(description='The task status', enum=['pending', 'in_progress', 'completed']),
         'created_at': fields.DateTime(readonly=True, description='Task creation timestamp'),
-        'updated_at': fields.DateTime(readonly=True, description='Task last update timestamp')
+        'updated_at': fields.DateTime(readonly=True, description='Task last update timestamp'),
+        'version': fields.Integer(readonly=True, description='Incremented by every update; the ETag is "<id>.<version>"')
     })
 
     task_input_model = api.model('TaskInput', {
@@ -371,6 +1038,32 @@ def init_app(api):
         'status': fields.String(description='The task status', enum=['pending', 'in_progress', 'completed'])
     })
 
+    task_patch_model = api.model('TaskPatch', {
+        'title': fields.String(description='The task title'),
+        'description': fields.String(description='The task description'),
+        'status': fields.String(description='The task status', enum=['pending', 'in_progress', 'completed'])
+    })
+
+    task_update_model = api.model('TaskBatchUpdate', {
+        'id': fields.Integer(required=True, description='The task unique identifier'),
+        'title': fields.String(description='The task title'),
+        'description': fields.String(description='The task description'),
+        'status': fields.String(description='The task status', enum=['pending', 'in_progress', 'completed'])
+    })
+
+    task_batch_input_model = api.model('TaskBatchInput', {
+        'create': fields.List(fields.Nested(task_input_model), description='Tasks to create'),
+        'update': fields.List(fields.Nested(task_update_model), description='Partial task updates'),
+        'delete': fields.List(fields.Integer, description='Ids of tasks to delete')
+    })
+
+    task_stats_model = api.model('TaskStats', {
+        'pending': fields.Integer(description='Number of pending tasks'),
+        'in_progress': fields.Integer(description='Number of tasks in progress'),
+        'completed': fields.Integer(description='Number of completed tasks'),
+        'total': fields.Integer(description='Number of tasks in any status')
+    })
+
     # Add authorization documentation
     authorizations = {
         'Bearer Auth': {
@@ -387,13 +1080,79 @@ def init_app(api):
 
     # Register routes
     health_ns.add_resource(HealthCheck, '')
+    health_ns.add_resource(Liveness, '/live')
+    health_ns.add_resource(Readiness, '/ready')
+    metrics_ns.add_resource(Metrics, '')
     ns.add_resource(TaskList, '')
     ns.add_resource(Task, '/<int:task_id>')
+    ns.add_resource(TaskBatch, '/batch')
+    ns.add_resource(TaskStats, '/stats')
+    ns.add_resource(TaskExport, '/export')
     
     # Add Swagger documentation to HealthCheck
     health_ns.doc('health_check', security=None)(HealthCheck.get)
     health_ns.response(200, 'Service is healthy')(HealthCheck.get)
+
+    health_ns.doc('liveness_check', security=None)(Liveness.get)
+    health_ns.response(200, 'Service is alive')(Liveness.get)
+
+    health_ns.doc('readiness_check', security=None)(Readiness.get)
+    health_ns.response(200, 'Service is ready or degraded')(Readiness.get)
+    health_ns.response(503, 'Database is unreachable')(Readiness.get)
+
+    # Add Swagger documentation to Metrics
+    metrics_ns.doc('metrics', security=None)(Metrics.get)
+    metrics_ns.response(200, 'Metrics in the Prometheus text format')(Metrics.get)
     
+    # Filter, search and sort parameters shared by the list and export endpoints
+    filter_params = {
+        'status': {
+            'description': 'Only include tasks with this status',
+            'type': 'string',
+            'enum': list(TASK_STATUSES),
+            'in': 'query'
+        },
+        'created_after': {
+            'description': 'Only include tasks created at or after this ISO 8601 timestamp',
+            'type': 'string',
+            'in': 'query'
+        },
+        'created_before': {
+            'description': 'Only include tasks created before this ISO 8601 timestamp',
+            'type': 'string',
+            'in': 'query'
+        },
+        'updated_after': {
+            'description': 'Only include tasks updated at or after this ISO 8601 timestamp',
+            'type': 'string',
+            'in': 'query'
+        },
+        'updated_before': {
+            'description': 'Only include tasks updated before this ISO 8601 timestamp',
+            'type': 'string',
+            'in': 'query'
+        },
+        'q': {
+            'description': 'Full-text search over title and description; every word must match as a prefix',
+            'type': 'string',
+            'in': 'query'
+        },
+        'sort': {
+            'description': 'Field to sort by',
+            'type': 'string',
+            'enum': list(TASK_SORT_FIELDS),
+            'default': 'created_at',
+            'in': 'query'
+        },
+        'order': {
+            'description': 'Sort direction',
+            'type': 'string',
+            'enum': ['asc', 'desc'],
+            'default': 'desc',
+            'in': 'query'
+        }
+    }
+
     # Add Swagger documentation to TaskList
     ns.doc('list_tasks', 
         security='Bearer Auth',
@@ -409,12 +1168,26 @@ def init_app(api):
                 'type': 'integer',
                 'default': 10,
                 'in': 'query'
-            }
+            },
+            'cursor': {
+                'description': 'Opaque cursor from pagination.next_cursor; pass an empty value to start cursor pagination',
+                'type': 'string',
+                'in': 'query'
+            },
+            'include_total': {
+                'description': 'Include the total task count in cursor mode',
+                'type': 'boolean',
+                'default': False,
+                'in': 'query'
+            },
+            **filter_params
         }
     )(TaskList.get)
     ns.response(200, 'Success', task_model)(TaskList.get)
+    ns.response(304, 'Not Modified')(TaskList.get)
     ns.response(400, 'Bad Request')(TaskList.get)
     ns.response(401, 'Unauthorized')(TaskList.get)
+    ns.response(429, 'Too Many Requests')(TaskList.get)
     ns.response(500, 'Internal Server Error')(TaskList.get)
     
     ns.doc('create_task', security='Bearer Auth')(TaskList.post)
@@ -424,17 +1197,80 @@ def init_app(api):
     ns.response(401, 'Unauthorized')(TaskList.post)
     ns.response(500, 'Internal Server Error')(TaskList.post)
     
+    # Optimistic concurrency header accepted by task writes
+    if_match_param = {
+        'If-Match': {
+            'description': 'Only apply the change if the task still has this (strong) ETag',
+            'type': 'string',
+            'in': 'header'
+        }
+    }
+
     # Add Swagger documentation to Task
-    ns.doc('update_task', security='Bearer Auth')(Task.put)
+    ns.doc('get_task', security='Bearer Auth')(Task.get)
+    ns.response(200, 'Success', task_model)(Task.get)
+    ns.response(304, 'Not Modified')(Task.get)
+    ns.response(401, 'Unauthorized')(Task.get)
+    ns.response(404, 'Task not found')(Task.get)
+    ns.response(500, 'Internal Server Error')(Task.get)
+    
+    ns.doc('update_task', security='Bearer Auth', params=if_match_param)(Task.put)
     ns.expect(task_input_model)(Task.put)
     ns.response(200, 'Task updated successfully', task_model)(Task.put)
     ns.response(400, 'Bad Request')(Task.put)
     ns.response(401, 'Unauthorized')(Task.put)
     ns.response(404, 'Task not found')(Task.put)
+    ns.response(412, 'Task changed since the If-Match ETag')(Task.put)
     ns.response(500, 'Internal Server Error')(Task.put)
+
+    ns.doc('patch_task', security='Bearer Auth', params=if_match_param)(Task.patch)
+    ns.expect(task_patch_model)(Task.patch)
+    ns.response(200, 'Task updated successfully', task_model)(Task.patch)
+    ns.response(400, 'Bad Request')(Task.patch)
+    ns.response(401, 'Unauthorized')(Task.patch)
+    ns.response(404, 'Task not found')(Task.patch)
+    ns.response(412, 'Task changed since the If-Match ETag')(Task.patch)
+    ns.response(500, 'Internal Server Error')(Task.patch)
     
-    ns.doc('delete_task', security='Bearer Auth')(Task.delete)
+    ns.doc('delete_task', security='Bearer Auth', params=if_match_param)(Task.delete)
     ns.response(200, 'Task deleted successfully')(Task.delete)
     ns.response(401, 'Unauthorized')(Task.delete)
     ns.response(404, 'Task not found')(Task.delete)
+    ns.response(412, 'Task changed since the If-Match ETag')(Task.delete)
     ns.response(500, 'Internal Server Error')(Task.delete)
+
+    ns.doc('task_stats', security='Bearer Auth')(TaskStats.get)
+    ns.response(200, 'Task counts by status', task_stats_model)(TaskStats.get)
+    ns.response(401, 'Unauthorized')(TaskStats.get)
+    ns.response(500, 'Internal Server Error')(TaskStats.get)
+
+    ns.doc('batch_tasks', security='Bearer Auth')(TaskBatch.post)
+    ns.expect(task_batch_input_model)(TaskBatch.post)
+    ns.response(200, 'Batch processed')(TaskBatch.post)
+    ns.response(400, 'Bad Request')(TaskBatch.post)
+    ns.response(401, 'Unauthorized')(TaskBatch.post)
+    ns.response(413, 'Batch too large')(TaskBatch.post)
+    ns.response(500, 'Internal Server Error')(TaskBatch.post)
+
+    ns.doc('export_tasks',
+        security='Bearer Auth',
+        params={
+            'format': {
+                'description': 'Export format',
+                'type': 'string',
+                'enum': ['ndjson', 'csv'],
+                'default': 'ndjson',
+                'in': 'query'
+            },
+            **filter_params
+        }
+    )(TaskExport.get)
+    ns.response(200, 'Task export stream')(TaskExport.get)
+    ns.response(400, 'Bad Request')(TaskExport.get)
+    ns.response(401, 'Unauthorized')(TaskExport.get)
+
+    if task_write_queue is not None and get_db_backend().name == 'sqlitecloud':
+        # Updates and deletes cannot be merged, and one round trip after
+        # another inside a group commit is slower than committing them directly
+        task_write_queue.inserts_only = True
+        logger.info("TASK_GROUP_COMMIT on SQLite Cloud: only task creates are group committed")
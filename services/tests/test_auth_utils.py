@@ -0,0 +1,101 @@
+import unittest
+import datetime
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import jwt
+from services.utils import auth_utils
+from services.utils.auth_utils import TokenCache, PasswordHasher, password_hash_method, token_digest
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = TokenCache(max_size=2, max_ttl=60, clock=lambda: self.now)
+
+    def test_entries_expire_at_token_exp(self):
+        """Test that a cached token is never accepted past its exp claim"""
+        self.cache.put(b'a', {'user_id': 1, 'exp': 1010})
+        self.assertEqual(self.cache.get(b'a'), {'user_id': 1, 'exp': 1010})
+        self.now = 1010.0
+        self.assertIsNone(self.cache.get(b'a'))
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_lru_eviction_and_counters(self):
+        """Test that the least recently used token is evicted first"""
+        self.cache.put(b'a', {'user_id': 1, 'exp': 2000})
+        self.cache.put(b'b', {'user_id': 2, 'exp': 2000})
+        self.cache.get(b'a')
+        self.cache.put(b'c', {'user_id': 3, 'exp': 2000})
+        self.assertIsNone(self.cache.get(b'b'))
+        self.assertIsNotNone(self.cache.get(b'a'))
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 1, 1))
+
+class TestVerifyToken(unittest.TestCase):
+    def setUp(self):
+        self.previous_key = auth_utils.SECRET_KEY
+        auth_utils.SECRET_KEY = 'test-secret-key-for-the-auth-utils-suite'
+        auth_utils.token_cache.clear()
+
+    def tearDown(self):
+        auth_utils.SECRET_KEY = self.previous_key
+        auth_utils.set_revocation_check(None)
+        auth_utils.token_cache.clear()
+
+    def test_verified_tokens_are_cached(self):
+        """Test that the second verification is served from the cache"""
+        token = auth_utils.generate_token(9)
+        hits = auth_utils.token_cache.hits
+        self.assertEqual(auth_utils.verify_token(token), 9)
+        self.assertEqual(auth_utils.verify_token(token), 9)
+        self.assertEqual(auth_utils.token_cache.hits, hits + 1)
+
+    def test_expired_tokens_are_rejected(self):
+        """Test that expired tokens are neither accepted nor cached"""
+        token = jwt.encode(
+            {'user_id': 7, 'exp': datetime.datetime.utcnow() - datetime.timedelta(seconds=1)},
+            auth_utils.SECRET_KEY, algorithm='HS256'
+        )
+        self.assertIsNone(auth_utils.verify_token(token))
+        self.assertIsNone(auth_utils.token_cache.get(token_digest(token)))
+
+    def test_revoked_tokens_are_rejected(self):
+        """Test the denylist and the revocation hook on cached tokens"""
+        token = auth_utils.generate_token(7)
+        self.assertEqual(auth_utils.verify_token(token), 7)
+        auth_utils.revoke_token(token)
+        self.assertIsNone(auth_utils.verify_token(token))
+
+        other = auth_utils.generate_token(8)
+        self.assertEqual(auth_utils.verify_token(other), 8)
+        auth_utils.set_revocation_check(lambda payload: payload['user_id'] == 8)
+        self.assertIsNone(auth_utils.verify_token(other))
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_method_from_algorithm_and_cost(self):
+        """Test building werkzeug method strings from the configured cost"""
+        self.assertEqual(password_hash_method('pbkdf2', 600000), 'pbkdf2:sha256:600000')
+        self.assertEqual(password_hash_method('scrypt', 16384), 'scrypt:16384:8:1')
+
+    def test_hash_and_verify_in_worker_pool(self):
+        """Test hashing and verifying through worker processes"""
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+        try:
+            stored = hasher.hash('secret123')
+            self.assertTrue(hasher.verify(stored, 'secret123'))
+            self.assertFalse(hasher.verify(stored, 'wrong'))
+        finally:
+            hasher.shutdown()
+
+    def test_needs_rehash_when_parameters_change(self):
+        """Test that hashes made with other parameters are flagged for rehash"""
+        old = PasswordHasher(method='pbkdf2:sha256:1000').hash('secret123')
+        current = PasswordHasher(method='pbkdf2:sha256:2000')
+        self.assertTrue(current.needs_rehash(old))
+        self.assertFalse(current.needs_rehash(current.hash('secret123')))
+
+if __name__ == '__main__':
+    unittest.main()
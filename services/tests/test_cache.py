@@ -0,0 +1,50 @@
+import unittest
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.cache import LocalLRUCache, TaskListCache
+
+class TestLocalLRUCache(unittest.TestCase):
+    def test_lru_eviction_and_ttl(self):
+        """Test size-bounded eviction and per-entry expiry"""
+        now = [0.0]
+        cache = LocalLRUCache(max_size=2, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=5)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('d', 4, ttl=5)
+        now[0] = 5.0
+        self.assertIsNone(cache.get('d'))
+
+class TestTaskListCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = TaskListCache(LocalLRUCache(max_size=100))
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return {'tasks': self.loads}
+
+    def test_read_through_and_hit_ratio(self):
+        """Test that repeated reads are served from the cache"""
+        first = self.cache.get_or_load(1, 7, 'page:1:10', self.load)
+        second = self.cache.get_or_load(1, 7, 'page:1:10', self.load)
+        self.assertIs(first, second)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.cache.stats()['hit_ratio'], 0.5)
+
+    def test_new_revision_misses_only_for_that_user(self):
+        """Test that a write for one user does not evict another user's pages"""
+        self.cache.get_or_load(1, 1, 'page:1:10', self.load)
+        self.cache.get_or_load(2, 1, 'page:1:10', self.load)
+        self.assertEqual(self.cache.get_or_load(1, 2, 'page:1:10', self.load), {'tasks': 3})
+        self.assertEqual(self.cache.get_or_load(2, 1, 'page:1:10', self.load), {'tasks': 2})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import gzip
+import json
+import os
+import sys
+import zlib
+from flask import Flask, Response, jsonify, request
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils import compression
+from services.utils.compression import GzipEncoder, ResponseCompressor, load_encoders
+
+class DeflateEncoder:
+    """Stand-in for an optional encoder, so negotiation can be tested without brotli/zstd"""
+    name = 'br'
+
+    def compressor(self):
+        compressor = zlib.compressobj()
+        return compressor.compress, compressor.flush
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        """Build a small app with a large, a small, a streamed and a binary response"""
+        app = Flask(__name__)
+        self.payload = {'tasks': [{'id': i, 'description': 'A long task description ' * 4} for i in range(50)]}
+
+        @app.route('/large')
+        def large():
+            response = jsonify(self.payload)
+            response.set_etag('abc')
+            return response
+
+        @app.route('/small')
+        def small():
+            return jsonify({'status': 'ok'})
+
+        @app.route('/stream')
+        def stream():
+            return Response((json.dumps({'id': i}) + '\n' for i in range(500)), mimetype='application/x-ndjson')
+
+        @app.route('/binary')
+        def binary():
+            return Response(b'\x89PNG' * 1000, mimetype='image/png')
+
+        @app.route('/encoded')
+        def encoded():
+            return Response(gzip.compress(b'x' * 5000), mimetype='application/json',
+                            headers={'Content-Encoding': 'gzip'})
+
+        compression.init_app(app, ResponseCompressor([GzipEncoder(level=6)], min_size=1024))
+        self.app = app
+        self.client = app.test_client()
+
+    def test_large_response_is_compressed(self):
+        """Test JSON above the threshold is gzipped under an ETag of its own"""
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(response.headers['ETag'], '"abc-gzip"')
+        body = response.get_data()
+        self.assertEqual(int(response.headers['Content-Length']), len(body))
+        self.assertEqual(json.loads(gzip.decompress(body)), self.payload)
+
+    def test_skipped_responses(self):
+        """Test small, binary, already encoded and non-accepting requests are left alone"""
+        for path, headers in (('/small', {'Accept-Encoding': 'gzip'}), ('/binary', {'Accept-Encoding': 'gzip'}),
+                              ('/large', {}), ('/large', {'Accept-Encoding': 'gzip;q=0'})):
+            response = self.client.get(path, headers=headers)
+            self.assertNotIn('Content-Encoding', response.headers, path)
+
+        response = self.client.get('/encoded', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(response.get_data()), b'x' * 5000)
+
+        response = self.client.get('/large', headers={'Accept-Encoding': 'identity'})
+        self.assertEqual(json.loads(response.get_data()), self.payload)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+    def test_streamed_response_is_compressed(self):
+        """Test generator bodies are compressed incrementally without a Content-Length"""
+        response = self.client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 500)
+        self.assertEqual(json.loads(lines[-1]), {'id': 499})
+
+    def test_negotiation(self):
+        """Test client quality values win and ties go to server preference"""
+        compressor = ResponseCompressor([DeflateEncoder(), GzipEncoder()])
+        with self.app.test_request_context(headers={'Accept-Encoding': 'gzip, br'}):
+            self.assertEqual(compressor.negotiate(request.accept_encodings).name, 'br')
+        with self.app.test_request_context(headers={'Accept-Encoding': 'gzip;q=1.0, br;q=0.5'}):
+            self.assertEqual(compressor.negotiate(request.accept_encodings).name, 'gzip')
+        with self.app.test_request_context(headers={'Accept-Encoding': '*'}):
+            self.assertEqual(compressor.negotiate(request.accept_encodings).name, 'br')
+        with self.app.test_request_context(headers={'Accept-Encoding': 'identity'}):
+            self.assertIsNone(compressor.negotiate(request.accept_encodings))
+
+    def test_load_encoders(self):
+        """Test gzip is always available, missing libraries are skipped and typos rejected"""
+        names = [encoder.name for encoder in load_encoders('zstd,br,gzip')]
+        self.assertEqual(names[-1], 'gzip')
+        self.assertEqual(load_encoders(''), [])
+        with self.assertRaises(ValueError):
+            load_encoders('gzip,lzma')
+
+if __name__ == '__main__':
+    unittest.main()
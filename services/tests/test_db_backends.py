@@ -0,0 +1,43 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.db_backends import get_backend, SQLiteBackend, SQLiteCloudBackend
+
+class TestDatabaseBackends(unittest.TestCase):
+    def test_backend_chosen_by_scheme(self):
+        """Test that the URL scheme selects the backend"""
+        self.assertIsInstance(get_backend('sqlite:///tasks.db'), SQLiteBackend)
+        self.assertIsInstance(get_backend('sqlitecloud://host:8860/db?apikey=x'), SQLiteCloudBackend)
+        with self.assertRaises(ValueError):
+            get_backend('postgres://localhost/tasks')
+
+    def test_sqlite_file_uses_wal_and_tuned_pragmas(self):
+        """Test that file databases are opened in WAL mode with the tuned pragmas"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            backend = get_backend(f"sqlite:///{os.path.join(tmpdir, 'tasks.db')}?cache_size=-2000")
+            conn = backend.connect()
+            try:
+                self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+                self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+                self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -2000)
+            finally:
+                conn.close()
+
+    def test_memory_database_is_shared_between_connections(self):
+        """Test that pooled connections to sqlite://:memory: see the same data"""
+        backend = get_backend('sqlite://:memory:')
+        first, second = backend.connect(), backend.connect()
+        try:
+            backend.executescript(first, "CREATE TABLE t (x INTEGER); INSERT INTO t VALUES (1);")
+            self.assertEqual(second.execute("SELECT x FROM t").fetchone()[0], 1)
+        finally:
+            first.close()
+            second.close()
+
+if __name__ == '__main__':
+    unittest.main()
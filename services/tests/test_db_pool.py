@@ -0,0 +1,105 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.db_utils import ConnectionPool, PoolTimeout, close_connection, local_sqlite_connector
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        """Create a small pool backed by in-memory SQLite"""
+        self.pool = ConnectionPool(local_sqlite_connector(), min_size=1, max_size=2, timeout=0.2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_connections_are_reused(self):
+        """Test that a released connection is handed out again"""
+        with self.pool.connection() as conn:
+            first = conn
+        with self.pool.connection() as conn:
+            self.assertIs(conn, first)
+        self.assertEqual(self.pool.stats()['created'], 1)
+
+    def test_close_returns_to_pool(self):
+        """Test that closing a checked-out connection does not close it"""
+        conn = self.pool.checkout()
+        raw = conn.raw
+        conn.close()
+        self.assertEqual(self.pool.stats()['in_use'], 0)
+        self.assertEqual(raw.execute("SELECT 1").fetchone()[0], 1)
+
+    def test_max_size_and_timeout(self):
+        """Test that checkouts block at max_size and time out"""
+        a = self.pool.acquire()
+        b = self.pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire(timeout=0.05)
+        stats = self.pool.stats()
+        self.assertEqual(stats['in_use'], 2)
+        self.assertEqual(stats['timeouts'], 1)
+        self.pool.release(a)
+        self.pool.release(b)
+
+    def test_waiter_is_woken_on_release(self):
+        """Test that a blocked checkout gets the next released connection"""
+        a = self.pool.acquire()
+        b = self.pool.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(self.pool.acquire(timeout=1)))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(self.pool.stats()['waiters'], 1)
+        self.pool.release(a)
+        waiter.join()
+        self.assertIs(got[0], a)
+        self.pool.release(a)
+        self.pool.release(b)
+
+    def test_failed_health_check_replaces_connection(self):
+        """Test that a dead idle connection is dropped on checkout"""
+        pool = ConnectionPool(local_sqlite_connector(), min_size=1, max_size=1, health_check_after=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.close()
+        with pool.connection() as fresh:
+            self.assertIsNot(fresh, conn)
+        self.assertEqual(pool.stats()['failed_health_checks'], 1)
+        pool.close()
+
+    def test_idle_eviction_keeps_min_size(self):
+        """Test that idle connections above min_size are evicted"""
+        pool = ConnectionPool(local_sqlite_connector(), min_size=1, max_size=3, max_idle=0)
+        conns = [pool.acquire() for _ in range(3)]
+        for conn in conns:
+            pool.release(conn)
+        time.sleep(0.01)
+        with pool.connection():
+            pass
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['evicted'], 2)
+        pool.close()
+
+    def test_close_connection_discards_after_connection_error(self):
+        """Test that a connection that raised a connection error is not handed out again"""
+        conn = self.pool.checkout()
+        raw = conn.raw
+        close_connection(conn, ConnectionError("socket closed"))
+        self.assertEqual(self.pool.stats()['closed'], 1)
+        with self.pool.connection() as fresh:
+            self.assertIsNot(fresh, raw)
+
+        # Other errors leave the connection in the pool
+        conn = self.pool.checkout()
+        raw = conn.raw
+        close_connection(conn, ValueError("bad input"))
+        with self.pool.connection() as same:
+            self.assertIs(same, raw)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.filters import InvalidFilter, filter_cache_key, parse_task_filters, search_expression, task_conditions
+
+class TestTaskFilters(unittest.TestCase):
+    def test_search_expression_is_escaped(self):
+        """Test user input is reduced to quoted prefix terms"""
+        self.assertEqual(search_expression('quarterly report'), '"quarterly"* "report"*')
+        self.assertEqual(search_expression('title:x OR "y" NEAR(z)'), '"title"* "x"* "OR"* "y"* "NEAR"* "z"*')
+        self.assertIsNone(search_expression('  -*"  '))
+
+    def test_parse_and_build_conditions(self):
+        """Test parsed filters become one parameterized WHERE clause"""
+        filters = parse_task_filters({'status': 'pending', 'created_after': '2024-01-01T00:00:00Z', 'q': 'report'})
+        self.assertEqual(filters['sort'], 'created_at')
+        self.assertEqual(filters['order'], 'desc')
+        where, params = task_conditions(3, filters)
+        self.assertEqual(where.count('?'), len(params))
+        self.assertEqual(params, [3, 'pending', '2024-01-01 00:00:00', '"report"*'])
+        self.assertEqual(filter_cache_key(filters), filter_cache_key(dict(reversed(list(filters.items())))))
+
+    def test_invalid_filters(self):
+        """Test bad values raise InvalidFilter with a client message"""
+        for args in ({'status': 'archived'}, {'sort': 'password'}, {'order': 'up'}, {'created_before': 'soon'}):
+            with self.assertRaises(InvalidFilter):
+                parse_task_filters(args)
+
+if __name__ == '__main__':
+    unittest.main()
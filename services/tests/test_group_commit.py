@@ -0,0 +1,132 @@
+import unittest
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.db_utils import configure_database, get_db_connection
+from services.utils.group_commit import GroupCommitQueue, group_commit_statements, insert_shape
+
+class TestGroupCommit(unittest.TestCase):
+    def setUp(self):
+        """Create a database with a small table and count connection checkouts"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        configure_database(f"sqlite:///{os.path.join(self.tmpdir.name, 'writes.db')}")
+        conn = get_db_connection()
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+        conn.close()
+        self.commits = 0
+
+        def connect():
+            self.commits += 1
+            return get_db_connection()
+        self.connect = connect
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_concurrently(self, queue, names):
+        """Insert every name from its own thread; return {name: row or exception}"""
+        results = {}
+        barrier = threading.Barrier(len(names))
+
+        def insert(name):
+            barrier.wait()
+            try:
+                results[name] = queue.execute(
+                    "INSERT INTO items (name) VALUES (?) RETURNING id, name", (name,)
+                )
+            except Exception as e:
+                results[name] = e
+
+        threads = [threading.Thread(target=insert, args=(name,)) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_writes_share_commits(self):
+        """Test each caller gets its own RETURNING row from fewer transactions"""
+        queue = GroupCommitQueue(window=0.05, max_batch=8, connect=self.connect)
+        names = [f'item-{i}' for i in range(16)]
+        results = self.run_concurrently(queue, names)
+        for name in names:
+            self.assertEqual(results[name][1], name)
+        self.assertEqual(len({row[0] for row in results.values()}), 16)
+        self.assertLess(self.commits, 16)
+
+        conn = get_db_connection()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 16)
+        conn.close()
+
+    def test_inserts_are_merged(self):
+        """Test same-statement inserts of a batch run as one multi-row INSERT"""
+        queue = GroupCommitQueue(window=0.05, max_batch=8, connect=self.connect)
+        statements_before = group_commit_statements.sum()
+        results = self.run_concurrently(queue, [f'merged-{i}' for i in range(8)])
+        self.assertTrue(all(row[1] == name for name, row in results.items()))
+        self.assertEqual(self.commits, 1)
+        self.assertEqual(group_commit_statements.sum() - statements_before, 1)
+
+    def test_insert_shape(self):
+        """Test only plain single-row inserts are considered for merging"""
+        self.assertEqual(
+            insert_shape("INSERT INTO items (name) VALUES (lower(?)) RETURNING id"),
+            ('INSERT INTO items (name) VALUES ', '(lower(?))', 'id')
+        )
+        for query in ("INSERT OR IGNORE INTO items (name) VALUES (?)",
+                      "INSERT INTO items (name) VALUES (?) ON CONFLICT DO NOTHING",
+                      "INSERT INTO items (name) VALUES (?), (?)",
+                      "UPDATE items SET name = ?"):
+            self.assertIsNone(insert_shape(query))
+
+    def test_inserts_only_accepts_single_row_inserts(self):
+        """Test an inserts-only queue turns away statements it cannot merge"""
+        queue = GroupCommitQueue(inserts_only=True)
+        self.assertTrue(queue.accepts("INSERT INTO items (name) VALUES (?) RETURNING id"))
+        self.assertFalse(queue.accepts("UPDATE items SET name = ? WHERE id = ?"))
+        self.assertFalse(queue.accepts("DELETE FROM items WHERE id = ?"))
+        self.assertTrue(GroupCommitQueue().accepts("DELETE FROM items WHERE id = ?"))
+
+    def test_failed_write_only_fails_its_caller(self):
+        """Test a constraint violation is raised to its caller while the batch commits"""
+        queue = GroupCommitQueue(window=0.05, max_batch=8, connect=self.connect)
+        queue.execute("INSERT INTO items (name) VALUES (?)", ('taken',))
+        results = self.run_concurrently(queue, ['taken', 'free-1', 'free-2'])
+        self.assertIsInstance(results['taken'], sqlite3.IntegrityError)
+        self.assertEqual(results['free-1'][1], 'free-1')
+        self.assertEqual(results['free-2'][1], 'free-2')
+
+    def test_rowcount_and_max_batch(self):
+        """Test rowcount results and that a full batch commits without waiting out the window"""
+        queue = GroupCommitQueue(window=30, max_batch=1, connect=self.connect)
+        queue.execute("INSERT INTO items (name) VALUES (?)", ('a',))
+        self.assertEqual(queue.execute("DELETE FROM items WHERE name = ?", ('a',), rowcount=True), 1)
+        self.assertEqual(queue.execute("DELETE FROM items WHERE name = ?", ('a',), rowcount=True), 0)
+
+    def test_commit_failure_fails_the_batch(self):
+        """Test every caller sees the error when the transaction cannot run"""
+        def broken():
+            raise ConnectionError('database unavailable')
+        queue = GroupCommitQueue(window=0.01, max_batch=8, connect=broken)
+        results = self.run_concurrently(queue, ['x', 'y'])
+        self.assertIsInstance(results['x'], ConnectionError)
+        self.assertIsInstance(results['y'], ConnectionError)
+
+    def test_leader_failure_releases_the_batch(self):
+        """Test callers waiting on a batch get the error when its leader fails outside the commit"""
+        class FailingQueue(GroupCommitQueue):
+            def _commit(self, writes):
+                raise RuntimeError('leader interrupted')
+        queue = FailingQueue(window=0.05, max_batch=8, connect=self.connect)
+        results = self.run_concurrently(queue, ['x', 'y', 'z'])
+        for name in ('x', 'y', 'z'):
+            self.assertIsInstance(results[name], RuntimeError)
+
+if __name__ == '__main__':
+    unittest.main()
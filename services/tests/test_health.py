@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.db_utils import ConnectionPool, local_sqlite_connector
+from services.utils import health
+from services.utils.health import DEGRADED, DOWN, OK, ReadinessProbe, probe_database
+
+class TestReadinessProbe(unittest.TestCase):
+    def setUp(self):
+        self.now = [0.0]
+        self.calls = 0
+        self.state = OK
+
+    def check(self):
+        self.calls += 1
+        return {'state': self.state}
+
+    def test_result_cached_for_ttl(self):
+        """Test checks run at most once per TTL"""
+        probe = ReadinessProbe({'database': self.check}, ttl=2, clock=lambda: self.now[0])
+        result, cached = probe.result()
+        self.assertEqual(result['state'], OK)
+        self.assertFalse(cached)
+        self.assertTrue(probe.result()[1])
+        self.assertEqual(self.calls, 1)
+
+        self.state = DOWN
+        self.now[0] = 2.0
+        result, cached = probe.result()
+        self.assertEqual(result['state'], DOWN)
+        self.assertFalse(cached)
+        self.assertEqual(self.calls, 2)
+
+    def test_worst_state_wins(self):
+        """Test one degraded check degrades the whole result"""
+        probe = ReadinessProbe({'database': self.check, 'cache': lambda: {'state': DEGRADED}})
+        self.assertEqual(probe.result()[0]['state'], DEGRADED)
+
+class TestProbeDatabase(unittest.TestCase):
+    def test_reports_latency_and_saturation(self):
+        """Test a healthy pool reports ok and an exhausted one degraded"""
+        pool = ConnectionPool(local_sqlite_connector(), max_size=2)
+        self.addCleanup(pool.close)
+        result = probe_database(pool)
+        self.assertEqual(result['state'], OK)
+        self.assertIn('latency_ms', result)
+        self.assertEqual(result['pool']['max_size'], 2)
+
+        held = pool.checkout()
+        try:
+            result = probe_database(pool, degraded_saturation=0.5)
+            self.assertEqual(result['state'], DEGRADED)
+            self.assertIn('connection pool saturated', result['reasons'])
+        finally:
+            held.close()
+
+    def test_unreachable_database_is_down(self):
+        """Test a failing connect reports down instead of raising"""
+        def connect():
+            raise ConnectionError('database unreachable')
+        pool = ConnectionPool(connect, min_size=0)
+        self.addCleanup(pool.close)
+        result = probe_database(pool)
+        self.assertEqual(result['state'], DOWN)
+        self.assertIn('unreachable', result['error'])
+
+    def test_exhausted_pool_is_degraded(self):
+        """Test a pool with no free connection reports degraded, not down"""
+        pool = ConnectionPool(local_sqlite_connector(), max_size=1)
+        self.addCleanup(pool.close)
+        held = pool.checkout()
+        try:
+            result = probe_database(pool, timeout=0.01)
+        finally:
+            held.close()
+        self.assertEqual(result['state'], DEGRADED)
+        self.assertEqual(result['reasons'], ['connection pool exhausted'])
+        self.assertEqual(result['pool']['in_use'], 1)
+
+    def test_configuration_error_is_down(self):
+        """Test a pool that cannot be created reports down instead of raising"""
+        def get_pool():
+            raise ValueError('Unsupported database URL')
+        previous = health.get_pool
+        health.get_pool = get_pool
+        try:
+            result = probe_database()
+        finally:
+            health.get_pool = previous
+        self.assertEqual(result['state'], DOWN)
+        self.assertIn('Unsupported', result['error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import json
+import os
+import pickle
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.json_encoder import RowSet, StdlibBackend, load_backend
+
+COLUMNS = ['id', 'title', 'description', 'status']
+ROWS = [
+    (1, 'Plain', 'ascii only', 'pending'),
+    (2, 'Quote " and \\ backslash', 'line\nbreak', 'completed'),
+    (3, 'Ünïcödé ✓', None, 'in_progress'),
+    (4, 'Float id mixed into text', 2.5, 'pending'),
+]
+
+def available_backends():
+    backends = [StdlibBackend()]
+    for name in ('ujson', 'orjson'):
+        try:
+            backends.append(load_backend(name))
+        except ImportError:
+            pass
+    return backends
+
+class TestJSONEncoder(unittest.TestCase):
+    def test_rowset_matches_dict_encoding(self):
+        """Test every backend renders rows exactly like per-row dicts"""
+        expected = {'status': 'success', 'data': {'tasks': [dict(zip(COLUMNS, row)) for row in ROWS], 'n': None}}
+        for backend in available_backends():
+            with self.subTest(backend=backend.name):
+                payload = {'status': 'success', 'data': {'tasks': RowSet(COLUMNS, ROWS), 'n': None}}
+                self.assertEqual(json.loads(backend.dumps(payload)), expected)
+
+    def test_multiple_and_empty_rowsets(self):
+        """Test several RowSets in one payload are spliced in the right place"""
+        payload = {'a': RowSet(COLUMNS, ROWS[:1]), 'b': RowSet(COLUMNS, []), 'c': [RowSet(['x'], [(5,)])]}
+        decoded = json.loads(StdlibBackend().dumps(payload))
+        self.assertEqual(decoded['a'][0]['title'], 'Plain')
+        self.assertEqual(decoded['b'], [])
+        self.assertEqual(decoded['c'], [[{'x': 5}]])
+
+    def test_mixed_types_in_integer_column(self):
+        """Test floats and bools in a column sampled as integers are not truncated"""
+        rows = [(1, 'a'), (2.75, 'b'), (True, 'c'), (None, 'd')]
+        expected = [dict(zip(['id', 'title'], row)) for row in rows]
+        for backend in available_backends():
+            with self.subTest(backend=backend.name):
+                self.assertEqual(json.loads(backend.dumps(RowSet(['id', 'title'], rows))), expected)
+
+    def test_unknown_types_and_pickling(self):
+        """Test unsupported objects still fail and RowSets survive a shared cache"""
+        with self.assertRaises(TypeError):
+            StdlibBackend().dumps({'value': object()})
+        rowset = pickle.loads(pickle.dumps(RowSet(COLUMNS, ROWS)))
+        self.assertEqual(list(rowset)[0], dict(zip(COLUMNS, ROWS[0])))
+
+if __name__ == '__main__':
+    unittest.main()
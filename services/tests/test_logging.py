@@ -0,0 +1,68 @@
+import unittest
+import io
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.logging_utils import JsonFormatter, LazyQueueHandler, RequestContextFilter, request_id_var
+
+class TestStructuredLogging(unittest.TestCase):
+    def make_record(self, level=logging.INFO, msg='Task %s created', args=(7,), **extra):
+        record = logging.LogRecord('services.tasks', level, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_json_formatter(self):
+        """Test messages are rendered as JSON with extra fields and request id"""
+        record = self.make_record(user_id=3, request_id='abc')
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry['message'], 'Task 7 created')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'services.tasks')
+        self.assertEqual(entry['user_id'], 3)
+        self.assertEqual(entry['request_id'], 'abc')
+
+    def test_request_id_and_debug_sampling(self):
+        """Test records pick up the request id and DEBUG records are sampled"""
+        token = request_id_var.set('req-1')
+        try:
+            record = self.make_record()
+            self.assertTrue(RequestContextFilter(debug_sample_rate=0).filter(record))
+            self.assertEqual(record.request_id, 'req-1')
+        finally:
+            request_id_var.reset(token)
+
+        self.assertFalse(RequestContextFilter(debug_sample_rate=0).filter(self.make_record(logging.DEBUG)))
+        self.assertTrue(RequestContextFilter(debug_sample_rate=1).filter(self.make_record(logging.DEBUG)))
+
+    def test_queue_handler_is_lazy_and_drops_when_full(self):
+        """Test records are queued unformatted and dropped once the queue is full"""
+        handler = LazyQueueHandler(queue.Queue(maxsize=1))
+        record = self.make_record()
+        handler.handle(record)
+        handler.handle(self.make_record())
+        queued = handler.queue.get_nowait()
+        self.assertIs(queued, record)
+        self.assertEqual(queued.args, (7,))
+        self.assertEqual(handler.dropped, 1)
+
+    def test_writer_thread_output(self):
+        """Test a listener writes queued records as JSON lines"""
+        stream = io.StringIO()
+        writer = logging.StreamHandler(stream)
+        writer.setFormatter(JsonFormatter())
+        handler = LazyQueueHandler(queue.Queue())
+        listener = logging.handlers.QueueListener(handler.queue, writer)
+        listener.start()
+        handler.handle(self.make_record())
+        listener.stop()
+        self.assertEqual(json.loads(stream.getvalue())['message'], 'Task 7 created')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils import metrics
+from services.utils.metrics import MultiProcessStore, Registry, normalize_sql
+from werkzeug.routing import Rule
+
+class TestRegistry(unittest.TestCase):
+    def test_histogram_rendering(self):
+        """Test cumulative buckets, sum and count in the text format"""
+        registry = Registry()
+        histogram = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, '/a')
+        histogram.observe(0.5, '/a')
+        histogram.observe(2.0, '/a')
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE latency_seconds histogram', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_sum{route="/a"} 2.55', lines)
+        self.assertIn('latency_seconds_count{route="/a"} 3', lines)
+
+    def test_counter_and_callback_gauge(self):
+        """Test counters and gauges read at scrape time"""
+        registry = Registry()
+        counter = registry.counter('events_total', 'Events', ('kind',))
+        counter.inc('a')
+        counter.inc('a', amount=2)
+        registry.gauge('pool', 'Pool', ('state',), callback=lambda: {('idle',): 4})
+
+        output = registry.render()
+        self.assertIn('events_total{kind="a"} 3', output)
+        self.assertIn('# TYPE pool gauge', output)
+        self.assertIn('pool{state="idle"} 4', output)
+
+    def test_label_escaping(self):
+        """Test quotes and newlines are escaped in label values"""
+        registry = Registry()
+        registry.counter('queries_total', 'Queries', ('query',)).inc('SELECT "x"\nFROM t')
+        self.assertIn('queries_total{query="SELECT \\"x\\"\\nFROM t"} 1', registry.render())
+
+    def test_buffered_series_are_counted_when_read(self):
+        """Test observations buffered by a labels() series show up in the output"""
+        registry = Registry()
+        histogram = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        series = histogram.labels('/a')
+        series.observe(0.05)
+        series.observe(0.5)
+        self.assertEqual(histogram.count('/a'), 2)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', registry.render())
+        # Each label set has one series, however often it is looked up
+        self.assertIs(histogram.labels('/a'), series)
+
+    def test_flush_requests_folds_buffered_requests(self):
+        """Test buffered requests land in the request histograms, including new label sets"""
+        rule = Rule('/test/flush')
+        metrics._pending_requests.append((rule, 'POST', 201, 0.02, '300', 1200))
+        metrics._pending_requests.append((rule, 'POST', 201, 0.01, None, None))
+        metrics.flush_requests()
+        self.assertEqual(metrics.request_duration.count('POST', '/test/flush', '201'), 2)
+        self.assertEqual(metrics.request_size.sum('POST', '/test/flush'), 300)
+        self.assertEqual(metrics.response_size.count('POST', '/test/flush'), 1)
+
+class TestMultiProcessStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.alive = {1, 2}
+
+    def worker(self, pid, requests, in_use):
+        """Return a store for a fake worker process with some metrics recorded"""
+        registry = Registry()
+        registry.counter('requests_total', 'Requests').inc(amount=requests)
+        registry.histogram('latency_seconds', 'Latency', buckets=(1.0,)).observe(0.5)
+        registry.gauge('pool', 'Pool', ('state',), callback=lambda: {('in_use',): in_use})
+        store = MultiProcessStore(self.tmpdir.name, registry, is_alive=lambda pid: pid in self.alive)
+        store.save(pid)
+        return store
+
+    def test_render_sums_every_process(self):
+        """Test a scrape of one worker reports the totals of all workers"""
+        self.worker(1, requests=3, in_use=2)
+        store = self.worker(2, requests=4, in_use=1)
+        self.alive.add(os.getpid())
+        output = store.render()
+        # The rendering process saves itself as well
+        self.assertIn('requests_total 11', output)
+        self.assertIn('latency_seconds_bucket{le="1"} 3', output)
+        self.assertIn('pool{state="in_use"} 4', output)
+
+    def test_exited_processes_keep_counters_only(self):
+        """Test a recycled worker's counters survive and its gauges are dropped"""
+        self.worker(1, requests=3, in_use=2)
+        store = self.worker(2, requests=4, in_use=1)
+        self.alive = {2, os.getpid()}
+        for _ in range(2):
+            output = store.render()
+            self.assertIn('requests_total 11', output)
+            self.assertIn('pool{state="in_use"} 2', output)
+        self.assertNotIn('1.json', os.listdir(self.tmpdir.name))
+
+class TestNormalizeSql(unittest.TestCase):
+    def test_collapses_whitespace_and_placeholder_lists(self):
+        """Test batch statements with different sizes share one label"""
+        self.assertEqual(
+            normalize_sql('DELETE FROM tasks\n   WHERE id IN (?, ?, ?) AND user_id = ?'),
+            normalize_sql('DELETE FROM tasks WHERE id IN (?,?) AND user_id = ?')
+        )
+        self.assertEqual(normalize_sql('SELECT  1'), 'SELECT 1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.migrate_tasks import MIGRATIONS, run_migrations, applied_versions
+from db.rebuild_task_stats import count_drift, rebuild_task_counts
+from services.utils.db_backends import get_backend
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        """Open a fresh in-memory database"""
+        self.conn = get_backend('sqlite://:memory:').connect()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def explain(self, query, params):
+        rows = self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        return ' | '.join(row[-1] for row in rows)
+
+    def test_dry_run_applies_nothing(self):
+        """Test that a dry run reports every migration without applying any"""
+        pending = run_migrations(self.conn, dry_run=True)
+        self.assertEqual([m[0] for m in pending], [m[0] for m in MIGRATIONS])
+        self.assertEqual(applied_versions(self.conn), set())
+
+    def test_migrations_are_recorded_and_idempotent(self):
+        """Test that migrations run once and are tracked in schema_version"""
+        run_migrations(self.conn, target=2)
+        self.assertEqual(applied_versions(self.conn), {1, 2})
+        run_migrations(self.conn)
+        self.assertEqual(applied_versions(self.conn), {m[0] for m in MIGRATIONS})
+        self.assertEqual(run_migrations(self.conn), [])
+
+    def test_orphaned_tasks_are_assigned(self):
+        """Test that tasks without an owner are backfilled"""
+        run_migrations(self.conn, target=2)
+        self.conn.execute("INSERT INTO tasks (title, description) VALUES ('Old', 'Legacy row')")
+        run_migrations(self.conn)
+        row = self.conn.execute("SELECT user_id FROM tasks").fetchone()
+        self.assertIsNotNone(row[0])
+
+    def test_hot_queries_use_indexes(self):
+        """Test that the list and count queries are index searches, not table scans"""
+        run_migrations(self.conn)
+        plan = self.explain(
+            """
+            SELECT id, title, description, status, created_at, updated_at
+            FROM tasks
+            WHERE user_id = ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+            """,
+            (1, 10, 0)
+        )
+        self.assertIn('USING INDEX idx_tasks_user_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+        plan = self.explain(
+            """
+            SELECT id, title, description, status, created_at, updated_at
+            FROM tasks
+            WHERE user_id = ? AND (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """,
+            (1, '2024-01-01 00:00:00', 10, 10)
+        )
+        self.assertIn('USING INDEX idx_tasks_user_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+        plan = self.explain("SELECT COUNT(*) FROM tasks WHERE user_id = ?", (1,))
+        self.assertIn('SEARCH tasks USING COVERING INDEX', plan)
+
+    def test_filter_queries_use_indexes(self):
+        """Test that status filters and alternative sorts read an index in order"""
+        run_migrations(self.conn)
+        plan = self.explain(
+            "SELECT id, title FROM tasks WHERE user_id = ? AND status = ? ORDER BY created_at DESC, id DESC LIMIT 10",
+            (1, 'pending')
+        )
+        self.assertIn('USING INDEX idx_tasks_user_status_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+        for sort, index in (('updated_at', 'idx_tasks_user_updated'), ('title', 'idx_tasks_user_title')):
+            for direction in ('ASC', 'DESC'):
+                plan = self.explain(
+                    f"SELECT id, description FROM tasks WHERE user_id = ? ORDER BY {sort} {direction}, id {direction} LIMIT 10",
+                    (1,)
+                )
+                self.assertIn(f'USING INDEX {index}', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_search_index_is_backfilled_and_kept_in_sync(self):
+        """Test that existing tasks are indexed and triggers follow later writes"""
+        run_migrations(self.conn, target=5)
+        self.conn.execute("INSERT INTO users (username, password_hash) VALUES ('u', 'x')")
+        self.conn.execute("INSERT INTO tasks (user_id, title, description) VALUES (1, 'Legacy invoice', 'Old row')")
+        run_migrations(self.conn)
+
+        def search(term):
+            return self.conn.execute("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?", (term,)).fetchall()
+
+        self.assertEqual(search('invoice'), [(1,)])
+        self.conn.execute("UPDATE tasks SET title = 'Legacy receipt' WHERE id = 1")
+        self.assertEqual(search('invoice'), [])
+        self.assertEqual(search('receipt'), [(1,)])
+        self.conn.execute("DELETE FROM tasks WHERE id = 1")
+        self.assertEqual(search('receipt'), [])
+
+    def test_task_counts_follow_writes_and_rebuild(self):
+        """Test that counter triggers track writes and a rebuild repairs drift"""
+        run_migrations(self.conn, target=6)
+        self.conn.execute("INSERT INTO users (username, password_hash) VALUES ('u', 'x')")
+        self.conn.execute("INSERT INTO tasks (user_id, title, description) VALUES (1, 'Existing', 'Backfilled')")
+        run_migrations(self.conn)
+
+        def counts():
+            return dict(self.conn.execute("SELECT status, count FROM task_counts WHERE user_id = 1").fetchall())
+
+        self.assertEqual(counts(), {'pending': 1})
+        self.conn.execute("INSERT INTO tasks (user_id, title, description) VALUES (1, 'New', 'Row')")
+        self.conn.execute("UPDATE tasks SET status = 'completed' WHERE id = 1")
+        self.assertEqual(counts(), {'pending': 1, 'completed': 1})
+        self.conn.execute("DELETE FROM tasks WHERE id = 2")
+        self.assertEqual(counts(), {'pending': 0, 'completed': 1})
+
+        self.conn.execute("UPDATE task_counts SET count = 5 WHERE status = 'completed'")
+        self.assertEqual(count_drift(self.conn), [(1, 'completed', 5, 1)])
+        rebuild_task_counts(self.conn, user_id=1)
+        self.assertEqual(count_drift(self.conn), [])
+        self.assertEqual(counts(), {'completed': 1})
+
+    def test_task_revisions_follow_writes(self):
+        """Test that every insert, update and delete moves the owners' revisions"""
+        run_migrations(self.conn)
+        self.conn.execute("INSERT INTO users (username, password_hash) VALUES ('a', 'x'), ('b', 'x')")
+
+        def revisions():
+            return dict(self.conn.execute("SELECT user_id, revision FROM task_revisions").fetchall())
+
+        self.conn.execute("INSERT INTO tasks (user_id, title, description) VALUES (1, 'First', 'Row')")
+        self.conn.execute("UPDATE tasks SET title = 'Renamed' WHERE id = 1")
+        self.assertEqual(revisions(), {1: 2})
+        self.conn.execute("UPDATE tasks SET user_id = 2 WHERE id = 1")
+        self.assertEqual(revisions(), {1: 3, 2: 1})
+        self.conn.execute("DELETE FROM tasks WHERE id = 1")
+        self.assertEqual(revisions(), {1: 3, 2: 2})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+import os
+import sys
+from flask import Flask
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import app as app_module
+from services.users import login_key, register_limit
+from services.utils import rate_limit as rate_limit_module
+from services.utils.rate_limit import (
+    SLIDING_WINDOW, MemoryRateLimitBackend, RateLimit, RateLimitBackend, ip_key, rate_limit, rate_limiter,
+    set_rate_limit_backend
+)
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class BrokenBackend(RateLimitBackend):
+    def token_bucket(self, key, capacity, rate, cost=1):
+        raise ConnectionError('store unavailable')
+
+    def sliding_window(self, key, limit, window, cost=1):
+        raise ConnectionError('store unavailable')
+
+class TestRateLimit(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = MemoryRateLimitBackend(clock=self.clock)
+        self.previous_backend = rate_limiter.backend
+
+    def tearDown(self):
+        set_rate_limit_backend(self.previous_backend)
+
+    def test_parse(self):
+        """Test limit specs are parsed and invalid ones rejected"""
+        limit = RateLimit.parse('login', '10/minute')
+        self.assertEqual((limit.limit, limit.period, limit.policy), (10, 60, '10;w=60'))
+        self.assertEqual(RateLimit.parse('burst', '5 / 10 seconds').period, 10)
+        self.assertIsNone(RateLimit.parse('off', ''))
+        for spec in ('ten/minute', '10/fortnight', '0/minute'):
+            with self.assertRaises(ValueError):
+                RateLimit.parse('bad', spec)
+        with self.assertRaises(ValueError):
+            RateLimit('bad', 10, 60, algorithm='leaky')
+
+    def test_token_bucket(self):
+        """Test the bucket allows a burst of limit, then refills at limit/period"""
+        decisions = [self.backend.token_bucket('k', 3, 1.0) for _ in range(4)]
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        self.assertEqual(decisions[0].remaining, 2)
+        self.assertAlmostEqual(decisions[3].retry_after, 1.0)
+
+        self.clock.now += 1.5
+        self.assertTrue(self.backend.token_bucket('k', 3, 1.0).allowed)
+        self.assertFalse(self.backend.token_bucket('k', 3, 1.0).allowed)
+        # Other keys have their own bucket
+        self.assertTrue(self.backend.token_bucket('other', 3, 1.0).allowed)
+
+    def test_sliding_window(self):
+        """Test the window counts the previous window's share of requests"""
+        self.clock.now = 600.0  # start of a 60 second window
+        self.assertTrue(all(self.backend.sliding_window('k', 4, 60).allowed for _ in range(4)))
+        decision = self.backend.sliding_window('k', 4, 60)
+        self.assertFalse(decision.allowed)
+        self.assertEqual(decision.remaining, 0)
+        self.assertAlmostEqual(decision.retry_after, 60.0)
+
+        # Halfway through the next window half of the previous 4 still count
+        self.clock.now = 690.0
+        self.assertTrue(self.backend.sliding_window('k', 4, 60).allowed)
+        self.assertTrue(self.backend.sliding_window('k', 4, 60).allowed)
+        decision = self.backend.sliding_window('k', 4, 60)
+        self.assertFalse(decision.allowed)
+        self.assertAlmostEqual(decision.retry_after, 15.0)
+
+        # Two windows later nothing is left
+        self.clock.now = 800.0
+        self.assertEqual(self.backend.sliding_window('k', 4, 60).remaining, 3)
+
+    def test_memory_backend_is_bounded(self):
+        """Test the least recently used keys are forgotten beyond max_keys"""
+        backend = MemoryRateLimitBackend(max_keys=2, clock=self.clock)
+        for key in ('a', 'b', 'c'):
+            backend.token_bucket(key, 1, 1.0)
+        self.assertEqual(len(backend), 2)
+        self.assertTrue(backend.token_bucket('a', 1, 1.0).allowed)
+
+    def test_decorator_and_headers(self):
+        """Test rejected requests get 429 with RateLimit-* and Retry-After headers"""
+        set_rate_limit_backend(self.backend)
+        app = Flask(__name__)
+        rate_limit_module.init_app(app)
+
+        @app.route('/limited')
+        @rate_limit(RateLimit('test', 2, 60), key=ip_key)
+        def limited():
+            return {'status': 'success'}
+
+        @app.route('/window')
+        @rate_limit(RateLimit('window', 1, 60, algorithm=SLIDING_WINDOW), key=lambda kwargs: 'fixed')
+        def window():
+            return {'status': 'success'}
+
+        client = app.test_client()
+        response = client.get('/limited')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['RateLimit-Limit'], '2')
+        self.assertEqual(response.headers['RateLimit-Remaining'], '1')
+        self.assertEqual(response.headers['RateLimit-Policy'], '2;w=60')
+        client.get('/limited')
+        response = client.get('/limited')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '30')
+        self.assertEqual(rate_limit_module.rate_limited_requests.value('test'), 1)
+
+        # Another client address has its own allowance
+        response = client.get('/limited', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(client.get('/window').status_code, 200)
+        self.assertEqual(client.get('/window').status_code, 429)
+
+    def test_backends_implement_both_algorithms(self):
+        """Test a backend missing one of the algorithms cannot be created"""
+        class TokenBucketOnly(RateLimitBackend):
+            def token_bucket(self, key, capacity, rate, cost=1):
+                return None
+        with self.assertRaises(TypeError):
+            TokenBucketOnly()
+
+    def test_backend_failure_allows_requests(self):
+        """Test an unavailable backend lets requests through without headers"""
+        set_rate_limit_backend(BrokenBackend())
+        app = Flask(__name__)
+        rate_limit_module.init_app(app)
+
+        @app.route('/limited')
+        @rate_limit(RateLimit('broken', 1, 60), key=ip_key)
+        def limited():
+            return {'status': 'success'}
+
+        client = app.test_client()
+        for _ in range(3):
+            response = client.get('/limited')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('RateLimit-Limit', response.headers)
+
+    def test_login_key_and_trusted_proxies(self):
+        """Test login attempts are keyed by username and the client seen through ProxyFix"""
+        previous = app_module.TRUSTED_PROXIES
+        app_module.TRUSTED_PROXIES = 1
+        try:
+            flask_app = app_module.create_app()
+        finally:
+            app_module.TRUSTED_PROXIES = previous
+
+        @flask_app.route('/whoami', methods=['POST'])
+        def whoami():
+            return {'key': login_key({})}
+
+        client = flask_app.test_client()
+        response = client.post('/whoami', json={'username': 'alice'},
+                               headers={'X-Forwarded-For': '203.0.113.7'})
+        self.assertEqual(response.get_json()['key'], 'ip:203.0.113.7:user:alice')
+        response = client.post('/whoami', data='not json', content_type='text/plain')
+        self.assertEqual(response.get_json()['key'], 'ip:127.0.0.1:user:None')
+
+    def test_registration_is_limited_per_address(self):
+        """Test one client address cannot register accounts without limit"""
+        set_rate_limit_backend(self.backend)
+        client = app_module.create_app().test_client()
+        # Invalid bodies are rejected before any password is hashed, but still count
+        for _ in range(register_limit.limit):
+            response = client.post('/api/users/register', json={'username': 'flood'})
+            self.assertEqual(response.status_code, 400)
+        response = client.post('/api/users/register', json={'username': 'flood'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['RateLimit-Remaining'], '0')
+
+        response = client.post('/api/users/register', json={'username': 'flood'},
+                               environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import json
+import os
+import sys
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.json_encoder import StdlibBackend
+from services.utils.records import TASK_COLUMNS, TASK_SELECT, TaskRecord, parse_task_etag, task_records, task_rowset, update_assignments
+
+ROW = (7, 'Write docs', 'For the record layer', 'pending', '2024-05-01 12:00:00', '2024-05-02 08:00:00', 3)
+
+class TestTaskRecord(unittest.TestCase):
+    def test_record_from_row(self):
+        """Test rows map onto named fields without a per-instance dict"""
+        task = TaskRecord.from_row(ROW)
+        self.assertEqual(task.id, 7)
+        self.assertEqual(task.updated_at, ROW[5])
+        self.assertEqual(task.sort_key(), (ROW[4], 7))
+        self.assertEqual(task.sort_key('title'), ('Write docs', 7))
+        self.assertEqual(task.to_dict(), dict(zip(TASK_COLUMNS, ROW)))
+        self.assertFalse(hasattr(task, '__dict__'))
+        self.assertIsNone(TaskRecord.from_row(None))
+        self.assertEqual(TASK_SELECT, 'id, title, description, status, created_at, updated_at, version')
+
+    def test_etag_and_update_assignments(self):
+        """Test entity tags round-trip and updates only touch supplied fields"""
+        task = TaskRecord.from_row(ROW)
+        self.assertEqual(task.etag, '7.3')
+        self.assertEqual(parse_task_etag(task.etag, 7), 3)
+        self.assertIsNone(parse_task_etag(task.etag, 8))
+        self.assertIsNone(parse_task_etag('0123abcd', 7))
+
+        assignments, params = update_assignments({'status': 'completed', 'id': 7, 'owner': 'x'})
+        self.assertEqual(assignments, 'status = ?, updated_at = CURRENT_TIMESTAMP, version = version + 1')
+        self.assertEqual(params, ['completed'])
+
+    def test_rowset_serialization(self):
+        """Test a page of records serializes into the task_model shape"""
+        payload = {'tasks': task_rowset(task_records([ROW, ROW]))}
+        self.assertEqual(json.loads(StdlibBackend().dumps(payload))['tasks'], [dict(zip(TASK_COLUMNS, ROW))] * 2)
+
+if __name__ == '__main__':
+    unittest.main()
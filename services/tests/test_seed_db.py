@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.init_db import init_db
+from db.rebuild_task_stats import count_drift
+from db.seed_db import parse_distribution, seed_db
+from services.utils.db_utils import configure_database, get_db_connection, close_connection
+
+class TestSeedDb(unittest.TestCase):
+    def setUp(self):
+        """Create an empty database file for each test"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        configure_database(f"sqlite:///{os.path.join(self.tmpdir.name, 'seed.db')}")
+        init_db()
+        self.conn = get_db_connection()
+
+    def tearDown(self):
+        close_connection(self.conn)
+        self.tmpdir.cleanup()
+
+    def test_parse_distribution(self):
+        """Test status weights become cumulative weights and bad input is rejected"""
+        self.assertEqual(parse_distribution('pending=1,completed=3'), (('pending', 'completed'), (1.0, 4.0)))
+        for text in ('done=1', 'pending=x', 'pending=-1', 'pending=0'):
+            with self.assertRaises(ValueError):
+                parse_distribution(text)
+
+    def test_seed_users_and_tasks(self):
+        """Test the requested volume, statuses and timestamps are generated"""
+        stats = seed_db(users=3, tasks_per_user=40, statuses='pending=1,completed=1', spread_days=30,
+                        batch_size=25, seed=7)
+        self.assertEqual((stats['users'], stats['tasks']), (3, 40 * 3))
+        rows = self.conn.execute("SELECT user_id, COUNT(*) FROM tasks GROUP BY user_id").fetchall()
+        self.assertEqual([count for _, count in rows], [40, 40, 40])
+        statuses = {row[0] for row in self.conn.execute("SELECT DISTINCT status FROM tasks")}
+        self.assertEqual(statuses, {'pending', 'completed'})
+        self.assertEqual(self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE updated_at < created_at OR created_at < datetime('now', '-31 days')"
+        ).fetchone()[0], 0)
+
+        # Running again reuses the same users
+        seed_db(users=3, tasks_per_user=10, seed=8)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 3)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0], 150)
+        self.assertEqual(count_drift(self.conn), [])
+
+    def test_deferred_triggers_are_rebuilt(self):
+        """Test search and counters are consistent after a load with triggers deferred"""
+        seed_db(users=2, tasks_per_user=30, defer_triggers=True, seed=1)
+        self.assertEqual(count_drift(self.conn), [])
+        matches = self.conn.execute(
+            "SELECT COUNT(*) FROM tasks_fts WHERE tasks_fts MATCH 'documentation'"
+        ).fetchone()[0]
+        expected = self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE title LIKE '%documentation%' OR description LIKE '%documentation%'"
+        ).fetchone()[0]
+        self.assertGreater(expected, 0)
+        self.assertEqual(matches, expected)
+        triggers = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        self.assertIn('tasks_fts_insert', triggers)
+        self.assertIn('task_counts_insert', triggers)
+        self.assertIn('task_revisions_insert', triggers)
+
+    def test_deferred_load_moves_revisions(self):
+        """Test a load with triggers deferred still invalidates cached task lists"""
+        def revisions():
+            return dict(self.conn.execute("SELECT user_id, revision FROM task_revisions").fetchall())
+        seed_db(users=2, tasks_per_user=5, seed=1)
+        before = revisions()
+        seed_db(users=2, tasks_per_user=5, defer_triggers=True, seed=2)
+        after = revisions()
+        self.assertEqual(after.keys(), before.keys())
+        for user_id, revision in before.items():
+            self.assertGreater(after[user_id], revision)
+
+    def test_parallel_workers(self):
+        """Test worker processes together load every user's tasks"""
+        stats = seed_db(users=4, tasks_per_user=25, workers=2, batch_size=10, seed=3)
+        self.assertEqual(stats['tasks'], 100)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0], 100)
+        self.assertEqual(count_drift(self.conn), [])
+
+if __name__ == '__main__':
+    unittest.main()
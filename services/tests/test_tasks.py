@@ -1,18 +1,49 @@
 import unittest
+import gzip
 import json
 import os
 import sys
+import tempfile
 
 # Add the project root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from services.tasks import app
+from app import create_app
+from db.init_db import init_db
+from services import tasks
+from services.utils import auth_utils
+from services.utils.cache import LocalLRUCache, set_task_cache_backend
+from services.utils.group_commit import GroupCommitQueue, group_commit_batch_size
+from services.utils.pagination import encode_cursor
+from services.utils.db_utils import configure_database, execute_update, get_db_connection, get_pool
 
 class TestTaskAPI(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Create a fresh database and a user to own the test tasks"""
+        auth_utils.SECRET_KEY = 'test-secret-key-for-the-task-api-suite'
+
+        # Run against a local embedded SQLite database instead of SQLite Cloud
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        configure_database(f"sqlite:///{os.path.join(cls.tmpdir.name, 'tasks.db')}")
+        init_db()
+        cls.flask_app = create_app()
+        cls.flask_app.testing = True
+
+        client = cls.flask_app.test_client()
+        credentials = {'username': 'tester', 'password': 'secret123'}
+        client.post('/api/users/register', data=json.dumps(credentials), content_type='application/json')
+        response = client.post('/api/users/login', data=json.dumps(credentials), content_type='application/json')
+        cls.token = json.loads(response.data)['data']['token']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
     def setUp(self):
         """Set up test client and test data"""
-        self.app = app.test_client()
-        self.app.testing = True
+        self.app = self.flask_app.test_client()
+        self.app.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {self.token}'
         self.base_url = '/api/tasks'
         
         # Test task data
@@ -74,18 +105,131 @@ class TestTaskAPI(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['status'], 'success')
         self.assertIn('data', data)
-        self.assertIn('pagination', data)
+        self.assertIn('pagination', data['data'])
 
         # Test custom pagination
         response = self.app.get(f'{self.base_url}?page=1&per_page=5')
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
-        self.assertEqual(data['pagination']['per_page'], 5)
+        self.assertEqual(data['data']['pagination']['per_page'], 5)
 
         # Test invalid pagination parameters
         response = self.app.get(f'{self.base_url}?page=0&per_page=10')
         self.assertEqual(response.status_code, 400)
 
+    def test_list_reflects_writes(self):
+        """Test that cached list pages are invalidated by writes"""
+        response = self.app.get(f'{self.base_url}?per_page=100')
+        before = json.loads(response.data)['data']['pagination']['total']
+
+        response = self.app.post(
+            self.base_url,
+            data=json.dumps({'title': 'Fresh Task', 'description': 'Not cached yet'}),
+            content_type='application/json'
+        )
+        new_id = json.loads(response.data)['data']['id']
+        data = json.loads(self.app.get(f'{self.base_url}?per_page=100').data)['data']
+        self.assertEqual(data['pagination']['total'], before + 1)
+        self.assertEqual(data['tasks'][0]['id'], new_id)
+
+        self.app.delete(f'{self.base_url}/{new_id}')
+        data = json.loads(self.app.get(f'{self.base_url}?per_page=100').data)['data']
+        self.assertNotIn(new_id, [task['id'] for task in data['tasks']])
+
+    def test_conditional_get(self):
+        """Test ETag and Last-Modified revalidation of lists and single tasks"""
+        response = self.app.get(self.base_url)
+        etag = response.headers['ETag']
+        self.assertIn('Last-Modified', response.headers)
+
+        response = self.app.get(self.base_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        # A different page is a different representation
+        response = self.app.get(f'{self.base_url}?per_page=5', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+        # Writes change the list ETag
+        self.app.put(
+            f'{self.base_url}/{self.task_id}',
+            data=json.dumps({'status': 'completed'}),
+            content_type='application/json'
+        )
+        response = self.app.get(self.base_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.app.get(f'{self.base_url}/{self.task_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['data']['status'], 'completed')
+        task_etag = response.headers['ETag']
+        last_modified = response.headers['Last-Modified']
+
+        response = self.app.get(f'{self.base_url}/{self.task_id}', headers={'If-None-Match': task_etag})
+        self.assertEqual(response.status_code, 304)
+        # Last-Modified cannot tell apart edits made within the same second
+        response = self.app.get(f'{self.base_url}/{self.task_id}', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.app.get(f'{self.base_url}/999999').status_code, 404)
+
+    def test_list_etag_follows_the_database(self):
+        """Test list ETags and cached pages follow writes made by another worker"""
+        etag = self.app.get(self.base_url).headers['ETag']
+        # Another worker with its own cache computes the same validator
+        set_task_cache_backend(LocalLRUCache())
+        self.assertEqual(self.app.get(self.base_url, headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.app.get(self.base_url).headers['ETag'], etag)
+
+        # A write that never passed through this process still changes it
+        conn = get_db_connection()
+        try:
+            execute_update(conn, "UPDATE tasks SET title = 'Changed elsewhere' WHERE id = ?", (self.task_id,))
+        finally:
+            conn.close()
+        response = self.app.get(self.base_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        titles = {task['id']: task['title'] for task in json.loads(response.data)['data']['tasks']}
+        self.assertEqual(titles[self.task_id], 'Changed elsewhere')
+
+    def test_get_tasks_by_cursor(self):
+        """Test walking the task list with cursor pagination"""
+        for i in range(4):
+            self.app.post(
+                self.base_url,
+                data=json.dumps({'title': f'Cursor Task {i}', 'description': 'Paged'}),
+                content_type='application/json'
+            )
+
+        response = self.app.get(f'{self.base_url}?per_page=100')
+        expected = [task['id'] for task in json.loads(response.data)['data']['tasks']]
+
+        seen = []
+        url = f'{self.base_url}?cursor=&per_page=2&include_total=true'
+        while True:
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)['data']
+            seen.extend(task['id'] for task in data['tasks'])
+            self.assertEqual(data['pagination']['total'], len(expected))
+            if not data['pagination']['has_next']:
+                break
+            url = f"{self.base_url}?cursor={data['pagination']['next_cursor']}&per_page=2&include_total=true"
+        self.assertEqual(seen, expected)
+
+        # Test invalid cursor
+        response = self.app.get(f'{self.base_url}?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+        # Well-formed tokens holding values of the wrong type are rejected too
+        for values in ((['created_at'], 'desc', '2024-01-01 00:00:00', 1),
+                       ('created_at', 'desc', {'a': 1}, 1),
+                       ('created_at', 'desc', '2024-01-01 00:00:00', True),
+                       ('created_at', 'desc', '2024-01-01 00:00:00', '1')):
+            response = self.app.get(f'{self.base_url}?cursor={encode_cursor(*values)}')
+            self.assertEqual(response.status_code, 400)
+
     def test_update_task(self):
         """Test updating a task"""
         update_data = {
@@ -135,5 +279,305 @@ class TestTaskAPI(unittest.TestCase):
         response = self.app.delete(f'{self.base_url}/999999')
         self.assertEqual(response.status_code, 404)
 
+    def test_batch_operations(self):
+        """Test creating, updating and deleting tasks in one batch"""
+        response = self.app.post(
+            f'{self.base_url}/batch',
+            data=json.dumps({
+                'create': [
+                    {'title': 'Batch 1', 'description': 'First'},
+                    {'title': '', 'description': 'Invalid title'},
+                    {'title': 'Batch 2', 'description': 'Second', 'status': 'completed'}
+                ],
+                'update': [
+                    {'id': self.task_id, 'status': 'in_progress'},
+                    {'id': 999999, 'title': 'Missing'}
+                ],
+                'delete': [999999]
+            }),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)['data']
+
+        created = data['created']
+        self.assertEqual([r['status'] for r in created], ['success', 'error', 'success'])
+        self.assertEqual(created[0]['data']['title'], 'Batch 1')
+        self.assertEqual(created[2]['data']['status'], 'completed')
+
+        self.assertEqual(data['updated'][0]['data']['status'], 'in_progress')
+        self.assertEqual(data['updated'][1]['message'], 'Task not found')
+        self.assertEqual(data['deleted'][0]['status'], 'error')
+
+        # Delete the created tasks in a second batch
+        ids = [created[0]['data']['id'], created[2]['data']['id']]
+        response = self.app.post(
+            f'{self.base_url}/batch',
+            data=json.dumps({'delete': ids}),
+            content_type='application/json'
+        )
+        self.assertEqual([r['status'] for r in json.loads(response.data)['data']['deleted']], ['success', 'success'])
+
+    def test_batch_update_requires_a_field(self):
+        """Test that an id-only batch update is rejected and leaves the task's ETag alone"""
+        etag = self.app.get(f'{self.base_url}/{self.task_id}').headers['ETag']
+        response = self.app.post(
+            f'{self.base_url}/batch',
+            data=json.dumps({'update': [{'id': self.task_id}]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data)['data']['updated'][0]
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['message'], 'Provide at least one of: title, description, status')
+        self.assertEqual(self.app.get(f'{self.base_url}/{self.task_id}').headers['ETag'], etag)
+
+    def test_export_tasks(self):
+        """Test streaming the task export as NDJSON, CSV and gzip"""
+        response = self.app.get(f'{self.base_url}/export?format=ndjson&status=pending')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertIn(self.task_id, [row['id'] for row in rows])
+        self.assertTrue(all(row['status'] == 'pending' for row in rows))
+
+        response = self.app.get(f'{self.base_url}/export?format=csv')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'id,title,description,status,created_at,updated_at,version')
+
+        response = self.app.get(f'{self.base_url}/export', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+        self.assertIn(self.task_id, [json.loads(line)['id'] for line in lines])
+
+        # Test invalid parameters
+        self.assertEqual(self.app.get(f'{self.base_url}/export?format=xml').status_code, 400)
+        self.assertEqual(self.app.get(f'{self.base_url}/export?created_after=yesterday').status_code, 400)
+
+    def test_export_releases_connection_between_chunks(self):
+        """Test that a paused export does not hold a pooled connection"""
+        user_id = auth_utils.verify_token(self.token)
+        rows = tasks.iter_task_rows(user_id, chunk_size=1)
+        first = next(rows)
+        self.assertEqual(get_pool().stats()['in_use'], 0)
+        self.assertNotIn(first.id, [row.id for row in rows])
+
+    def test_health_checks(self):
+        """Test liveness and cached readiness probes"""
+        response = self.app.get('/api/health/live')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.app.get('/api/health/ready')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)['data']
+        self.assertIn(data['state'], ('ok', 'degraded'))
+        self.assertIn('latency_ms', data['checks']['database'])
+        self.assertTrue(json.loads(self.app.get('/api/health/ready').data)['data']['cached'])
+
+    def test_filter_search_and_sort(self):
+        """Test server-side status filters, full-text search and sorting"""
+        titles = ['Zebra report', 'Alpha migration', 'Mango quarterly report']
+        ids = []
+        for title in titles:
+            response = self.app.post(self.base_url, data=json.dumps({'title': title, 'description': 'Filter test'}),
+                                     content_type='application/json')
+            ids.append(json.loads(response.data)['data']['id'])
+        self.app.put(f'{self.base_url}/{ids[1]}', data=json.dumps({'status': 'completed'}),
+                     content_type='application/json')
+
+        def list_tasks(query):
+            response = self.app.get(f'{self.base_url}?per_page=100&{query}')
+            self.assertEqual(response.status_code, 200)
+            return json.loads(response.data)['data']
+
+        data = list_tasks('q=report')
+        self.assertEqual({task['id'] for task in data['tasks']}, {ids[0], ids[2]})
+        self.assertEqual(data['pagination']['total'], 2)
+        self.assertEqual([task['id'] for task in list_tasks('q=quart')['tasks']], [ids[2]])
+        self.assertEqual([task['id'] for task in list_tasks('q=report+zebra')['tasks']], [ids[0]])
+
+        completed = list_tasks('status=completed')['tasks']
+        self.assertIn(ids[1], [task['id'] for task in completed])
+        self.assertTrue(all(task['status'] == 'completed' for task in completed))
+
+        # Search follows title updates through the FTS triggers
+        self.app.put(f'{self.base_url}/{ids[1]}', data=json.dumps({'title': 'Alpha report'}),
+                     content_type='application/json')
+        self.assertIn(ids[1], [task['id'] for task in list_tasks('q=report')['tasks']])
+        self.app.delete(f'{self.base_url}/{ids[0]}')
+        self.assertNotIn(ids[0], [task['id'] for task in list_tasks('q=zebra')['tasks']])
+
+        titles = [task['title'] for task in list_tasks('sort=title&order=asc')['tasks']]
+        self.assertEqual(titles, sorted(titles))
+
+        # Cursor pagination walks the same order as the sort
+        seen = []
+        data = list_tasks('per_page=1&sort=title&order=asc&cursor=')
+        first_cursor = data['pagination']['next_cursor']
+        while True:
+            seen.extend(task['title'] for task in data['tasks'])
+            if not data['pagination']['next_cursor']:
+                break
+            data = json.loads(self.app.get(
+                f"{self.base_url}?per_page=1&sort=title&order=asc&cursor={data['pagination']['next_cursor']}"
+            ).data)['data']
+        self.assertEqual(seen, titles)
+
+        # A cursor cannot be replayed under another sort or order
+        for query in ('sort=created_at&order=asc', 'sort=title&order=desc', 'sort=title'):
+            response = self.app.get(f"{self.base_url}?per_page=1&{query}&cursor={first_cursor}")
+            self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(list_tasks('updated_after=2999-01-01T00:00:00Z')['tasks'], [])
+
+        # Test invalid parameters
+        self.assertEqual(self.app.get(f'{self.base_url}?sort=description').status_code, 400)
+        self.assertEqual(self.app.get(f'{self.base_url}?order=sideways').status_code, 400)
+        self.assertEqual(self.app.get(f'{self.base_url}?status=archived').status_code, 400)
+        self.assertEqual(self.app.get(f'{self.base_url}?updated_before=soon').status_code, 400)
+
+    def test_patch_with_if_match(self):
+        """Test PATCH changes only supplied fields and honours If-Match"""
+        url = f'{self.base_url}/{self.task_id}'
+        etag = self.app.get(url).headers['ETag']
+
+        response = self.app.patch(url, data=json.dumps({'status': 'completed'}), content_type='application/json',
+                                  headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)['data']
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual(data['title'], self.test_task['title'])
+        self.assertEqual(data['version'], 2)
+        new_etag = response.headers['ETag']
+        self.assertNotEqual(new_etag, etag)
+
+        # A second editor holding the old ETag is rejected with the current state
+        response = self.app.patch(url, data=json.dumps({'title': 'Stale edit'}), content_type='application/json',
+                                  headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.headers['ETag'], new_etag)
+        self.assertEqual(json.loads(response.data)['data']['title'], self.test_task['title'])
+
+        response = self.app.delete(url, headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+
+        # Unknown tasks are still 404, and PATCH needs at least one field
+        response = self.app.patch(f'{self.base_url}/999999', data=json.dumps({'title': 'x'}),
+                                  content_type='application/json', headers={'If-Match': '"999999.1"'})
+        self.assertEqual(response.status_code, 404)
+        response = self.app.patch(url, data=json.dumps({'id': 5}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.app.delete(url, headers={'If-Match': new_etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_match_is_strong(self):
+        """Test single tasks keep a strong ETag when compressed and If-Match ignores weak tags"""
+        url = f'{self.base_url}/{self.task_id}'
+        self.app.patch(url, data=json.dumps({'description': 'A long description ' * 100}),
+                       content_type='application/json')
+        response = self.app.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        etag = response.headers['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertNotEqual(etag, self.app.get(url).headers['ETag'])
+
+        # The compressed representation's tag still revalidates and preconditions the task
+        response = self.app.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        response = self.app.patch(url, data=json.dumps({'status': 'completed'}), content_type='application/json',
+                                  headers={'If-Match': f'W/{self.app.get(url).headers["ETag"]}'})
+        self.assertEqual(response.status_code, 412)
+        response = self.app.patch(url, data=json.dumps({'status': 'completed'}), content_type='application/json',
+                                  headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_rate_limit_headers(self):
+        """Test the task list reports the caller's remaining allowance"""
+        first = self.app.get(self.base_url)
+        second = self.app.get(self.base_url)
+        self.assertEqual(first.headers['RateLimit-Policy'], '120;w=60')
+        self.assertEqual(int(second.headers['RateLimit-Remaining']), int(first.headers['RateLimit-Remaining']) - 1)
+
+    def test_group_commit_writes(self):
+        """Test create, update and delete behave the same through the group-commit queue"""
+        tasks.set_task_write_queue(GroupCommitQueue(window=0.001, max_batch=8))
+        try:
+            response = self.app.post(self.base_url, data=json.dumps(self.test_task), content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+            task_id = json.loads(response.data)['data']['id']
+            url = f'{self.base_url}/{task_id}'
+
+            response = self.app.patch(url, data=json.dumps({'status': 'completed'}), content_type='application/json')
+            self.assertEqual(json.loads(response.data)['data']['status'], 'completed')
+            response = self.app.patch(url, data=json.dumps({'title': 'x'}), content_type='application/json',
+                                      headers={'If-Match': '"0.1"'})
+            self.assertEqual(response.status_code, 412)
+
+            self.assertEqual(self.app.delete(url).status_code, 200)
+            self.assertEqual(self.app.delete(url).status_code, 404)
+        finally:
+            tasks.set_task_write_queue(None)
+
+    def test_group_commit_inserts_only(self):
+        """Test only creates join a group commit when the queue takes inserts only"""
+        tasks.set_task_write_queue(GroupCommitQueue(window=0.001, max_batch=8, inserts_only=True))
+        try:
+            batches = group_commit_batch_size.count()
+            response = self.app.post(self.base_url, data=json.dumps(self.test_task), content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(group_commit_batch_size.count(), batches + 1)
+            url = f"{self.base_url}/{json.loads(response.data)['data']['id']}"
+
+            response = self.app.patch(url, data=json.dumps({'status': 'completed'}), content_type='application/json')
+            self.assertEqual(json.loads(response.data)['data']['status'], 'completed')
+            self.assertEqual(self.app.delete(url).status_code, 200)
+            self.assertEqual(group_commit_batch_size.count(), batches + 1)
+        finally:
+            tasks.set_task_write_queue(None)
+
+    def test_task_stats(self):
+        """Test the counters follow creates, status changes and deletes"""
+        def stats():
+            response = self.app.get(f'{self.base_url}/stats')
+            self.assertEqual(response.status_code, 200)
+            return json.loads(response.data)['data']
+
+        before = stats()
+        self.assertEqual(before['total'], before['pending'] + before['in_progress'] + before['completed'])
+
+        self.app.put(f'{self.base_url}/{self.task_id}', data=json.dumps({'status': 'in_progress'}),
+                     content_type='application/json')
+        after = stats()
+        self.assertEqual(after['pending'], before['pending'] - 1)
+        self.assertEqual(after['in_progress'], before['in_progress'] + 1)
+        self.assertEqual(after['total'], before['total'])
+
+        self.app.delete(f'{self.base_url}/{self.task_id}')
+        self.assertEqual(stats()['total'], before['total'] - 1)
+
+        # Status-only listings are counted from the same counters
+        data = json.loads(self.app.get(f'{self.base_url}?status=completed').data)['data']
+        self.assertEqual(data['pagination']['total'], stats()['completed'])
+
+    def test_request_id_header(self):
+        """Test request ids are generated or echoed back"""
+        self.assertTrue(self.app.get('/api/health').headers.get('X-Request-ID'))
+        response = self.app.get('/api/health', headers={'X-Request-ID': 'trace-123'})
+        self.assertEqual(response.headers['X-Request-ID'], 'trace-123')
+
+    def test_metrics_endpoint(self):
+        """Test request, query and pool metrics are exposed for scraping"""
+        self.app.get(self.base_url)
+        response = self.app.get('/api/metrics', environ_base={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        body = response.get_data(as_text=True)
+        self.assertIn('http_request_duration_seconds_count{method="GET",endpoint="/api/tasks",status="200"}', body)
+        self.assertIn('db_query_duration_seconds_bucket{query="SELECT', body)
+        self.assertIn('db_connection_checkouts_total', body)
+        self.assertIn('db_pool_connections{state="in_use"}', body)
+        self.assertIn('auth_token_verify_seconds_count{source="decode"}', body)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
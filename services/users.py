@@ -3,7 +3,33 @@ import os
 from flask import Blueprint, request
 from flask_restx import Resource, fields
 from services.utils.db_utils import get_db_connection, execute_query, execute_update, close_cursor, close_connection
-from services.utils.auth_utils import hash_password, verify_password, generate_token
+from services.utils.auth_utils import hash_password, verify_password, password_needs_rehash, generate_token
+from services.utils.rate_limit import RateLimit, ip_key, rate_limit
+
+logger = logging.getLogger(__name__)
+
+# Login attempts per username and client address, as '<count>/<period>';
+# each one costs a password hash. Like RATE_LIMIT_LOGIN_ADDRESS, counted per
+# worker process with the default in-memory rate limit backend
+RATE_LIMIT_LOGIN = os.getenv('RATE_LIMIT_LOGIN', '10/minute')
+
+# Login attempts per client address across all usernames, so one address
+# cannot spray passwords over many accounts
+RATE_LIMIT_LOGIN_ADDRESS = os.getenv('RATE_LIMIT_LOGIN_ADDRESS', '60/minute')
+
+# Registrations per client address; each one costs a password hash and a
+# new account, so one address cannot flood the users table
+RATE_LIMIT_REGISTER = os.getenv('RATE_LIMIT_REGISTER', '20/hour')
+
+login_limit = RateLimit.parse('login', RATE_LIMIT_LOGIN)
+login_address_limit = RateLimit.parse('login_address', RATE_LIMIT_LOGIN_ADDRESS)
+register_limit = RateLimit.parse('register', RATE_LIMIT_REGISTER)
+
+def login_key(kwargs):
+    """Key login attempts by client address and the username being tried"""
+    data = request.get_json(silent=True)
+    username = data.get('username') if isinstance(data, dict) else None
+    return f"{ip_key(kwargs)}:user:{username}"
 
 # Create a Blueprint for user routes
 user_bp = Blueprint('users', __name__)
@@ -18,10 +44,12 @@ login_input_model = None
 login_response_model = None
 
 class UserRegistration(Resource):
+    @rate_limit(register_limit, key=ip_key)
     def post(self):
         """Register a new user"""
         conn = None
         cursor = None
+        error = None
         try:
             data = request.get_json()
             
@@ -70,21 +98,23 @@ class UserRegistration(Resource):
             }, 201
 
         except Exception as e:
-            print(f"Error: {e}", flush=True)
-            logging.error(f"Error: {e}")
-            logging.exception("An unexpected error occurred")
+            error = e
+            logger.exception("An unexpected error occurred: %s", e)
             return {'status': 'error', 'message': 'An unexpected error occurred'}, 500
         finally:
             if cursor:
                 close_cursor(cursor)
             if conn:
-                close_connection(conn)
+                close_connection(conn, error)
 
 class UserLogin(Resource):
+    @rate_limit(login_address_limit, key=ip_key)
+    @rate_limit(login_limit, key=login_key)
     def post(self):
         """Login user and return JWT token"""
         conn = None
         cursor = None
+        error = None
         try:
             data = request.get_json()
             
@@ -105,6 +135,18 @@ class UserLogin(Resource):
             if not user or not verify_password(user[2], data['password']):
                 return {'status': 'error', 'message': 'Invalid username or password'}, 401
 
+            # Upgrade hashes made with outdated parameters while we have the password
+            if password_needs_rehash(user[2]):
+                try:
+                    close_cursor(cursor)
+                    cursor = execute_update(conn,
+                        "UPDATE users SET password_hash = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                        (hash_password(data['password']), user[0])
+                    )
+                except Exception as e:
+                    error = e
+                    logger.error("Error rehashing password for user %s: %s", user[0], e)
+
             # Generate token
             token = generate_token(user[0])
 
@@ -121,15 +163,14 @@ class UserLogin(Resource):
             }, 200
 
         except Exception as e:
-            print(f"Error: {e}", flush=True)
-            logging.error(f"Error: {e}")
-            logging.exception("An unexpected error occurred")
+            error = e
+            logger.exception("An unexpected error occurred: %s", e)
             return {'status': 'error', 'message': 'An unexpected error occurred'}, 500
         finally:
             if cursor:
                 close_cursor(cursor)
             if conn:
-                close_connection(conn)
+                close_connection(conn, error)
 
 def init_app(api):
     global ns, user_model, user_input_model, login_input_model, login_response_model
@@ -167,6 +208,7 @@ def init_app(api):
     ns.expect(user_input_model)(UserRegistration.post)
     ns.response(201, 'User registered successfully', user_model)(UserRegistration.post)
     ns.response(400, 'Bad Request')(UserRegistration.post)
+    ns.response(429, 'Too Many Requests')(UserRegistration.post)
     ns.response(500, 'Internal Server Error')(UserRegistration.post)
     
     # Add Swagger documentation to UserLogin
@@ -175,4 +217,5 @@ def init_app(api):
     ns.response(200, 'Login successful', login_response_model)(UserLogin.post)
     ns.response(400, 'Bad Request')(UserLogin.post)
     ns.response(401, 'Invalid credentials')(UserLogin.post)
+    ns.response(429, 'Too Many Requests')(UserLogin.post)
     ns.response(500, 'Internal Server Error')(UserLogin.post) 
\ No newline at end of file
@@ -1,20 +1,268 @@
 import jwt
 import datetime
+import hashlib
+import logging
+import multiprocessing
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from functools import wraps
 from flask import request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
+from services.utils.metrics import registry, auth_decode_duration
+
+logger = logging.getLogger(__name__)
 
 # Secret key for JWT - in production, this should be in environment variables
 SECRET_KEY = os.getenv('SECRET_KEY')
 
+class TokenCache:
+    """Bounded LRU cache of verified JWT payloads keyed by token digest.
+
+    Entries expire at the token's own exp claim (or after max_ttl seconds,
+    whichever comes first), so a cached token is never accepted for longer
+    than jwt.decode would have accepted it.
+    """
+
+    def __init__(self, max_size=10000, max_ttl=300.0, clock=time.time):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # digest -> (payload, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, digest):
+        """Return the cached payload for a token digest, or None"""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[digest]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return payload
+
+    def put(self, digest, payload):
+        """Cache a verified payload until its exp claim"""
+        if self.max_size <= 0:
+            return
+        now = self._clock()
+        expires_at = now + self.max_ttl
+        if 'exp' in payload:
+            expires_at = min(expires_at, float(payload['exp']))
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[digest] = (payload, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, digest):
+        """Drop a token from the cache"""
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+token_cache = TokenCache(
+    max_size=int(os.getenv('JWT_CACHE_SIZE', '10000')),
+    max_ttl=float(os.getenv('JWT_CACHE_TTL', '300'))
+)
+
+def _token_cache_metrics():
+    stats = token_cache.stats()
+    return {('hit',): stats['hits'], ('miss',): stats['misses']}
+
+registry.gauge('auth_token_cache_lookups_total', 'JWT cache lookups by result', ('result',),
+               callback=_token_cache_metrics, type_name='counter')
+
+# Only real decodes are timed; cache hits are counted by the gauge above
+_decode_duration = auth_decode_duration.labels('decode')
+
+# Revoked token digests mapped to the time they would have expired anyway
+_revoked_tokens = {}
+_revoked_lock = threading.Lock()
+
+# Optional callable(payload) -> bool consulted for every authenticated request
+_revocation_check = None
+
+def token_digest(token):
+    """Return the cache key for a raw token"""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+def set_revocation_check(check):
+    """Install a hook called with the token payload; returning True rejects the token"""
+    global _revocation_check
+    _revocation_check = check
+
+def revoke_token(token):
+    """Reject a token from now on (e.g. on logout) until it expires"""
+    digest = token_digest(token)
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        # Already expired or never valid
+        token_cache.invalidate(digest)
+        return
+    now = time.time()
+    with _revoked_lock:
+        _revoked_tokens[digest] = float(payload.get('exp', now + token_cache.max_ttl))
+        # Forget denylist entries for tokens that have expired on their own
+        for key in [key for key, exp in _revoked_tokens.items() if exp <= now]:
+            del _revoked_tokens[key]
+    token_cache.invalidate(digest)
+
+def _is_revoked(digest, payload):
+    if _revoked_tokens and digest in _revoked_tokens:
+        return True
+    return _revocation_check is not None and _revocation_check(payload)
+
+def password_hash_method(algorithm=None, cost=None):
+    """Build a werkzeug hash method string such as 'pbkdf2:sha256:600000'.
+
+    For pbkdf2 the cost is the iteration count, for scrypt it is N.
+    """
+    algorithm = algorithm or os.getenv('PASSWORD_HASH_ALGORITHM', 'scrypt')
+    cost = cost or os.getenv('PASSWORD_HASH_COST')
+    if not cost:
+        return algorithm
+    if algorithm.startswith('pbkdf2'):
+        if algorithm.count(':') == 0:
+            algorithm = 'pbkdf2:sha256'
+        return f"{algorithm}:{int(cost)}"
+    if algorithm == 'scrypt':
+        return f"scrypt:{int(cost)}:8:1"
+    return algorithm
+
+class PasswordHasher:
+    """Hashes and verifies passwords, optionally in a pool of worker processes.
+
+    Password hashing is deliberately CPU-heavy; running it in separate
+    processes keeps login bursts from blocking request threads. With
+    workers=0 hashing happens inline in the calling thread.
+    """
+
+    def __init__(self, method=None, workers=0, timeout=30.0):
+        self.method = method or password_hash_method()
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._params = None
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn keeps worker processes independent of the app's threads and sockets
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def _run(self, func, *args):
+        executor = self._get_executor()
+        if executor is None:
+            return func(*args)
+        try:
+            return executor.submit(func, *args).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            logger.error("Password hashing pool is broken; hashing inline and restarting it")
+            with self._lock:
+                self._executor = None
+            return func(*args)
+
+    @property
+    def params(self):
+        """The method prefix stored hashes should have, e.g. 'scrypt:32768:8:1'"""
+        if self._params is None:
+            self._params = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._params
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """Whether a stored hash was made with different parameters than configured"""
+        return stored_hash.split('$', 1)[0] != self.params
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Hashing processes per app process. launcher.py defaults this to 0: its
+# gunicorn workers already spread hashing over cores, and a pool in each of
+# them would start WEB_WORKERS times as many processes
+password_hasher = PasswordHasher(
+    workers=int(os.getenv('PASSWORD_HASH_WORKERS', '2')),
+    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', '30'))
+)
+
+def _reset_hasher_after_fork():
+    # The parent's worker processes and executor threads do not exist in the child
+    password_hasher._executor = None
+    password_hasher._lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_hasher_after_fork)
+
+def set_password_hasher(hasher):
+    """Replace the process-wide password hasher"""
+    global password_hasher
+    previous, password_hasher = password_hasher, hasher
+    if previous is not hasher:
+        previous.shutdown()
+
 def hash_password(password):
     """Hash a password for storing"""
-    return generate_password_hash(password)
+    return password_hasher.hash(password)
 
 def verify_password(stored_hash, provided_password):
     """Verify a stored password against one provided by user"""
-    return check_password_hash(stored_hash, provided_password)
+    return password_hasher.verify(stored_hash, provided_password)
+
+def password_needs_rehash(stored_hash):
+    """Check whether a stored hash should be upgraded to the configured parameters"""
+    return password_hasher.needs_rehash(stored_hash)
 
 def generate_token(user_id):
     """Generate a JWT token"""
@@ -26,13 +274,25 @@ def generate_token(user_id):
 
 def verify_token(token):
     """Verify a JWT token"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return payload['user_id']
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is None:
+        started = time.perf_counter()
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            return None
+        except jwt.InvalidTokenError:
+            return None
+        finally:
+            _decode_duration.observe(time.perf_counter() - started)
+        if _is_revoked(digest, payload):
+            return None
+        token_cache.put(digest, payload)
+    else:
+        if _is_revoked(digest, payload):
+            return None
+    return payload.get('user_id')
 
 def token_required(f):
     """Decorator to require token authentication"""
@@ -41,15 +301,15 @@ def token_required(f):
         token = None
         
         # Get token from Authorization header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(" ")[1]
-            except IndexError:
+        auth_header = request.headers.get('Authorization')
+        if auth_header is not None:
+            _, separator, credentials = auth_header.partition(" ")
+            if not separator:
                 return ({
                     'status': 'error',
                     'message': 'Invalid token format'
                 }), 401
+            token = credentials.partition(" ")[0]
 
         if not token:
             return ({
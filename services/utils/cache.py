@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from services.utils.metrics import registry
+
+class CacheBackend:
+    """Interface for key/value stores usable by TaskListCache.
+
+    The in-process LocalLRUCache is the default; a backend shared between
+    workers (e.g. Redis or memcached) only needs to implement these three
+    methods and store picklable values.
+    """
+
+    def get(self, key):
+        """Return the value for key, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, expiring after ttl seconds if given"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove key if present"""
+        raise NotImplementedError
+
+class LocalLRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache with optional per-entry TTL"""
+
+    def __init__(self, max_size=1024, clock=time.monotonic):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        if self.max_size <= 0:
+            return
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+class TaskListCache:
+    """Read-through cache for task list pages, keyed by the user's revision.
+
+    Callers pass the revision read from task_revisions, which triggers move
+    on every write to the user's tasks. Pages cached under an older
+    revision are never served again and simply age out of the backend, so
+    even a per-process backend never serves a page another worker's write
+    has made stale.
+    """
+
+    def __init__(self, backend, ttl=60.0):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, user_id, revision, key, loader):
+        """Return the cached value for key at revision, calling loader() on a miss"""
+        # Callers read the revision before loading, so a concurrent write can
+        # only leave its result under a revision that is already obsolete
+        page_key = f"tasks:{user_id}:{revision}:{key}"
+        value = self.backend.get(page_key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        self.backend.set(page_key, value, ttl=self.ttl)
+        return value
+
+    def stats(self):
+        """Return hit/miss counters and the hit ratio"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+task_list_cache = TaskListCache(
+    LocalLRUCache(max_size=int(os.getenv('TASK_CACHE_SIZE', '1024'))),
+    ttl=float(os.getenv('TASK_CACHE_TTL', '60'))
+)
+
+def set_task_cache_backend(backend):
+    """Use a different (e.g. shared) backend for the task list cache"""
+    task_list_cache.backend = backend
+
+def _task_cache_metrics():
+    stats = task_list_cache.stats()
+    return {('hit',): stats['hits'], ('miss',): stats['misses']}
+
+registry.gauge('task_list_cache_lookups_total', 'Task list cache lookups by result', ('result',),
+               callback=_task_cache_metrics, type_name='counter')
@@ -0,0 +1,169 @@
+import os
+import zlib
+from flask import request
+from services.utils.conditional import encoded_etag
+
+# Encodings offered to clients, in server preference order; empty disables compression
+COMPRESSION_ALGORITHMS = os.getenv('COMPRESSION_ALGORITHMS', 'zstd,br,gzip')
+
+# Responses with fewer bytes than this are sent as-is; compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+# Compression level per encoding (gzip 1-9, brotli 0-11, zstd 1-22)
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_LEVEL = int(os.getenv('COMPRESSION_BROTLI_LEVEL', '4'))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
+
+# Media types worth compressing; everything else (images, archives, ...) is
+# assumed to be compressed already
+COMPRESSIBLE_TYPES = frozenset({
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml',
+    'image/svg+xml'
+})
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level=COMPRESSION_GZIP_LEVEL):
+        self.level = level
+
+    def compressor(self):
+        # wbits 31 writes a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, module, level=COMPRESSION_BROTLI_LEVEL):
+        self._brotli = module
+        self.level = level
+
+    def compressor(self):
+        compressor = self._brotli.Compressor(quality=self.level)
+        return compressor.process, compressor.finish
+
+class ZstdEncoder:
+    name = 'zstd'
+
+    def __init__(self, module, level=COMPRESSION_ZSTD_LEVEL):
+        self._zstd = module
+        self.level = level
+
+    def compressor(self):
+        compressor = self._zstd.ZstdCompressor(level=self.level).compressobj()
+        return compressor.compress, compressor.flush
+
+def load_encoders(names=COMPRESSION_ALGORITHMS):
+    """Return encoders for the comma-separated names whose libraries are installed.
+
+    gzip is always available; br needs brotli (or brotlicffi) and zstd needs
+    zstandard, and they are skipped when the library is missing.
+    """
+    encoders = []
+    for name in (name.strip() for name in names.split(',')):
+        if not name:
+            continue
+        if name == 'gzip':
+            encoders.append(GzipEncoder())
+        elif name == 'br':
+            try:
+                import brotli
+            except ImportError:
+                try:
+                    import brotlicffi as brotli
+                except ImportError:
+                    continue
+            encoders.append(BrotliEncoder(brotli))
+        elif name == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                continue
+            encoders.append(ZstdEncoder(zstandard))
+        else:
+            raise ValueError(f"Unknown compression algorithm: {name}")
+    return encoders
+
+def compress(encoder, data):
+    """Compress a complete body in one call"""
+    compress_chunk, finish = encoder.compressor()
+    return compress_chunk(data) + finish()
+
+def compress_stream(encoder, chunks):
+    """Compress an iterable of byte chunks incrementally.
+
+    Output is only yielded when the compressor emits a block, so many small
+    chunks (e.g. one NDJSON line each) still compress as well as one body.
+    """
+    compress_chunk, finish = encoder.compressor()
+    for chunk in chunks:
+        data = compress_chunk(chunk)
+        if data:
+            yield data
+    yield finish()
+
+def is_compressible(mimetype):
+    return (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+            or mimetype.endswith('+json') or mimetype.endswith('+xml'))
+
+class ResponseCompressor:
+    """Negotiates Content-Encoding and compresses eligible responses"""
+
+    def __init__(self, encoders=None, min_size=COMPRESSION_MIN_SIZE):
+        self.encoders = load_encoders() if encoders is None else encoders
+        self.min_size = min_size
+
+    def negotiate(self, accept_encodings):
+        """Return the encoder the client ranks highest, ties going to server preference"""
+        best = None
+        best_quality = 0
+        for encoder in self.encoders:
+            quality = accept_encodings[encoder.name]
+            if quality > best_quality:
+                best, best_quality = encoder, quality
+        return best
+
+    def should_compress(self, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if request.method == 'HEAD' or response.direct_passthrough:
+            return False
+        if 'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+            return False
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+        if not is_compressible(response.mimetype or ''):
+            return False
+        if not response.is_streamed and response.content_length is not None:
+            return response.content_length >= self.min_size
+        return True
+
+    def __call__(self, response):
+        if not self.encoders or not self.should_compress(response):
+            return response
+        # The body varies with Accept-Encoding even when this request is not compressed
+        response.vary.add('Accept-Encoding')
+        encoder = self.negotiate(request.accept_encodings)
+        if encoder is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(encoder, response.iter_encoded())
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(compress(encoder, response.get_data()))
+        response.headers['Content-Encoding'] = encoder.name
+
+        # A strong ETag promises identical bytes, so each encoding gets its
+        # own tag; conditional.decoded_etag maps it back for revalidation
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoder.name))
+        return response
+
+def init_app(app, compressor=None):
+    """Compress responses of app according to the COMPRESSION_* settings"""
+    compressor = compressor or ResponseCompressor()
+    app.after_request(compressor)
+    return compressor
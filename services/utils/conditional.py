@@ -0,0 +1,67 @@
+import datetime
+import hashlib
+from flask import request, Response
+from werkzeug.http import http_date, quote_etag
+
+def make_etag(*parts):
+    """Build an opaque ETag value from everything that determines a representation"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return digest[:32]
+
+def parse_db_timestamp(value):
+    """Parse a stored 'YYYY-MM-DD HH:MM:SS' UTC timestamp into an aware datetime"""
+    if not value:
+        return None
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.replace(microsecond=0)
+
+def encoded_etag(etag, encoding):
+    """The strong ETag of the representation of etag sent with a Content-Encoding"""
+    return f"{etag}-{encoding}"
+
+def decoded_etag(tag):
+    """Return the ETag a tag made by encoded_etag was derived from (tag itself otherwise)"""
+    base, _, _ = tag.rpartition('-')
+    return base or tag
+
+def validator_headers(etag, last_modified=None, weak=True):
+    """Response headers advertising the ETag and Last-Modified validators.
+
+    Pass weak=False only where the same etag always means the same bytes,
+    so the tag can be used for strong comparison (e.g. If-Match).
+    """
+    headers = {
+        'ETag': quote_etag(etag, weak=weak),
+        'Cache-Control': 'private, no-cache'
+    }
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+def is_not_modified(etag, last_modified=None):
+    """Evaluate If-None-Match / If-Modified-Since against the current validators.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the client sent no ETag and a last_modified value is supplied. Tags of
+    compressed representations match the ETag they were derived from.
+    """
+    if_none_match = request.if_none_match
+    if if_none_match:
+        return if_none_match.star_tag or any(
+            decoded_etag(tag) == etag for tag in if_none_match.as_set(include_weak=True)
+        )
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+def not_modified_response(headers):
+    """An empty 304 response carrying the validators"""
+    return Response(status=304, headers=headers)
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import threading
+from urllib.parse import urlsplit, parse_qsl
+
+class DatabaseBackend:
+    """Base class for storage backends selected by the DB_URL scheme"""
+
+    name = None
+    health_check_query = 'SELECT 1'
+    connection_errors = (ConnectionError, OSError)
+
+    def __init__(self, url):
+        self.url = url
+
+    def connect(self):
+        """Open and return a new DB-API connection"""
+        raise NotImplementedError
+
+    def executescript(self, conn, script):
+        """Execute a script containing several SQL statements"""
+        raise NotImplementedError
+
+class SQLiteCloudBackend(DatabaseBackend):
+    """Remote SQLite Cloud database (sqlitecloud://...)"""
+
+    name = 'sqlitecloud'
+
+    def __init__(self, url):
+        super().__init__(url)
+        import sqlitecloud
+        self._sqlitecloud = sqlitecloud
+        self.connection_errors = DatabaseBackend.connection_errors + (
+            sqlitecloud.exceptions.SQLiteCloudInterfaceError,
+        )
+
+    def connect(self):
+        return self._sqlitecloud.connect(self.url)
+
+    def executescript(self, conn, script):
+        # SQLite Cloud accepts several statements in a single execute
+        return conn.execute(script)
+
+class SQLiteBackend(DatabaseBackend):
+    """Embedded SQLite database file (sqlite:///relative.db, sqlite:////abs.db, sqlite://:memory:).
+
+    Connections run in autocommit mode like SQLite Cloud; multi-statement
+    transactions are opened explicitly with BEGIN. Pragmas can be overridden
+    with query parameters, e.g. sqlite:///tasks.db?synchronous=FULL.
+    """
+
+    name = 'sqlite'
+    connection_errors = DatabaseBackend.connection_errors + (sqlite3.InterfaceError,)
+
+    DEFAULT_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'foreign_keys': 'ON',
+        'busy_timeout': '5000',
+        'temp_store': 'MEMORY',
+        'mmap_size': os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+        'cache_size': os.getenv('SQLITE_CACHE_SIZE', '-65536'),
+    }
+
+    _memory_counter = 0
+    _memory_lock = threading.Lock()
+
+    def __init__(self, url):
+        super().__init__(url)
+        parts = urlsplit(url)
+        path = (parts.netloc + parts.path) if parts.netloc == ':memory:' else parts.path[1:]
+        self.pragmas = dict(self.DEFAULT_PRAGMAS)
+        self.pragmas.update(parse_qsl(parts.query))
+
+        if path in ('', ':memory:'):
+            # Every pooled connection must see the same in-memory database
+            with SQLiteBackend._memory_lock:
+                SQLiteBackend._memory_counter += 1
+                counter = SQLiteBackend._memory_counter
+            self.database = f'file:memdb{os.getpid()}_{counter}?mode=memory&cache=shared'
+            self.uri = True
+            self.pragmas.pop('journal_mode', None)
+            self.pragmas.pop('mmap_size', None)
+        else:
+            self.database = path
+            self.uri = False
+
+    def connect(self):
+        conn = sqlite3.connect(self.database, uri=self.uri, isolation_level=None,
+                               check_same_thread=False)
+        for pragma, value in self.pragmas.items():
+            if not pragma.isidentifier():
+                raise ValueError(f"Invalid SQLite pragma: {pragma!r}")
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def executescript(self, conn, script):
+        return conn.executescript(script)
+
+BACKENDS = {
+    'sqlitecloud': SQLiteCloudBackend,
+    'sqlite': SQLiteBackend,
+}
+
+def get_backend(url):
+    """Return the backend instance for a database URL, chosen by its scheme"""
+    scheme = urlsplit(url).scheme
+    backend_class = BACKENDS.get(scheme)
+    if backend_class is None:
+        raise ValueError(f"Unsupported database URL scheme: {scheme!r}")
+    return backend_class(url)
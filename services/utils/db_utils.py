@@ -1,32 +1,439 @@
 import os
-import sqlitecloud
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from services.utils.db_backends import get_backend
+from services.utils.metrics import registry, observe_query
 # Load environment variables from the correct path
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '.env', '.env'))
 
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out before the timeout"""
+
+class PooledConnection:
+    """Connection checked out of a ConnectionPool.
+
+    Behaves like the underlying DB-API connection, except that close()
+    hands the connection back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(discard=exc_type is not None and self._pool.is_connection_error(exc_value))
+
+    @property
+    def raw(self):
+        """The underlying driver connection"""
+        return self._conn
+
+    @property
+    def pool(self):
+        """The pool this connection was checked out of"""
+        return self._pool
+
+    def close(self, discard=False):
+        """Return the connection to the pool (or drop it if discard is set)"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, discard=discard)
+
+class ConnectionPool:
+    """Thread-safe bounded pool of database connections.
+
+    connect is a zero-argument callable returning a new DB-API connection.
+    Connections idle for longer than health_check_after seconds are pinged
+    before being handed out, and idle connections above min_size are closed
+    once they have been unused for max_idle seconds. Exceptions that are
+    instances of connection_errors cause the connection to be discarded
+    instead of returned to the pool.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0,
+                 max_idle=300.0, health_check_after=5.0, health_check_query='SELECT 1',
+                 connection_errors=(sqlite3.InterfaceError, ConnectionError, OSError)):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.health_check_query = health_check_query
+        self.connection_errors = connection_errors
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = []  # list of (conn, returned_at), most recently returned last
+        self._size = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'closed': 0,
+            'evicted': 0,
+            'failed_health_checks': 0,
+            'timeouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+        }
+
+        for _ in range(min_size):
+            conn = self._new_connection()
+            with self._lock:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._lock:
+            self._stats['created'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats['closed'] += 1
+
+    def is_connection_error(self, exc):
+        """Whether an exception means the connection itself is unusable"""
+        return isinstance(exc, self.connection_errors)
+
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.execute(self.health_check_query)
+            cursor.fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self, now):
+        """Drop connections idle past max_idle while keeping min_size open"""
+        if self.max_idle is None:
+            return []
+        evicted = []
+        keep = []
+        # Oldest connections sit at the front of the idle list
+        for conn, returned_at in self._idle:
+            if self._size - len(evicted) > self.min_size and now - returned_at > self.max_idle:
+                evicted.append(conn)
+            else:
+                keep.append((conn, returned_at))
+        if evicted:
+            self._idle = keep
+            self._size -= len(evicted)
+            self._stats['evicted'] += len(evicted)
+        return evicted
+
+    def acquire(self, timeout=None):
+        """Check out a raw connection, waiting up to timeout seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            conn = None
+            idle_since = None
+            create = False
+            with self._lock:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                evicted = self._evict_idle_locked(started)
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f"Timed out after {timeout}s waiting for a database connection")
+                    self._waiters += 1
+                    try:
+                        self._available.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+                    if self._closed:
+                        raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+                self._in_use += 1
+
+            for stale in evicted:
+                self._close_quietly(stale)
+
+            if create:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._available.notify()
+                    raise
+            elif self.health_check_after is not None and time.monotonic() - idle_since >= self.health_check_after:
+                if not self._is_healthy(conn):
+                    with self._lock:
+                        self._stats['failed_health_checks'] += 1
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._available.notify()
+                    self._close_quietly(conn)
+                    continue
+
+            waited = time.monotonic() - started
+            with self._lock:
+                self._stats['checkouts'] += 1
+                self._stats['total_wait_time'] += waited
+                if waited > self._stats['max_wait_time']:
+                    self._stats['max_wait_time'] = waited
+            return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, closing it if discard is set"""
+        if not discard:
+            try:
+                # Never hand out a connection with a half-finished transaction
+                if getattr(conn, 'in_transaction', False):
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._available.notify()
+
+        if discard or self._closed:
+            self._close_quietly(conn)
+
+    def checkout(self, timeout=None):
+        """Check out a connection wrapped so that close() returns it to the pool"""
+        return PooledConnection(self, self.acquire(timeout))
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager yielding a pooled connection"""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except Exception as e:
+            discard = self.is_connection_error(e)
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def stats(self):
+        """Return a snapshot of pool usage counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiters': self._waiters,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            })
+        checkouts = stats['checkouts']
+        stats['avg_wait_time'] = stats['total_wait_time'] / checkouts if checkouts else 0.0
+        return stats
+
+    def close(self):
+        """Close all idle connections; in-use ones are closed when released"""
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle = []
+            self._available.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+def local_sqlite_connector(path=':memory:'):
+    """Return a connect callable for a local SQLite file.
+
+    Used as an offline stand-in for SQLite Cloud in tests and local runs.
+    """
+    def connect():
+        return sqlite3.connect(path, check_same_thread=False)
+    return connect
+
+_backend = None
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_db_backend():
+    """Return the storage backend selected by the DB_URL scheme"""
+    global _backend
+    if _backend is None:
+        db_url = os.getenv('DB_URL')
+        if not db_url:
+            raise ValueError("Database URL not found in environment variables")
+        _backend = get_backend(db_url)
+    return _backend
+
+def create_pool(backend=None):
+    """Build a pool configured from the DB_POOL_* environment variables"""
+    backend = backend or get_db_backend()
+    return ConnectionPool(
+        backend.connect,
+        min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        max_idle=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        health_check_after=float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '5')),
+        health_check_query=backend.health_check_query,
+        connection_errors=backend.connection_errors,
+    )
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = create_pool()
+    return _pool
+
+def set_pool(pool):
+    """Replace the process-wide pool (closing the previous one)"""
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    if previous is not None and previous is not pool:
+        previous.close()
+
+def _reset_pool_after_fork():
+    # Connections must never be shared across processes; the child starts
+    # with an empty pool and leaves the parent's sockets/handles alone
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+def configure_database(db_url):
+    """Point the process at a new database URL, replacing backend and pool"""
+    global _backend
+    backend = get_backend(db_url)
+    _backend = backend
+    set_pool(create_pool(backend))
+    return backend
+
 def get_db_connection():
-    """Create and return a database connection"""
-    db_url = os.getenv('DB_URL')
-    if not db_url:
-        raise ValueError("Database URL not found in environment variables")
-    return sqlitecloud.connect(db_url)
+    """Check out a database connection from the pool.
+
+    Calling close_connection() on it returns it to the pool; pass the
+    exception the caller hit so a broken connection is dropped instead.
+    """
+    return get_pool().checkout()
+
+@contextmanager
+def db_connection():
+    """Context manager yielding a pooled database connection"""
+    with get_pool().connection() as conn:
+        yield conn
+
+def _pool_metrics():
+    if _pool is None:
+        return {}
+    stats = _pool.stats()
+    return {(state,): stats[state] for state in ('in_use', 'idle', 'waiters', 'size', 'max_size')}
+
+# Checkout waits are read from the pool's own counters at scrape time, so a
+# checkout costs no extra clock reads or histogram update
+def _pool_acquire_seconds():
+    return {(): _pool.stats()['total_wait_time']} if _pool is not None else {}
+
+def _pool_checkouts():
+    return {(): _pool.stats()['checkouts']} if _pool is not None else {}
+
+registry.gauge('db_pool_connections', 'Connection pool occupancy', ('state',), callback=_pool_metrics)
+registry.gauge('db_connection_acquire_seconds_total', 'Time spent checking connections out of the pool',
+               callback=_pool_acquire_seconds, type_name='counter')
+registry.gauge('db_connection_checkouts_total', 'Connections checked out of the pool',
+               callback=_pool_checkouts, type_name='counter')
+
+def execute_script(conn, script):
+    """Execute a multi-statement SQL script on the configured backend"""
+    return get_db_backend().executescript(conn, script)
 
 def execute_query(conn, query, params=None):
     """Execute a query and return cursor"""
-    return conn.execute(query, params or ())
+    started = time.perf_counter()
+    try:
+        return conn.execute(query, params or ())
+    finally:
+        observe_query(query, started)
 
 def execute_update(conn, query, params=None):
     """Execute an update query and return cursor"""
-    cursor = conn.execute(query, params or ())
-    conn.commit()
-    return cursor
+    started = time.perf_counter()
+    try:
+        cursor = conn.execute(query, params or ())
+        conn.commit()
+        return cursor
+    finally:
+        observe_query(query, started)
+
+def execute_many(conn, query, seq_of_params):
+    """Execute a statement once per parameter tuple and return cursor"""
+    started = time.perf_counter()
+    try:
+        return conn.executemany(query, seq_of_params)
+    finally:
+        observe_query(query, started)
+
+@contextmanager
+def transaction(conn, immediate=False):
+    """Run the enclosed statements as one transaction with a single commit.
+
+    immediate takes the write lock up front, so rows read inside the
+    transaction cannot change before the writes that depend on them.
+    """
+    execute_query(conn, "BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
 
 def close_cursor(cursor):
     """Close the cursor"""
     if cursor:
         cursor.close()
 
-def close_connection(conn):
-    """Close the database connection"""
+def close_connection(conn, exc=None):
+    """Close the database connection.
+
+    A pooled connection goes back to the pool, unless exc (the error the
+    caller ran into while using it) means the connection itself is broken.
+    """
     if conn:
-        conn.close() 
\ No newline at end of file
+        if isinstance(conn, PooledConnection):
+            conn.close(discard=exc is not None and conn.pool.is_connection_error(exc))
+        else:
+            conn.close()
@@ -0,0 +1,106 @@
+import re
+from services.utils.pagination import parse_timestamp
+
+TASK_STATUSES = ('pending', 'in_progress', 'completed')
+
+# Sortable columns; each is backed by an index starting with user_id
+TASK_SORT_FIELDS = ('created_at', 'updated_at', 'title')
+
+# Search terms beyond this are ignored to bound the cost of a MATCH
+MAX_SEARCH_TERMS = 16
+
+_TIMESTAMP_FILTERS = (
+    ('created_after', 'created_at >= ?'),
+    ('created_before', 'created_at < ?'),
+    ('updated_after', 'updated_at >= ?'),
+    ('updated_before', 'updated_at < ?'),
+)
+
+_SEARCH_TERM = re.compile(r'\w+', re.UNICODE)
+
+class InvalidFilter(ValueError):
+    """Raised with a client-facing message when a filter parameter is invalid"""
+
+def search_expression(text):
+    """Turn free text into an FTS5 MATCH expression, or None if it has no terms.
+
+    Every word becomes a quoted prefix query, so user input can never be
+    parsed as FTS5 syntax; words are ANDed together.
+    """
+    terms = _SEARCH_TERM.findall(text or '')[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def parse_task_filters(args, sortable=True):
+    """Validate filter, search and sort query parameters.
+
+    Returns a dict with only the supplied filters plus sort and order, so it
+    can double as a cache key. Raises InvalidFilter for bad values.
+    """
+    filters = {}
+
+    status = args.get('status')
+    if status:
+        if status not in TASK_STATUSES:
+            raise InvalidFilter(f"Status must be one of: {', '.join(TASK_STATUSES)}")
+        filters['status'] = status
+
+    for name, _ in _TIMESTAMP_FILTERS:
+        try:
+            value = parse_timestamp(args.get(name))
+        except ValueError:
+            raise InvalidFilter(f"{name} must be an ISO 8601 timestamp")
+        if value:
+            filters[name] = value
+
+    search = search_expression(args.get('q'))
+    if search:
+        filters['q'] = search
+
+    if sortable:
+        sort = args.get('sort', 'created_at')
+        if sort not in TASK_SORT_FIELDS:
+            raise InvalidFilter(f"Sort must be one of: {', '.join(TASK_SORT_FIELDS)}")
+        order = args.get('order', 'desc').lower()
+        if order not in ('asc', 'desc'):
+            raise InvalidFilter("Order must be asc or desc")
+        filters['sort'] = sort
+        filters['order'] = order
+    return filters
+
+def counts_answer(filters):
+    """Return True when the per-user status counters can count these filters"""
+    return not any(filters.get(name) for name, _ in _TIMESTAMP_FILTERS) and not filters.get('q')
+
+def filter_cache_key(filters):
+    """Return a stable string identifying a set of parsed filters"""
+    return '&'.join(f"{name}={filters[name]}" for name in sorted(filters))
+
+def task_conditions(user_id, filters):
+    """Return (WHERE clause, params) selecting a user's tasks that match filters"""
+    conditions = ["user_id = ?"]
+    params = [user_id]
+    if filters.get('status'):
+        conditions.append("status = ?")
+        params.append(filters['status'])
+    for name, condition in _TIMESTAMP_FILTERS:
+        if filters.get(name):
+            conditions.append(condition)
+            params.append(filters[name])
+    if filters.get('q'):
+        conditions.append("id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+        params.append(filters['q'])
+    return " AND ".join(conditions), params
+
+def task_ordering(filters):
+    """Return (sort column, ORDER BY clause); id breaks ties so keysets are unique"""
+    sort = filters.get('sort', 'created_at')
+    direction = 'ASC' if filters.get('order') == 'asc' else 'DESC'
+    return sort, f"ORDER BY {sort} {direction}, id {direction}"
+
+def keyset_condition(filters):
+    """Return the condition selecting rows after a (sort value, id) position"""
+    sort = filters.get('sort', 'created_at')
+    operator = '>' if filters.get('order') == 'asc' else '<'
+    return f"({sort}, id) {operator} (?, ?)"
@@ -0,0 +1,252 @@
+import re
+import threading
+from services.utils.db_utils import get_db_connection, execute_query, transaction, close_cursor, close_connection
+from services.utils.metrics import registry
+
+group_commit_batch_size = registry.histogram(
+    'group_commit_batch_size', 'Writes committed per group-commit transaction',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+group_commit_statements = registry.histogram(
+    'group_commit_statements', 'Statements run per group-commit transaction',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+# Bound parameters per merged INSERT; SQLite before 3.32 allows at most 999
+MAX_MERGED_PARAMS = 999
+
+_INSERT_HEAD = re.compile(r'\s*INSERT\s+INTO\s[^;]+?\bVALUES\s*\(', re.IGNORECASE)
+_RETURNING = re.compile(r'RETURNING\s+(.+)$', re.IGNORECASE | re.DOTALL)
+
+def insert_shape(query):
+    """Split a single-row 'INSERT INTO ... VALUES (...) [RETURNING ...]'.
+
+    Returns (head, values, returning), with returning None when the
+    statement has no RETURNING clause, or None for any other statement
+    (including INSERT OR ..., ON CONFLICT and multi-row inserts).
+    """
+    match = _INSERT_HEAD.match(query)
+    if not match:
+        return None
+    start = match.end() - 1
+    depth = 0
+    quoted = False
+    for end in range(start, len(query)):
+        char = query[end]
+        if quoted:
+            quoted = char != "'"
+        elif char == "'":
+            quoted = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                break
+    else:
+        return None
+    rest = query[end + 1:].strip().rstrip(';').rstrip()
+    returning = None
+    if rest:
+        match = _RETURNING.match(rest)
+        if not match:
+            return None
+        returning = match.group(1)
+    return query[:start], query[start:end + 1], returning
+
+class _Write:
+    __slots__ = ('query', 'params', 'rowcount', 'result', 'error')
+
+    def __init__(self, query, params, rowcount):
+        self.query = query
+        self.params = params
+        self.rowcount = rowcount
+        self.result = None
+        self.error = None
+
+class _Batch:
+    __slots__ = ('writes', 'full', 'done')
+
+    def __init__(self):
+        self.writes = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+class GroupCommitQueue:
+    """Commits single-statement writes from concurrent requests together.
+
+    The first write to arrive leads a batch: it waits up to window seconds
+    (or until max_batch writes have joined), waits for the previous batch
+    to finish committing, and then runs every write of its batch in one
+    transaction on one connection. Writes arriving while a batch commits
+    join the next one, so batches grow with commit latency and each batch
+    costs a single commit instead of one per request.
+
+    A statement that fails without ending the transaction (e.g. a
+    constraint violation) only fails its own caller. Callers block until
+    their batch has committed and get their own RETURNING row (or
+    rowcount) back.
+
+    Single-row INSERTs of the same statement are merged into one
+    multi-row INSERT, so a batch of creates costs one statement. Their
+    RETURNING rows are matched to callers by rowid, which assumes the
+    statement lets SQLite assign it (as every task insert does). If the
+    merged statement fails (e.g. one row violates a constraint) its writes
+    are retried one by one so only the offending caller fails. Other
+    statements still run one after another, so where every statement is a
+    network round trip a batch of updates takes longer than the individual
+    writes would in parallel. With inserts_only, accepts() turns such
+    statements away so the caller can commit them directly.
+    benchmarks/bench_group_commit.py measures both cases.
+    """
+
+    def __init__(self, window=0.002, max_batch=64, connect=get_db_connection, inserts_only=False):
+        self.window = window
+        self.max_batch = max_batch
+        self.inserts_only = inserts_only
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._batch = None  # the batch currently accepting writes
+
+    def accepts(self, query):
+        """Return whether query should go through this queue rather than commit on its own"""
+        return not self.inserts_only or insert_shape(query) is not None
+
+    def execute(self, query, params=(), rowcount=False):
+        """Run a write statement in the next group commit.
+
+        Returns its first result row (for RETURNING statements), or the
+        number of rows changed when rowcount is set. Raises the error the
+        statement or the commit failed with.
+        """
+        write = _Write(query, params, rowcount)
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            batch.writes.append(write)
+            if len(batch.writes) >= self.max_batch:
+                # Later writes start a new batch; wake the leader early
+                self._batch = None
+                batch.full.set()
+
+        if leader:
+            try:
+                batch.full.wait(self.window)
+                with self._commit_lock:
+                    with self._lock:
+                        if self._batch is batch:
+                            self._batch = None
+                    self._commit(batch.writes)
+            except BaseException as e:
+                # The followers must not wait forever on a batch that never committed
+                for other in batch.writes:
+                    if other.error is None:
+                        other.result = None
+                        other.error = e
+                raise
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    def _commit(self, writes):
+        group_commit_batch_size.observe(len(writes))
+        conn = None
+        error = None
+        try:
+            conn = self._connect()
+            statements = 0
+            with transaction(conn, immediate=True):
+                for group, shape in self._groups(writes):
+                    if shape is None:
+                        self._run(conn, group[0])
+                        statements += 1
+                    else:
+                        statements += self._run_merged(conn, group, shape)
+            group_commit_statements.observe(statements)
+        except Exception as e:
+            error = e
+            # Nothing in the batch was committed
+            for write in writes:
+                write.result = None
+                write.error = write.error or e
+        finally:
+            close_connection(conn, error)
+
+    @staticmethod
+    def _groups(writes):
+        """Yield (writes, insert shape) with mergeable INSERTs collected together.
+
+        Writes in a batch come from concurrent callers, so running them out
+        of arrival order is no different from them arriving in that order.
+        """
+        inserts = {}
+        for write in writes:
+            shape = insert_shape(write.query) if isinstance(write.params, (tuple, list)) else None
+            if shape is None:
+                yield [write], None
+            else:
+                inserts.setdefault(write.query, ([], shape))[0].append(write)
+        for group, shape in inserts.values():
+            if len(group) == 1:
+                yield group, None
+            else:
+                yield group, shape
+
+    def _run_merged(self, conn, writes, shape):
+        """Run writes as multi-row INSERTs; return the number of statements run"""
+        head, values, returning = shape
+        per_statement = max(1, MAX_MERGED_PARAMS // max(1, len(writes[0].params)))
+        statements = 0
+        for offset in range(0, len(writes), per_statement):
+            chunk = writes[offset:offset + per_statement]
+            query = head + ','.join([values] * len(chunk))
+            if returning is not None:
+                query += f' RETURNING rowid, {returning}'
+            params = [param for write in chunk for param in write.params]
+            cursor = None
+            try:
+                cursor = execute_query(conn, query, params)
+                rows = sorted(cursor.fetchall(), key=lambda row: row[0]) if returning is not None else None
+            except Exception:
+                if not getattr(conn, 'in_transaction', True):
+                    raise
+                # The failed statement was undone on its own; find the culprit
+                for write in chunk:
+                    self._run(conn, write)
+                statements += 1 + len(chunk)
+                continue
+            finally:
+                close_cursor(cursor)
+            statements += 1
+            if rows is not None and len(rows) != len(chunk):
+                raise RuntimeError(f"Merged INSERT returned {len(rows)} rows for {len(chunk)} writes")
+            for index, write in enumerate(chunk):
+                if write.rowcount:
+                    write.result = 1
+                elif rows is not None:
+                    write.result = tuple(rows[index][1:])
+        return statements
+
+    def _run(self, conn, write):
+        cursor = None
+        try:
+            cursor = execute_query(conn, write.query, write.params)
+            write.result = cursor.rowcount if write.rowcount else cursor.fetchone()
+        except Exception as e:
+            # SQLite undoes just the failed statement for errors such as a
+            # constraint violation; anything that ended the transaction
+            # fails the whole batch
+            if not getattr(conn, 'in_transaction', True):
+                raise
+            write.error = e
+        finally:
+            close_cursor(cursor)
@@ -0,0 +1,127 @@
+import datetime
+import os
+import threading
+import time
+from services.utils.db_utils import PoolTimeout, get_pool, close_cursor, close_connection
+
+# Seconds a probe result is reused, so load balancer checks don't load the database
+HEALTH_PROBE_TTL = float(os.getenv('HEALTH_PROBE_TTL', '2'))
+
+# Seconds the probe waits for a pooled connection before reporting the pool exhausted
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', '1'))
+
+# Probe latency (seconds) and pool usage (fraction of max_size) reported as degraded
+HEALTH_DEGRADED_LATENCY = float(os.getenv('HEALTH_DEGRADED_LATENCY', '0.25'))
+HEALTH_DEGRADED_SATURATION = float(os.getenv('HEALTH_DEGRADED_SATURATION', '0.8'))
+
+OK = 'ok'
+DEGRADED = 'degraded'
+DOWN = 'down'
+
+def _pool_summary(pool):
+    stats = pool.stats()
+    saturation = stats['in_use'] / stats['max_size'] if stats['max_size'] else 0.0
+    return {
+        'in_use': stats['in_use'],
+        'idle': stats['idle'],
+        'waiters': stats['waiters'],
+        'max_size': stats['max_size'],
+        'saturation': round(saturation, 3)
+    }
+
+def probe_database(pool=None, timeout=HEALTH_PROBE_TIMEOUT, degraded_latency=HEALTH_DEGRADED_LATENCY,
+                   degraded_saturation=HEALTH_DEGRADED_SATURATION):
+    """Run the pool's health check query and report latency and pool saturation.
+
+    A pool with no connection to spare within timeout is degraded: the
+    database may be fine and the worker still serving. Failing to connect
+    or to run the query (including a bad database configuration) is down.
+    """
+    conn = None
+    cursor = None
+    started = time.perf_counter()
+    try:
+        if pool is None:
+            pool = get_pool()
+        conn = pool.checkout(timeout=timeout)
+        cursor = conn.execute(pool.health_check_query)
+        cursor.fetchall()
+    except PoolTimeout as e:
+        return {
+            'state': DEGRADED,
+            'reasons': ['connection pool exhausted'],
+            'error': str(e) or e.__class__.__name__,
+            'pool': _pool_summary(pool)
+        }
+    except Exception as e:
+        if conn is not None and pool.is_connection_error(e):
+            conn.close(discard=True)
+            conn = None
+        return {'state': DOWN, 'error': str(e) or e.__class__.__name__}
+    finally:
+        close_cursor(cursor)
+        close_connection(conn)
+    latency = time.perf_counter() - started
+
+    summary = _pool_summary(pool)
+    reasons = []
+    if latency >= degraded_latency:
+        reasons.append('slow database')
+    if summary['saturation'] >= degraded_saturation or summary['waiters']:
+        reasons.append('connection pool saturated')
+    result = {
+        'state': DEGRADED if reasons else OK,
+        'latency_ms': round(latency * 1000, 3),
+        'pool': summary
+    }
+    if reasons:
+        result['reasons'] = reasons
+    return result
+
+class ReadinessProbe:
+    """Dependency checks whose combined result is cached for a short TTL.
+
+    Only one caller runs the checks when the cached result expires; callers
+    arriving meanwhile get the previous result instead of piling onto the
+    database.
+    """
+
+    def __init__(self, checks, ttl=HEALTH_PROBE_TTL, clock=time.monotonic):
+        self.checks = checks  # name -> callable returning a dict with a 'state'
+        self.ttl = ttl
+        self._clock = clock
+        self._result = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _run(self):
+        results = {name: check() for name, check in self.checks.items()}
+        states = {result['state'] for result in results.values()}
+        state = DOWN if DOWN in states else DEGRADED if DEGRADED in states else OK
+        return {
+            'state': state,
+            'checked_at': datetime.datetime.utcnow().isoformat(),
+            'checks': results
+        }
+
+    def result(self):
+        """Return (result, cached), re-running the checks once the TTL has passed"""
+        result = self._result
+        if result is not None and self._clock() < self._expires_at:
+            return result, True
+        if not self._lock.acquire(blocking=result is None):
+            return result, True
+        try:
+            if self._result is not None and self._clock() < self._expires_at:
+                return self._result, True
+            self._result = self._run()
+            self._expires_at = self._clock() + self.ttl
+            return self._result, False
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+
+readiness_probe = ReadinessProbe({'database': probe_database})
@@ -0,0 +1,200 @@
+import json
+import os
+import uuid
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from flask import make_response
+
+# JSON library used for responses: auto, orjson, ujson or json
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto')
+
+class RowSet:
+    """Database rows serialized as a list of objects keyed by columns.
+
+    Handlers return this in place of a list of per-row dicts; the stdlib
+    and ujson backends write the objects straight from the row tuples. Rows must be plain
+    tuples (or sequences) in column order.
+    """
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns, rows):
+        self.columns = tuple(columns)
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        columns = self.columns
+        return (dict(zip(columns, row)) for row in self.rows)
+
+    def __getstate__(self):
+        return self.columns, [tuple(row) for row in self.rows]
+
+    def __setstate__(self, state):
+        self.columns, self.rows = state
+
+def _encode_value(value):
+    cls = value.__class__
+    if cls is str:
+        return encode_basestring_ascii(value)
+    if cls is int:
+        return int.__repr__(value)
+    if value is None:
+        return 'null'
+    return json.dumps(value, default=str)
+
+def _kind(value):
+    cls = value.__class__
+    return 's' if cls is str else 'i' if cls is int else 'o'
+
+@lru_cache(maxsize=64)
+def _row_encoder(columns, kinds):
+    """Compile a function rendering one row as a JSON object.
+
+    kinds holds the type seen in a sample row per column: 's' values are
+    escaped with the C string encoder, 'i' values formatted with %d and
+    anything else goes through _encode_value. A row that does not match
+    (e.g. a NULL in a text column, or a float or bool in an integer one,
+    which %d would silently truncate) raises TypeError and is re-encoded
+    generically by the caller.
+    """
+    fields = []
+    calls = []
+    checks = []
+    for index, (column, kind) in enumerate(zip(columns, kinds)):
+        key = encode_basestring_ascii(column)
+        fields.append(f'{key}:%d' if kind == 'i' else f'{key}:%s')
+        calls.append(f'row[{index}]' if kind == 'i' else f"{'esc' if kind == 's' else 'enc'}(row[{index}])")
+        if kind == 'i':
+            checks.append(f'row[{index}].__class__ is not int')
+    template = '{' + ','.join(fields) + '}'
+    namespace = {'template': template, 'esc': encode_basestring_ascii, 'enc': _encode_value}
+    body = f"    if {' or '.join(checks)}:\n        raise TypeError\n" if checks else ''
+    exec(f"def encode(row):\n{body}    return template % ({', '.join(calls)},)", namespace)
+    return namespace['encode']
+
+@lru_cache(maxsize=64)
+def _generic_template(columns):
+    return '{' + ','.join(f'{encode_basestring_ascii(column)}:%s' for column in columns) + '}'
+
+def encode_rows_stdlib(rowset):
+    """Return the JSON array for rowset without building per-row dicts"""
+    rows = rowset.rows
+    if not rows:
+        return '[]'
+    encode = _row_encoder(rowset.columns, tuple(map(_kind, rows[0])))
+    parts = []
+    for row in rows:
+        try:
+            parts.append(encode(row))
+        except TypeError:
+            parts.append(_generic_template(rowset.columns) % tuple(map(_encode_value, row)))
+    return '[' + ','.join(parts) + ']'
+
+class StdlibBackend:
+    """json module backend; RowSets are spliced in as pre-encoded text"""
+
+    name = 'json'
+
+    def __init__(self):
+        # Placeholders are unguessable so user data can never be mistaken for one
+        self._marker = f'\x00rows-{uuid.uuid4().hex}-'
+
+    def _dumps(self, obj, default):
+        return json.dumps(obj, default=default, separators=(',', ':'))
+
+    def dumps(self, obj):
+        fragments = []
+
+        def default(value):
+            if isinstance(value, RowSet):
+                fragments.append(encode_rows_stdlib(value))
+                return f'{self._marker}{len(fragments) - 1}'
+            raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
+
+        text = self._dumps(obj, default)
+        if fragments:
+            quoted_marker = self._dumps(self._marker, None)[:-1]
+            for index, fragment in enumerate(fragments):
+                text = text.replace(f'{quoted_marker}{index}"', fragment, 1)
+        return text.encode('utf-8')
+
+class UJSONBackend(StdlibBackend):
+    name = 'ujson'
+
+    def __init__(self, module):
+        super().__init__()
+        self._ujson = module
+
+    def _dumps(self, obj, default):
+        if default is None:
+            return self._ujson.dumps(obj, ensure_ascii=True)
+        return self._ujson.dumps(obj, ensure_ascii=True, default=default)
+
+class ORJSONBackend:
+    """orjson backend; RowSets are expanded to per-row dicts for orjson.
+
+    Unlike the other backends this does build a dict per row: orjson's C
+    encoder turns them into JSON faster than the compiled row templates
+    can, even when their output is embedded with orjson.Fragment
+    (benchmarks/bench_json.py measures both).
+    """
+
+    name = 'orjson'
+
+    def __init__(self, module):
+        self._orjson = module
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, RowSet):
+            columns = value.columns
+            return [dict(zip(columns, row)) for row in value.rows]
+        raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj, default=self._default, option=self._orjson.OPT_NON_STR_KEYS)
+
+def load_backend(name=JSON_ENCODER):
+    """Return the encoder backend for name, trying orjson then ujson for auto"""
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson
+            return ORJSONBackend(orjson)
+        except ImportError:
+            if name == 'orjson':
+                raise
+    if name in ('auto', 'ujson'):
+        try:
+            import ujson
+            return UJSONBackend(ujson)
+        except ImportError:
+            if name == 'ujson':
+                raise
+    if name not in ('auto', 'json'):
+        raise ValueError(f"Unknown JSON encoder: {name}")
+    return StdlibBackend()
+
+backend = load_backend()
+
+def set_backend(new_backend):
+    """Use a different encoder backend for responses"""
+    global backend
+    backend = new_backend
+
+def dumps(obj):
+    """Serialize obj (which may contain RowSets) to UTF-8 JSON bytes"""
+    return backend.dumps(obj)
+
+def output_json(data, code, headers=None):
+    """flask-restx representation for application/json using the fast encoder"""
+    response = make_response(dumps(data) + b'\n', code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
+
+def init_api(api):
+    """Serialize every JSON response of api through this module"""
+    api.representations['application/json'] = output_json
@@ -0,0 +1,178 @@
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from flask import request
+
+# Minimum level written by the service
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+# Fraction of DEBUG records kept; the rest are dropped before being queued
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+
+# Records buffered for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Request id of the request being handled on the current thread, if any
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# LogRecord attributes that are not user-supplied extra fields
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line.
+
+    Fields passed through extra= are included as top-level keys.
+    """
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class _Stdout:
+    """Resolve sys.stdout on every write so later redirection is honoured"""
+
+    def write(self, data):
+        return sys.stdout.write(data)
+
+    def flush(self):
+        sys.stdout.flush()
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id and sample DEBUG records"""
+
+    def __init__(self, debug_sample_rate=LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the writer thread.
+
+    The stdlib handler formats every record on the calling thread; here the
+    record is queued as-is, so the request thread only pays for building
+    the LogRecord. When the queue is full the record is dropped and counted
+    rather than blocking the request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+def configure_logging(level=LOG_LEVEL, stream=None, debug_sample_rate=LOG_DEBUG_SAMPLE_RATE,
+                      queue_size=LOG_QUEUE_SIZE):
+    """Send root logger output through a queue to a background JSON writer.
+
+    Safe to call more than once; later calls only adjust the level and the
+    debug sample rate.
+    """
+    global _listener, _handler
+    root = logging.getLogger()
+    with _configure_lock:
+        root.setLevel(level)
+        if _handler is not None:
+            for log_filter in _handler.filters:
+                if isinstance(log_filter, RequestContextFilter):
+                    log_filter.debug_sample_rate = debug_sample_rate
+            return _handler
+
+        writer = logging.StreamHandler(stream or _Stdout())
+        writer.setFormatter(JsonFormatter())
+        _handler = LazyQueueHandler(queue.Queue(maxsize=queue_size))
+        _handler.addFilter(RequestContextFilter(debug_sample_rate))
+        root.addHandler(_handler)
+        _listener = logging.handlers.QueueListener(_handler.queue, writer, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _handler
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener, _handler
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            logging.getLogger().removeHandler(_handler)
+        _listener = None
+        _handler = None
+
+def _reset_logging_after_fork():
+    # The writer thread does not survive fork; start a fresh one in the child
+    global _listener, _handler, _configure_lock
+    _configure_lock = threading.Lock()
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        writers = _listener.handlers if _listener is not None else ()
+        _listener = None
+        _handler = None
+        stream = writers[0].stream if writers else None
+        configure_logging(logging.getLogger().level, stream)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_logging_after_fork)
+
+def init_app(app):
+    """Configure logging and tag each request with a request id"""
+    configure_logging()
+
+    @app.before_request
+    def _bind_request_id():
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        request_id_var.set(request_id[:128])
+
+    @app.after_request
+    def _add_request_id_header(response):
+        request_id = request_id_var.get()
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(exc):
+        request_id_var.set(None)
@@ -0,0 +1,538 @@
+import atexit
+import bisect
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from flask.globals import _cv_request
+
+logger = logging.getLogger(__name__)
+
+# Directory shared by the processes of one server (e.g. gunicorn workers).
+# When set, every process saves its metrics there and /api/metrics reports
+# the sum over all of them; launcher.py sets one up for its workers
+METRICS_DIR = os.getenv('METRICS_DIR')
+
+# Seconds between saves of a process's metrics to METRICS_DIR, i.e. how far
+# behind the other workers' numbers in a scrape can be
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow remote queries
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Payload size buckets in bytes
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Observations buffered by a hot-path series before they are bucketed
+OBSERVATION_BUFFER_SIZE = 256
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels"""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Histogram:
+    """Bucketed distribution of observations, optionally split by labels"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, lock=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._buffered = {}  # labels -> HistogramSeries handed out by labels()
+        # Histograms updated together can share a lock to take it once
+        self._lock = lock or threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def values(self, *labels):
+        """Return the [bucket counts..., +Inf count, sum] list of a label set.
+
+        Callers updating it directly must hold the histogram's lock.
+        """
+        with self._lock:
+            values = self._series.get(labels)
+            if values is None:
+                values = self._series[labels] = [0] * (len(self.buckets) + 2)
+        return values
+
+    def labels(self, *labels):
+        """Return the buffered series of labels, for hot paths that observe it repeatedly"""
+        series = self._buffered.get(labels)
+        if series is None:
+            values = self.values(*labels)
+            with self._lock:
+                series = self._buffered.get(labels)
+                if series is None:
+                    series = self._buffered[labels] = HistogramSeries(self.buckets, self._lock, values)
+        return series
+
+    def flush(self):
+        """Bucket the observations buffered by series from labels()"""
+        for series in list(self._buffered.values()):
+            series.flush()
+
+    def count(self, *labels):
+        self.flush()
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, *labels):
+        self.flush()
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def samples(self):
+        self.flush()
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, labels, ('le', _format_value(float(bound)))),
+                       cumulative)
+            yield f'{self.name}_sum', _format_labels(self.labelnames, labels), series[-1]
+            yield f'{self.name}_count', _format_labels(self.labelnames, labels), cumulative
+
+class HistogramSeries:
+    """One label set of a Histogram with buffered observations.
+
+    observe() only appends to a deque, which needs no lock; the values are
+    bucketed under the histogram's lock when it is read, or once
+    OBSERVATION_BUFFER_SIZE of them have piled up.
+    """
+
+    __slots__ = ('buckets', 'lock', 'values', 'pending')
+
+    def __init__(self, buckets, lock, values):
+        self.buckets = buckets
+        self.lock = lock
+        self.values = values  # [bucket counts..., +Inf count, sum]
+        self.pending = deque()
+
+    def observe(self, value):
+        pending = self.pending
+        pending.append(value)
+        if len(pending) >= OBSERVATION_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        pending = self.pending
+        if not pending:
+            return
+        buckets = self.buckets
+        values = self.values
+        with self.lock:
+            # Only flushes take values out, and they hold the lock
+            while pending:
+                value = pending.popleft()
+                values[bisect.bisect_left(buckets, value)] += 1
+                values[-1] += value
+
+class Gauge:
+    """Values read from a callback at scrape time.
+
+    The callback returns a mapping of label tuples to values. Counters kept
+    elsewhere (e.g. cache hit counts) can be exported with type_name='counter'.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), callback=None, type_name='gauge'):
+        self.type_name = type_name
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception:
+            return
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def on_collect(self, callback):
+        """Call callback before every snapshot, e.g. to fold buffered observations"""
+        self._collectors.append(callback)
+        return callback
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, lock=None):
+        return self.register(Histogram(name, documentation, labelnames, buckets, lock))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None, type_name='gauge'):
+        return self.register(Gauge(name, documentation, labelnames, callback, type_name))
+
+    def snapshot(self):
+        """Return [(name, type, documentation, [(sample name, labels, value), ...]), ...]"""
+        for collect in self._collectors:
+            collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [
+            (metric.name, metric.type_name, metric.documentation, list(metric.samples()))
+            for metric in metrics
+        ]
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        return render_snapshot(self.snapshot())
+
+def render_snapshot(families):
+    """Render a Registry.snapshot() in the Prometheus text exposition format"""
+    lines = []
+    for name, type_name, documentation, samples in families:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {type_name}')
+        for sample_name, labels, value in samples:
+            lines.append(f'{sample_name}{labels} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+def merge_snapshots(snapshots):
+    """Sum samples with the same name and labels across snapshots.
+
+    Histogram buckets are cumulative within a process, so their sums are
+    the cumulative buckets of all observations. Gauges describe the moment
+    of the snapshot; callers leave out snapshots of exited processes for
+    them (see MultiProcessStore).
+    """
+    families = {}
+    for snapshot in snapshots:
+        for name, type_name, documentation, samples in snapshot:
+            values = families.setdefault(name, (type_name, documentation, {}))[2]
+            for sample_name, labels, value in samples:
+                key = (sample_name, labels)
+                values[key] = values.get(key, 0) + value
+    return [
+        (name, type_name, documentation, [(sample, labels, value) for (sample, labels), value in values.items()])
+        for name, (type_name, documentation, values) in families.items()
+    ]
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class MultiProcessStore:
+    """Shares a registry's metrics between the processes of one server.
+
+    Each process saves its snapshot to <directory>/<pid>.json every
+    interval seconds (from a thread started by the first request it
+    serves), when it renders, and at exit. render() merges the snapshots
+    of all processes. Counters and histograms of exited processes (e.g.
+    workers recycled by --max-requests) are folded into archive.json so
+    totals never go backwards; their gauges are dropped.
+    """
+
+    ARCHIVE = 'archive.json'
+
+    def __init__(self, directory, registry, interval=METRICS_FLUSH_INTERVAL, is_alive=_process_alive):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self._is_alive = is_alive
+        self._pid = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, snapshot):
+        path = self._path(name)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(temporary, path)
+
+    def _read(self, name):
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def save(self, pid=None):
+        """Write this process's current snapshot"""
+        self._write(f'{pid or os.getpid()}.json', self.registry.snapshot())
+
+    def ensure_started(self):
+        """Start the periodic save in this process if it isn't running yet"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked worker inherits the attribute but not the thread
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='metrics-flush', daemon=True).start()
+
+    def close(self):
+        """Save a final snapshot if this process has been serving requests"""
+        if self._pid == os.getpid():
+            self.save()
+
+    def _run(self):
+        pid = os.getpid()
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.save(pid)
+            except Exception as e:
+                logger.error("Failed to save metrics to %s: %s", self.directory, e)
+
+    def render(self):
+        """Render the merged metrics of every process sharing the directory"""
+        self.save()
+        with open(self._path('.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive = self._read(self.ARCHIVE)
+            snapshots = []
+            exited = []
+            for name in os.listdir(self.directory):
+                pid, _, extension = name.partition('.')
+                if extension != 'json' or not pid.isdigit():
+                    continue
+                snapshot = self._read(name)
+                if self._is_alive(int(pid)):
+                    snapshots.append(snapshot)
+                else:
+                    exited.append((name, snapshot))
+            if exited:
+                archive = merge_snapshots([archive] + [
+                    [family for family in snapshot if family[1] != 'gauge'] for _, snapshot in exited
+                ])
+                self._write(self.ARCHIVE, archive)
+                for name, _ in exited:
+                    os.remove(self._path(name))
+        return render_snapshot(merge_snapshots([archive] + snapshots))
+
+registry = Registry()
+
+multiprocess_store = MultiProcessStore(METRICS_DIR, registry) if METRICS_DIR else None
+
+if multiprocess_store is not None:
+    atexit.register(multiprocess_store.close)
+
+def render_metrics():
+    """Render this process's metrics, or those of every process sharing METRICS_DIR"""
+    if multiprocess_store is None:
+        return registry.render()
+    return multiprocess_store.render()
+
+# The request histograms are updated together once per request, under one lock
+_request_lock = threading.Lock()
+
+request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests',
+    ('method', 'endpoint', 'status'), lock=_request_lock
+)
+request_size = registry.histogram(
+    'http_request_size_bytes', 'Size of HTTP request bodies',
+    ('method', 'endpoint'), buckets=SIZE_BUCKETS, lock=_request_lock
+)
+response_size = registry.histogram(
+    'http_response_size_bytes', 'Size of non-streamed HTTP response bodies',
+    ('method', 'endpoint'), buckets=SIZE_BUCKETS, lock=_request_lock
+)
+db_query_duration = registry.histogram(
+    'db_query_duration_seconds', 'Time spent executing SQL statements',
+    ('query',)
+)
+auth_decode_duration = registry.histogram(
+    'auth_token_verify_seconds', 'Time spent decoding and verifying JWTs not found in the token cache',
+    ('source',)
+)
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+@lru_cache(maxsize=1024)
+def normalize_sql(query):
+    """Collapse a SQL statement into a bounded-cardinality metric label"""
+    normalized = _WHITESPACE.sub(' ', query).strip()
+    normalized = _PLACEHOLDER_LIST.sub('(?)', normalized)
+    return normalized[:200]
+
+# Statement text -> its db_query_duration series; statements are built from a
+# fixed set of templates, and past the cap new ones are looked up each time
+_QUERY_SERIES_MAX = 1024
+_query_series = {}
+
+def observe_query(query, started):
+    """Record the duration of a statement that started at started (perf_counter)"""
+    elapsed = time.perf_counter() - started
+    series = _query_series.get(query)
+    if series is None:
+        series = db_query_duration.labels(normalize_sql(query))
+        if len(_query_series) < _QUERY_SERIES_MAX:
+            _query_series[query] = series
+    # HistogramSeries.observe, inlined on the per-statement path
+    pending = series.pending
+    pending.append(elapsed)
+    if len(pending) >= OBSERVATION_BUFFER_SIZE:
+        series.flush()
+
+# (rule, method, status) -> value lists of the duration, request size and
+# response size series, so folding a request looks up one key, not three
+_request_series = {}
+
+# (url rule, method, status, seconds, raw Content-Length, response bytes)
+# per request, appended by the after_request hook and folded in under one lock
+_pending_requests = deque()
+_flush_lock = threading.Lock()
+
+def _request_values(key):
+    """Create the request histogram value lists for (rule, method, status)"""
+    rule, method, status = key
+    endpoint = rule if rule is not None else 'unmatched'
+    values = _request_series[key] = (
+        request_duration.values(method, endpoint, str(status)),
+        request_size.values(method, endpoint),
+        response_size.values(method, endpoint)
+    )
+    return values
+
+@registry.on_collect
+def flush_requests():
+    """Fold the buffered request observations into the request histograms"""
+    pending = _pending_requests
+    if not pending:
+        return
+    series = _request_series
+    duration_buckets = request_duration.buckets
+    request_buckets = request_size.buckets
+    response_buckets = response_size.buckets
+    bisect_left = bisect.bisect_left
+    with _flush_lock:
+        # Requests only append, so the records counted here stay put
+        popleft = pending.popleft
+        records = [popleft() for _ in range(len(pending))]
+        # Creating a series takes the histogram lock, so look them up first
+        resolved = []
+        for rule, method, status, _, _, _ in records:
+            key = (rule.rule if rule is not None else None, method, status)
+            resolved.append(series.get(key) or _request_values(key))
+        with _request_lock:
+            for values, (_, _, _, elapsed, received, sent) in zip(resolved, records):
+                duration, received_values, sent_values = values
+                duration[bisect_left(duration_buckets, elapsed)] += 1
+                duration[-1] += elapsed
+                # The raw header is enough here; request.content_length
+                # parses it through the header wrapper on every access
+                if received and received != '0' and received.isdigit():
+                    received = int(received)
+                    received_values[bisect_left(request_buckets, received)] += 1
+                    received_values[-1] += received
+                if sent is not None:
+                    sent_values[bisect_left(response_buckets, sent)] += 1
+                    sent_values[-1] += sent
+
+def init_app(app):
+    """Time every request and record payload sizes"""
+    # The hooks read the request context variable directly: resolving the
+    # flask.request and flask.g proxies costs more than recording the request
+    @app.before_request
+    def _start_timer():
+        if multiprocess_store is not None:
+            multiprocess_store.ensure_started()
+        _cv_request.get()._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        ctx = _cv_request.get()
+        try:
+            elapsed = time.perf_counter() - ctx._metrics_started
+        except AttributeError:
+            # An earlier before_request hook failed before the timer started
+            return response
+        current = ctx.request
+        # A body set with set_data() is a list holding one byte string;
+        # measuring it is cheaper than parsing the Content-Length header back
+        body = response.response
+        if type(body) is list:
+            sent = len(body[0]) if len(body) == 1 else sum(map(len, body))
+        else:
+            sent = None
+        _pending_requests.append((current.url_rule, current.method, response.status_code,
+            elapsed, current.environ.get('CONTENT_LENGTH'), sent))
+        if len(_pending_requests) >= OBSERVATION_BUFFER_SIZE:
+            flush_requests()
+        return response
@@ -0,0 +1,49 @@
+import base64
+import binascii
+import datetime
+import json
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row on a page as an opaque token"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+def decode_cursor(token, *types):
+    """Decode a token produced by encode_cursor into a tuple of values.
+
+    Takes the type (or tuple of types, as for isinstance) of each value in
+    the token. Tokens come back from clients, so a value of any other type,
+    including a bool where an int is expected, raises InvalidCursor.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursor("Invalid cursor")
+    for value, expected in zip(values, types):
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise InvalidCursor("Invalid cursor")
+    return tuple(values)
+
+def parse_bool(value, default=False):
+    """Interpret a query string flag such as ?include_total=true"""
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def parse_timestamp(value):
+    """Normalize an ISO 8601 query parameter to the stored 'YYYY-MM-DD HH:MM:SS' UTC form.
+
+    Returns None for missing values and raises ValueError for malformed ones.
+    """
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
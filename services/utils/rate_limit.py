@@ -0,0 +1,242 @@
+import abc
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request
+from services.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Algorithm used by limits that don't name one: token_bucket or sliding_window
+RATE_LIMIT_ALGORITHM = os.getenv('RATE_LIMIT_ALGORITHM', 'token_bucket')
+
+# Keys tracked by the in-memory backend; the least recently used are forgotten first.
+# That backend counts per process: under launcher.py each of the WEB_WORKERS
+# workers enforces every limit on its own, so a client can get up to
+# WEB_WORKERS times the configured rate unless a shared backend is set
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+
+TOKEN_BUCKET = 'token_bucket'
+SLIDING_WINDOW = 'sliding_window'
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+_LIMIT_SPEC = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$')
+
+rate_limited_requests = registry.counter(
+    'rate_limited_requests_total', 'Requests rejected by a rate limit', ('limit',)
+)
+
+class RateLimit:
+    """At most limit requests per period seconds, enforced with algorithm.
+
+    With the token bucket, limit is also the burst size: an idle client may
+    spend the whole allowance at once and then refills at limit/period per
+    second. The sliding window smooths the boundary between fixed windows by
+    weighting the previous window's count.
+    """
+
+    def __init__(self, name, limit, period, algorithm=None):
+        algorithm = algorithm or RATE_LIMIT_ALGORITHM
+        if algorithm not in (TOKEN_BUCKET, SLIDING_WINDOW):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        if limit <= 0 or period <= 0:
+            raise ValueError("Rate limit and period must be positive")
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.algorithm = algorithm
+        self.policy = f"{limit};w={int(period)}"
+
+    @classmethod
+    def parse(cls, name, spec, algorithm=None):
+        """Build a limit from a spec such as '100/minute' or '5/10seconds'; None if spec is empty"""
+        if not spec or not spec.strip():
+            return None
+        match = _LIMIT_SPEC.match(spec.lower())
+        if not match:
+            raise ValueError(f"Invalid rate limit for {name}: {spec!r}")
+        count, multiplier, unit = match.groups()
+        return cls(name, int(count), int(multiplier or 1) * PERIODS[unit], algorithm)
+
+class Decision:
+    """Outcome of one rate limit check, in whole requests and seconds"""
+
+    __slots__ = ('allowed', 'limit', 'remaining', 'reset_after', 'retry_after')
+
+    def __init__(self, allowed, limit, remaining, reset_after, retry_after=0.0):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+
+    def headers(self, policy):
+        headers = {
+            'RateLimit-Policy': policy,
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(math.ceil(self.reset_after))
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+class RateLimitBackend(abc.ABC):
+    """Where rate limit state lives and is updated.
+
+    Each method reads and updates one key's state atomically and returns a
+    Decision. To enforce limits across workers, implement both algorithms
+    against a shared store (e.g. Redis, running the same arithmetic in a
+    Lua script) and install it with set_rate_limit_backend().
+    """
+
+    @abc.abstractmethod
+    def token_bucket(self, key, capacity, rate, cost=1):
+        """Take cost tokens from a bucket refilled at rate per second; return a Decision"""
+
+    @abc.abstractmethod
+    def sliding_window(self, key, limit, window, cost=1):
+        """Count cost requests in a sliding window of window seconds; return a Decision"""
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Thread-safe in-process rate limit state, bounded by an LRU of keys.
+
+    State is not shared between processes, so every gunicorn worker counts
+    separately (see RATE_LIMIT_MAX_KEYS).
+    """
+
+    def __init__(self, max_keys=RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._state = OrderedDict()  # key -> [tokens, updated] or [window index, current, previous]
+        self._lock = threading.Lock()
+
+    def _store(self, key, state):
+        self._state[key] = state
+        self._state.move_to_end(key)
+        if len(self._state) > self.max_keys:
+            self._state.popitem(last=False)
+
+    def token_bucket(self, key, capacity, rate, cost=1):
+        with self._lock:
+            now = self._clock()
+            state = self._state.get(key)
+            if state is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, state[0] + (now - state[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._store(key, [tokens, now])
+        return Decision(
+            allowed, capacity, int(tokens),
+            reset_after=(capacity - tokens) / rate,
+            retry_after=0.0 if allowed else (cost - tokens) / rate
+        )
+
+    def sliding_window(self, key, limit, window, cost=1):
+        index, elapsed = divmod(self._clock(), window)
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or state[0] < index - 1:
+                current, previous = 0, 0
+            elif state[0] == index - 1:
+                # A new window began; the old current count becomes the previous one
+                current, previous = 0, state[1]
+            else:
+                current, previous = state[1], state[2]
+            weight = 1 - elapsed / window
+            estimate = previous * weight + current
+            allowed = estimate + cost <= limit
+            if allowed:
+                current += cost
+                estimate += cost
+            self._store(key, [index, current, previous])
+
+        retry_after = 0.0
+        if not allowed:
+            # Wait until the previous window's share has decayed enough, or
+            # failing that until the current window rolls over
+            excess = estimate + cost - limit
+            retry_after = window - elapsed
+            if previous and excess <= previous * weight:
+                retry_after = min(retry_after, excess * window / previous)
+        return Decision(allowed, limit, max(0, int(limit - estimate)), window - elapsed, retry_after)
+
+    def __len__(self):
+        return len(self._state)
+
+class RateLimiter:
+    """Checks requests against named limits stored in a backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def check(self, rate_limit, key, cost=1):
+        """Return the Decision for one request by key; errors in the backend allow the request"""
+        bucket = f"ratelimit:{rate_limit.name}:{key}"
+        try:
+            if rate_limit.algorithm == TOKEN_BUCKET:
+                return self.backend.token_bucket(bucket, rate_limit.limit, rate_limit.limit / rate_limit.period, cost)
+            return self.backend.sliding_window(bucket, rate_limit.limit, rate_limit.period, cost)
+        except Exception as e:
+            # An unavailable shared store must not take the API down with it
+            logger.error("Rate limit backend failed for %s: %s", rate_limit.name, e)
+            return None
+
+rate_limiter = RateLimiter(MemoryRateLimitBackend())
+
+def set_rate_limit_backend(backend):
+    """Use a different (e.g. shared) backend for rate limit state"""
+    rate_limiter.backend = backend
+
+def user_key(kwargs):
+    """Key requests by the user_id passed in by token_required"""
+    return f"user:{kwargs['user_id']}"
+
+def ip_key(kwargs):
+    """Key requests by client address; run behind ProxyFix to see the real client"""
+    return f"ip:{request.remote_addr}"
+
+def rate_limit(limit, key=ip_key):
+    """Decorator rejecting requests beyond limit (a RateLimit) with 429.
+
+    Put it below token_required to key by user. A None limit (an empty
+    setting) leaves the handler unlimited.
+    """
+    def decorator(f):
+        if limit is None:
+            return f
+
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            decision = rate_limiter.check(limit, key(kwargs))
+            if decision is None:
+                return f(*args, **kwargs)
+            g._rate_limit_headers = decision.headers(limit.policy)
+            if not decision.allowed:
+                rate_limited_requests.inc(limit.name)
+                return {
+                    'status': 'error',
+                    'message': 'Too many requests, please retry later'
+                }, 429
+            return f(*args, **kwargs)
+
+        return decorated
+    return decorator
+
+def init_app(app):
+    """Add the RateLimit-* headers of the checked limit to each response"""
+    @app.after_request
+    def _add_rate_limit_headers(response):
+        headers = g.pop('_rate_limit_headers', None)
+        if headers:
+            response.headers.update(headers)
+        return response
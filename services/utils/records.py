@@ -0,0 +1,67 @@
+from collections import namedtuple
+from services.utils.json_encoder import RowSet
+from services.utils.conditional import decoded_etag
+
+# Columns of a task as returned by the API, in SELECT/RETURNING order
+TASK_COLUMNS = ('id', 'title', 'description', 'status', 'created_at', 'updated_at', 'version')
+
+# Column list for SELECT and RETURNING clauses; keep in step with TASK_COLUMNS
+TASK_SELECT = ', '.join(TASK_COLUMNS)
+
+# Columns a client may change through PUT, PATCH or a batch update
+TASK_EDITABLE_COLUMNS = ('title', 'description', 'status')
+
+class TaskRecord(namedtuple('TaskRecord', TASK_COLUMNS)):
+    """One task row, addressable by column name.
+
+    A tuple subclass without a per-instance __dict__, so building one from
+    a cursor row costs a single allocation. Queries must select TASK_SELECT
+    so the positions line up.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a record from a cursor row, or return None for a missing row"""
+        return None if row is None else cls._make(row)
+
+    def to_dict(self):
+        """Return the task in the task_model shape"""
+        return dict(zip(TASK_COLUMNS, self))
+
+    @property
+    def etag(self):
+        """Entity tag of this task; changes whenever an update bumps version"""
+        return f"{self.id}.{self.version}"
+
+    def sort_key(self, field='created_at'):
+        """Keyset pagination position of this task when sorted by field"""
+        return getattr(self, field), self.id
+
+def parse_task_etag(tag, task_id):
+    """Return the version encoded in an entity tag of task_id, or None"""
+    tag_id, _, version = decoded_etag(tag).partition('.')
+    if tag_id != str(task_id) or not version.isdigit():
+        return None
+    return int(version)
+
+def update_assignments(data):
+    """Return (SET clause, params) changing only the editable fields present in data.
+
+    Every update also moves updated_at and bumps version, which changes
+    the task's entity tag.
+    """
+    columns = [column for column in TASK_EDITABLE_COLUMNS if column in data]
+    assignments = [f"{column} = ?" for column in columns]
+    assignments += ["updated_at = CURRENT_TIMESTAMP", "version = version + 1"]
+    return ", ".join(assignments), [data[column] for column in columns]
+
+def task_records(rows):
+    """Build TaskRecords from an iterable of cursor rows"""
+    make = TaskRecord._make
+    return [make(row) for row in rows]
+
+def task_rowset(records):
+    """Wrap records for lazy serialization into a list of task_model objects"""
+    return RowSet(TASK_COLUMNS, records)